@@ -0,0 +1,191 @@
+"""
+Non-blocking structured access logging.
+
+The middleware hands each access record (a plain dict) to a `QueueHandler`;
+a `QueueListener` thread serializes it (orjson when installed) and writes it
+to the stream, so neither serialization nor stdout backpressure runs on the
+event loop. Successful requests can be sampled (`LOG_SAMPLE_RATE`), while
+errors (status >= 400) and slow requests (`LOG_SLOW_MS`) are always logged.
+The queue is bounded (`LOG_QUEUE_SIZE`): when the stream cannot keep up,
+records are dropped and counted instead of piling up in memory.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def dumps(record: Dict[str, Any]) -> str:
+    """Serialize a log record to one JSON line (orjson when available)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record).decode("utf-8")
+    return json.dumps(record)
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Formats records whose `msg` is a dict as a JSON line (listener side)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            return dumps(record.msg)
+        return super().format(record)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def __init__(self, queue_, on_full: Optional[Callable[[], None]] = None):
+        super().__init__(queue_)
+        self.on_full = on_full
+
+    def enqueue(self, record) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.on_full is not None:
+                self.on_full()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats on the calling thread; access records
+        # carry a dict and no args, so they can cross the queue untouched
+        return record
+
+
+class _RecordListener(logging.handlers.QueueListener):
+    """QueueListener that also accepts bare access-record dicts."""
+
+    def __init__(self, queue_, *handlers, name: str = "api"):
+        super().__init__(queue_, *handlers, respect_handler_level=True)
+        self.name = name
+
+    def prepare(self, record):
+        # Building the LogRecord here keeps its cost off the request path
+        if isinstance(record, dict):
+            return logging.makeLogRecord({
+                "name": self.name, "msg": record, "levelno": logging.INFO, "levelname": "INFO",
+            })
+        return record
+
+    def enqueue_sentinel(self) -> None:
+        # Blocking put: on a full queue the listener frees a slot as it drains
+        self.queue.put(self._sentinel)
+
+
+class AccessLogger:
+    """Queue-backed access logger with sampling of successful requests."""
+
+    def __init__(
+        self,
+        name: str = "api",
+        sample_rate: float = 1.0,
+        slow_ms: float = 1000.0,
+        stream=None,
+        queue_size: int = 10_000
+    ):
+        """
+        Args:
+            name: Logger name
+            sample_rate: Fraction of successful, fast requests that are logged
+            slow_ms: Requests at or above this latency are always logged
+            stream: Output stream of the listener (defaults to stderr)
+            queue_size: Records waiting for the listener before new ones are dropped
+        """
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.logger = logging.getLogger(name)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+        output.setFormatter(JsonLineFormatter("%(message)s"))
+        self._listener = _RecordListener(self._queue, output, name=name)
+        self.logger.handlers = [DeferredQueueHandler(self._queue, on_full=self._drop)]
+        self._running = False
+
+    @classmethod
+    def from_env(cls, name: str = "api") -> "AccessLogger":
+        """Configure from LOG_SAMPLE_RATE (1.0), LOG_SLOW_MS (1000 ms) and LOG_QUEUE_SIZE (10000 records)."""
+        return cls(
+            name=name,
+            sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),
+            slow_ms=float(os.getenv("LOG_SLOW_MS", "1000")),
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        )
+
+    def _drop(self) -> None:
+        self.dropped += 1
+
+    def start(self) -> None:
+        """Start the listener thread (idempotent)."""
+        if not self._running:
+            self._listener.start()
+            self._running = True
+
+    def stop(self) -> None:
+        """Drain the queue and stop the listener thread."""
+        if self._running:
+            self._listener.stop()
+            self._running = False
+
+    def should_log(self, status_code: int, latency_ms: float) -> bool:
+        if status_code >= 400 or latency_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def log_request(
+        self,
+        request_id: str,
+        method: str,
+        path: str,
+        status_code: int,
+        latency_ms: float,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Enqueue one access record.
+
+        The dict goes onto the queue as is; the LogRecord, the JSON line and
+        the write are all produced on the listener thread.
+        """
+        if not self.should_log(status_code, latency_ms):
+            return
+        record = {
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "latency_ms": round(latency_ms, 2),
+        }
+        if latency_ms >= self.slow_ms:
+            record["slow"] = True
+        if extra:
+            record.update(extra)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # The stream is behind; losing a line beats unbounded memory
+            self._drop()
+
+
+def configure_access_log(name: str = "api") -> AccessLogger:
+    """Create the access logger from the environment and start its listener."""
+    access_logger = AccessLogger.from_env(name)
+    access_logger.start()
+    atexit.register(access_logger.stop)
+    return access_logger
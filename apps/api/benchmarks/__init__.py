@@ -0,0 +1 @@
+"""Performance benchmarks for the API hot paths (`python -m benchmarks.suite`)."""
@@ -0,0 +1,137 @@
+"""
+/predict latency with JSON vs Arrow IPC bodies at growing batch sizes.
+
+A model is trained on synthetic data, then batches are scored through an
+in-process ASGI client (no network) as:
+
+- `json_records`: `{"records": [...]}` -> records response;
+- `json_columns`: `{"columns": {...}}` -> columnar response;
+- `arrow`: Arrow IPC stream -> Arrow IPC stream (`plan`/`region` sent
+  dictionary-encoded, as `pa.Table.from_pandas` does for categoricals).
+
+Request bodies are encoded once up front; each timed call sends the body and
+decodes the response (`json.loads` / `pa.ipc.open_stream`), which is what a
+caller holding the data in memory pays per request.
+
+Usage (from apps/api):
+    python -m benchmarks.arrow
+    python -m benchmarks.arrow --sizes 1000,10000,100000 --out arrow.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.datasets import TARGET, make_churn_frame, write_churn_csv
+from benchmarks.suite import bench_train, latency_summary
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# Rows scored per variant and size (fewer repetitions for large batches)
+ROW_BUDGET = 1_000_000
+
+
+def encode_bodies(size: int, seed: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Pre-encoded request bodies and headers per variant."""
+    import pyarrow as pa
+
+    frame = make_churn_frame(size, seed=seed).drop(columns=[TARGET])
+    records = frame.to_dict(orient="records")
+    columns = {name: frame[name].tolist() for name in frame.columns}
+
+    categorical = frame.select_dtypes(exclude="number").columns
+    table = pa.Table.from_pandas(frame.astype({c: "category" for c in categorical}), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    json_headers = {"Content-Type": "application/json"}
+    arrow_type = "application/vnd.apache.arrow.stream"
+    return {
+        "json_records": {"body": json.dumps({"records": records}).encode(), "headers": json_headers, "query": ""},
+        "json_columns": {"body": json.dumps({"columns": columns}).encode(), "headers": json_headers,
+                         "query": "?format=columnar"},
+        "arrow": {"body": sink.getvalue().to_pybytes(), "headers": {"Content-Type": arrow_type, "Accept": arrow_type},
+                  "query": ""},
+    }
+
+
+def _decode(response) -> int:
+    import pyarrow as pa
+
+    if response.headers["content-type"].startswith("application/vnd.apache.arrow.stream"):
+        return pa.ipc.open_stream(pa.py_buffer(response.content)).read_all().num_rows
+    data = json.loads(response.content)
+    return len(data["predictions"]) if "predictions" in data else len(data["labels"])
+
+
+def bench_sizes(sizes: Sequence[int]) -> Dict[str, Any]:
+    """Latency per variant and batch size (ARTIFACTS_DIR must point at a trained model)."""
+    import httpx
+
+    import main
+
+    async def scenario():
+        results: Dict[str, Any] = {}
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+                for size in sizes:
+                    by_variant = {}
+                    for name, request in encode_bodies(size).items():
+                        async def call():
+                            response = await client.post(
+                                "/predict" + request["query"], content=request["body"], headers=request["headers"]
+                            )
+                            response.raise_for_status()
+                            if _decode(response) != size:
+                                raise RuntimeError(f"{name}: wrong row count")
+
+                        await call()
+                        latencies = []
+                        for _ in range(max(3, min(50, ROW_BUDGET // size))):
+                            started = time.perf_counter()
+                            await call()
+                            latencies.append(time.perf_counter() - started)
+                        by_variant[name] = {**latency_summary(latencies), "request_bytes": len(request["body"])}
+                    results[str(size)] = by_variant
+        return results
+
+    return asyncio.run(scenario())
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES, train_rows: int = 10_000) -> Dict[str, Any]:
+    """Train a model in a scratch dir and benchmark every variant."""
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        csv_path = write_churn_csv(work_dir / "data" / f"churn_{train_rows}.csv", train_rows)
+        bench_train(csv_path, work_dir / "serve")
+        os.environ["ARTIFACTS_DIR"] = str(work_dir / "serve")
+        os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+        return bench_sizes(sizes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /predict with JSON vs Arrow IPC bodies.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated batch sizes")
+    parser.add_argument("--out", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run([int(n) for n in args.sizes.split(",")])
+    print(f"{'rows':>8} {'variant':>13} {'p50_ms':>9} {'p99_ms':>9} {'req_bytes':>11}")
+    for size, by_variant in results.items():
+        for name, r in by_variant.items():
+            print(f"{size:>8} {name:>13} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['request_bytes']:>11}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
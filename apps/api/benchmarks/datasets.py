@@ -0,0 +1,129 @@
+"""
+Synthetic churn-like datasets for benchmarks.
+
+Rows have the columns of `data/demo_churn.csv`; `plan` and `region` can be
+widened to many categories so the one-hot encoder and the request validation
+see realistic vocabularies. Labels follow a fixed logistic model, so every
+scale is learnable and the generated files are reproducible for a seed.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TARGET = "churn"
+BASE_PLANS = ["basic", "pro", "enterprise"]
+BASE_REGIONS = ["latam", "na", "eu"]
+
+# Rows generated and written per step; bounds memory for the 10M-row scale
+CHUNK_ROWS = 1_000_000
+
+
+def category_names(base: List[str], cardinality: int, prefix: str) -> List[str]:
+    """The base categories followed by synthetic ones up to `cardinality`."""
+    extra = [f"{prefix}_{i}" for i in range(max(0, cardinality - len(base)))]
+    return (base + extra)[:max(1, cardinality)]
+
+
+def make_churn_frame(
+    rows: int,
+    seed: int = 0,
+    plan_cardinality: int = 3,
+    region_cardinality: int = 3,
+    effects_seed: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Generate a churn-like DataFrame in memory.
+
+    Args:
+        rows: Number of rows
+        seed: Random seed
+        plan_cardinality: Number of distinct `plan` values
+        region_cardinality: Number of distinct `region` values
+        effects_seed: Seed of the per-category label effects (defaults to
+            `seed`); fixed across the chunks of one file
+
+    Returns:
+        DataFrame with the demo dataset's feature columns plus `churn`
+    """
+    rng = np.random.default_rng(seed)
+    plans = np.asarray(category_names(BASE_PLANS, plan_cardinality, "plan"), dtype=object)
+    regions = np.asarray(category_names(BASE_REGIONS, region_cardinality, "region"), dtype=object)
+
+    # Zipf-like category frequencies: a few common values and a long tail
+    plan_weights = 1.0 / np.arange(1, len(plans) + 1)
+    region_weights = 1.0 / np.arange(1, len(regions) + 1)
+    plan_idx = rng.choice(len(plans), size=rows, p=plan_weights / plan_weights.sum())
+    region_idx = rng.choice(len(regions), size=rows, p=region_weights / region_weights.sum())
+
+    age = rng.integers(18, 80, size=rows)
+    tenure = rng.integers(0, 72, size=rows)
+    spend = np.round(rng.gamma(shape=2.0, scale=30.0, size=rows) + 10 * (plan_idx % 3), 2)
+    tickets = rng.poisson(1.0, size=rows)
+
+    effects = np.random.default_rng(seed if effects_seed is None else effects_seed)
+    plan_effect = effects.normal(0.0, 0.5, size=len(plans))
+    region_effect = effects.normal(0.0, 0.3, size=len(regions))
+    logit = (
+        -0.5 - 0.04 * tenure + 0.45 * tickets - 0.005 * (spend - 60) - 0.01 * (age - 45)
+        + plan_effect[plan_idx] + region_effect[region_idx]
+    )
+    churn = (rng.random(rows) < 1.0 / (1.0 + np.exp(-logit))).astype(np.int8)
+
+    return pd.DataFrame({
+        "age": age,
+        "tenure_months": tenure,
+        "monthly_spend": spend,
+        "support_tickets_last_90d": tickets,
+        "plan": plans[plan_idx],
+        "region": regions[region_idx],
+        TARGET: churn,
+    })
+
+
+def write_churn_csv(
+    path: Path,
+    rows: int,
+    seed: int = 0,
+    plan_cardinality: int = 3,
+    region_cardinality: int = 3
+) -> Path:
+    """
+    Write a synthetic dataset to CSV in chunks of `CHUNK_ROWS`.
+
+    Existing files are reused, so repeated runs do not regenerate large inputs.
+
+    Returns:
+        The CSV path
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".csv.tmp")
+    written = 0
+    chunk = 0
+    with open(tmp_path, "w", newline="") as f:
+        while written < rows:
+            n = min(CHUNK_ROWS, rows - written)
+            frame = make_churn_frame(n, seed + 1000 * chunk, plan_cardinality, region_cardinality, effects_seed=seed)
+            frame.to_csv(f, header=written == 0, index=False)
+            written += n
+            chunk += 1
+    tmp_path.rename(path)
+    return path
+
+
+def make_records(
+    rows: int,
+    seed: int = 0,
+    plan_cardinality: int = 3,
+    region_cardinality: int = 3,
+    frame: Optional[pd.DataFrame] = None
+) -> List[Dict[str, object]]:
+    """Feature records (no target) in the `/predict` request format."""
+    if frame is None:
+        frame = make_churn_frame(rows, seed, plan_cardinality, region_cardinality)
+    return frame.drop(columns=[TARGET]).head(rows).to_dict(orient="records")
@@ -0,0 +1,168 @@
+"""
+Memory and latency of the one-hot encoding paths at growing cardinalities.
+
+For each `plan` cardinality (default 10, 1K and 100K levels) a churn-like
+frame is generated and the pipeline is fitted with:
+
+- `dense`: `OneHotEncoder(sparse_output=False)` (skipped when the dense
+  training matrix would exceed `--dense-limit-mb`);
+- `sparse`: CSR one-hot output;
+- `grouped`: CSR output with rare levels grouped (`min_frequency`).
+
+Reported per variant: fit seconds, peak traced memory while transforming the
+training rows, size of the transformed matrix, and single-row predict latency
+through the sklearn pipeline and through the compiled engine.
+
+Usage (from apps/api):
+    python -m benchmarks.encoding
+    python -m benchmarks.encoding --rows 200000 --levels 10,1000,100000 --out encoding.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Sequence
+
+import scipy.sparse as sp
+
+from benchmarks.datasets import TARGET, make_churn_frame
+from benchmarks.suite import latency_summary
+from ml.compiled import compile_pipeline
+from ml.pipeline import build_pipeline, onehot_width
+from ml.score import frame_to_arrays
+
+DEFAULT_LEVELS = (10, 1_000, 100_000)
+DEFAULT_ROWS = 50_000
+DENSE_LIMIT_MB = 2_048.0
+GROUPED_MIN_FREQUENCY = 5
+PREDICT_ITERATIONS = 200
+
+VARIANTS = {
+    "dense": {"sparse": False},
+    "sparse": {"sparse": True},
+    "grouped": {"sparse": True, "min_frequency": GROUPED_MIN_FREQUENCY},
+}
+
+
+def matrix_mb(matrix) -> float:
+    """Memory held by a dense or CSR matrix, in MB."""
+    if sp.issparse(matrix):
+        nbytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    else:
+        nbytes = matrix.nbytes
+    return round(nbytes / 1024 / 1024, 2)
+
+
+def _predict_latency(predict, iterations: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        predict()
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+def bench_variant(df, numeric: List[str], categorical: List[str], encoding: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit one encoding variant and measure memory and latency."""
+    X, y = df.drop(columns=[TARGET]), df[TARGET]
+
+    started = time.perf_counter()
+    pipeline = build_pipeline(numeric, categorical, encoding=encoding).fit(X, y)
+    fit_s = time.perf_counter() - started
+
+    # Memory of materializing the training matrix, traced separately so the
+    # fit timing above is not slowed down by tracemalloc
+    preprocessor = pipeline.named_steps["preprocessor"]
+    tracemalloc.start()
+    transformed = preprocessor.transform(X)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    row = X.iloc[:1]
+    compiled = compile_pipeline(pipeline)
+    schema = {"feature_names": list(X.columns), "numeric_features": numeric, "categorical_features": categorical}
+    arrays = frame_to_arrays(row, schema)
+    result = {
+        "fit_s": round(fit_s, 3),
+        "transform_peak_mb": round(peak / 1024 / 1024, 2),
+        "matrix_mb": matrix_mb(transformed),
+        "n_features_out": int(transformed.shape[1]),
+        "predict_pipeline": _predict_latency(lambda: pipeline.predict_proba(row), PREDICT_ITERATIONS),
+    }
+    if compiled is not None:
+        result["predict_compiled"] = _predict_latency(lambda: compiled.predict_proba(arrays), PREDICT_ITERATIONS)
+    return result
+
+
+def run(
+    levels: Sequence[int] = DEFAULT_LEVELS,
+    rows: int = DEFAULT_ROWS,
+    dense_limit_mb: float = DENSE_LIMIT_MB
+) -> Dict[str, Any]:
+    """
+    Benchmark every encoding variant at each cardinality.
+
+    Args:
+        levels: `plan` cardinalities to generate
+        rows: Training rows per dataset
+        dense_limit_mb: Skip the dense variant above this estimated matrix size
+
+    Returns:
+        Dictionary keyed by cardinality, then by variant
+    """
+    results: Dict[str, Any] = {}
+    for n_levels in levels:
+        df = make_churn_frame(rows, seed=0, plan_cardinality=n_levels)
+        X = df.drop(columns=[TARGET])
+        numeric = X.select_dtypes(include="number").columns.tolist()
+        categorical = [c for c in X.columns if c not in numeric]
+        width = onehot_width(X, categorical)
+        dense_mb = rows * (len(numeric) + width) * 8 / 1024 / 1024
+
+        by_variant: Dict[str, Any] = {"onehot_width": width}
+        for name, encoding in VARIANTS.items():
+            if name == "dense" and dense_mb > dense_limit_mb:
+                by_variant[name] = {"skipped": f"dense matrix would need {dense_mb:,.0f} MB"}
+                continue
+            by_variant[name] = bench_variant(df, numeric, categorical, encoding)
+        results[str(n_levels)] = by_variant
+    return results
+
+
+def _report(results: Dict[str, Any]) -> None:
+    header = f"{'levels':>8} {'variant':>8} {'fit_s':>8} {'peak_mb':>9} {'matrix_mb':>10} {'pipe_p50':>9} {'comp_p50':>9}"
+    print(header)
+    for n_levels, by_variant in results.items():
+        for name in VARIANTS:
+            r = by_variant[name]
+            if "skipped" in r:
+                print(f"{n_levels:>8} {name:>8}   skipped: {r['skipped']}")
+                continue
+            compiled_p50 = r.get("predict_compiled", {}).get("p50_ms", float("nan"))
+            print(
+                f"{n_levels:>8} {name:>8} {r['fit_s']:>8.3f} {r['transform_peak_mb']:>9.1f} "
+                f"{r['matrix_mb']:>10.1f} {r['predict_pipeline']['p50_ms']:>9.3f} {compiled_p50:>9.3f}"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dense vs sparse one-hot encoding.")
+    parser.add_argument("--levels", default=",".join(str(n) for n in DEFAULT_LEVELS),
+                        help="Comma-separated category cardinalities")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Training rows per dataset")
+    parser.add_argument("--dense-limit-mb", type=float, default=DENSE_LIMIT_MB,
+                        help="Skip the dense variant above this estimated matrix size")
+    parser.add_argument("--out", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run([int(n) for n in args.levels.split(",")], args.rows, args.dense_limit_mb)
+    _report(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""
+Per-request cost of the serving instrumentation.
+
+- `metrics_overhead`: what the middleware and handler record per /predict
+  request in `observability` (request counter, latency histogram, six stage
+  marks), replayed on a private registry.
+- `access_log_overhead`: access logging as the previous middleware did it
+  (`json.dumps` plus a synchronous `StreamHandler`) vs the queue-backed
+  `access_log.AccessLogger`, both writing to a sink with a simulated delay.
+
+Usage (from apps/api):
+    python -m benchmarks.instrumentation
+"""
+
+import argparse
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+from access_log import AccessLogger
+from observability import MetricsRegistry, StageTimer
+
+
+def metrics_overhead(iterations: int = 20_000) -> float:
+    """Mean instrumentation cost of one /predict request, in seconds."""
+    local = MetricsRegistry()
+    requests = local.counter("r", "", ("method", "route", "status"))
+    latency = local.histogram("l", "", ("method", "route", "status"))
+    stages = local.histogram("s", "", ("stage",))
+    labels = ("POST", "/predict", "200")
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        timer = StageTimer(stages, begin)
+        for stage in ("parse", "validate", "dataframe", "transform", "model", "serialize"):
+            timer.mark(stage)
+        timer.flush()
+        requests.inc(labels)
+        latency.observe(time.perf_counter() - begin, labels)
+    return (time.perf_counter() - started) / iterations
+
+
+class _SlowStream:
+    """Stream whose writes take `delay_s`, standing in for a congested stdout/pipe."""
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+
+    def write(self, text: str) -> int:
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def access_log_overhead(iterations: int = 5_000, write_delay_s: float = 0.0) -> Dict[str, float]:
+    """
+    Per-request cost of access logging on the calling thread, in seconds.
+
+    Args:
+        iterations: Records logged per variant
+        write_delay_s: Simulated latency of each write to the output stream
+
+    Returns:
+        Dict with the mean seconds per record for "sync" and "queue", and the
+        records the queue-backed logger dropped
+    """
+    sink = _SlowStream(write_delay_s)
+
+    sync_logger = logging.getLogger("access_log.bench.sync")
+    sync_logger.propagate = False
+    sync_logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    sync_logger.handlers = [handler]
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        sync_logger.info(json.dumps({
+            "request_id": "bench", "method": "POST", "path": "/predict",
+            "status_code": 200, "latency_ms": round(1.234, 2),
+        }))
+    sync_s = (time.perf_counter() - started) / iterations
+
+    queued = AccessLogger("access_log.bench.queue", stream=sink, queue_size=iterations)
+    queued.start()
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            queued.log_request("bench", "POST", "/predict", 200, 1.234)
+        queue_s = (time.perf_counter() - started) / iterations
+    finally:
+        # Only the caller's cost is measured; flush the backlog without the delay
+        sink.delay_s = 0.0
+        queued.stop()
+    return {"sync": sync_s, "queue": queue_s, "dropped": queued.dropped}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the per-request instrumentation cost.")
+    parser.add_argument("--iterations", type=int, default=20_000, help="Requests replayed")
+    args = parser.parse_args(argv)
+
+    print(f"metrics: {metrics_overhead(args.iterations) * 1e6:.1f} us/request")
+    for delay in (0.0, 0.0005):
+        result = access_log_overhead(5_000 if delay == 0 else 500, write_delay_s=delay)
+        print(
+            f"access log, write delay {delay * 1e3:.1f} ms: sync {result['sync'] * 1e6:.1f} us/request, "
+            f"queue {result['queue'] * 1e6:.1f} us/request"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
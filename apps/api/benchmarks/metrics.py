@@ -0,0 +1,75 @@
+"""
+Cost of the training-report metrics: the sklearn scorers vs
+`ml.metrics.compute_classification_metrics` on synthetic scores.
+
+Reported per row count: seconds for accuracy/precision/recall/F1/ROC-AUC and
+the confusion matrix with sklearn, the same with `ml.metrics`, and `ml.metrics`
+with bootstrap intervals and a threshold curve (what /train stores).
+
+Usage (from apps/api):
+    python -m benchmarks.metrics
+    python -m benchmarks.metrics --rows 100000,1000000
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
+
+from ml.metrics import BOOTSTRAP_RESAMPLES, CURVE_POINTS, compute_classification_metrics
+
+DEFAULT_ROWS = (100_000, 1_000_000)
+
+
+def compare_with_sklearn(rows: int = 1_000_000, seed: int = 0) -> Dict[str, float]:
+    """
+    Seconds spent by the sklearn scorers and by `compute_classification_metrics`.
+
+    Returns:
+        Dict with "sklearn", "numpy" and "numpy_full" (with bootstrap
+        intervals and a threshold curve) timings
+    """
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, rows)
+    y_proba = np.clip(0.3 * y_true + rng.random(rows) * 0.7, 0, 1)
+    y_pred = (y_proba >= 0.5).astype(int)
+
+    started = time.perf_counter()
+    accuracy_score(y_true, y_pred)
+    precision_score(y_true, y_pred, zero_division=0)
+    recall_score(y_true, y_pred, zero_division=0)
+    f1_score(y_true, y_pred, zero_division=0)
+    roc_auc_score(y_true, y_proba)
+    confusion_matrix(y_true, y_pred)
+    sklearn_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compute_classification_metrics(y_true, y_pred, y_proba)
+    numpy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compute_classification_metrics(y_true, y_pred, y_proba, n_bootstrap=BOOTSTRAP_RESAMPLES, curve_points=CURVE_POINTS)
+    full_s = time.perf_counter() - started
+    return {"sklearn": sklearn_s, "numpy": numpy_s, "numpy_full": full_s}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the training-report metrics against sklearn.")
+    parser.add_argument("--rows", default=",".join(str(n) for n in DEFAULT_ROWS),
+                        help="Comma-separated test-set sizes")
+    args = parser.parse_args(argv)
+
+    for n in (int(n) for n in args.rows.split(",")):
+        result = compare_with_sklearn(n)
+        print(
+            f"{n:>9} rows: sklearn {result['sklearn']:.3f} s, numpy {result['numpy']:.3f} s, "
+            f"numpy + {BOOTSTRAP_RESAMPLES} bootstrap resamples + {CURVE_POINTS}-point curve "
+            f"{result['numpy_full']:.3f} s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
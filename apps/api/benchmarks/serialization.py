@@ -0,0 +1,112 @@
+"""
+Cost of rendering /predict responses at growing batch sizes.
+
+For each batch size, random labels/probabilities are rendered with:
+
+- `pydantic`: a `PredictResponse` built from per-row dicts and serialized
+  the way FastAPI serializes a `response_model` (validate, `jsonable_encoder`,
+  `json.dumps`);
+- `dicts_json`: per-row dicts with `int()`/`float()` conversions and
+  `JSONResponse` (the renderer before `ml.responses`);
+- `records`: `ml.responses.render_predictions`, records layout;
+- `columnar`: `ml.responses.render_predictions`, columnar layout.
+
+Reported per variant: p50/p95/p99/mean milliseconds and body size.
+
+Usage (from apps/api):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 100,1000,10000,50000,100000 --out serialization.json
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.suite import latency_summary
+from ml.responses import COLUMNAR, ORJSON_AVAILABLE, RECORDS, render_predictions
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 50_000, 100_000)
+# Rows rendered per variant and size (fewer repetitions for large batches)
+ROW_BUDGET = 2_000_000
+
+
+def _variants() -> Dict[str, Callable[[np.ndarray, np.ndarray], bytes]]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from main import PredictResponse
+
+    def pydantic(labels, proba):
+        predictions = [{"label": int(p), "probability": float(q)} for p, q in zip(labels, proba)]
+        response = PredictResponse(predictions=predictions)
+        return JSONResponse(content=jsonable_encoder(response)).body
+
+    def dicts_json(labels, proba):
+        predictions = [{"label": int(p), "probability": float(q)} for p, q in zip(labels, proba)]
+        return JSONResponse(content={"predictions": predictions}).body
+
+    return {
+        "pydantic": pydantic,
+        "dicts_json": dicts_json,
+        "records": lambda labels, proba: render_predictions(labels, proba, RECORDS),
+        "columnar": lambda labels, proba: render_predictions(labels, proba, COLUMNAR),
+    }
+
+
+def bench_size(size: int, variants: Dict[str, Callable], seed: int = 0) -> Dict[str, Any]:
+    """Render one batch size with every variant."""
+    rng = np.random.default_rng(seed)
+    proba = rng.random(size)
+    labels = (proba >= 0.5).astype(np.int64)
+    repeats = max(3, min(200, ROW_BUDGET // size))
+
+    results: Dict[str, Any] = {}
+    for name, render in variants.items():
+        body = render(labels, proba)
+        latencies = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            render(labels, proba)
+            latencies.append(time.perf_counter() - started)
+        results[name] = {**latency_summary(latencies), "bytes": len(body)}
+    return results
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES) -> Dict[str, Any]:
+    """
+    Benchmark every renderer at each batch size.
+
+    Returns:
+        Dict with orjson availability and the results keyed by batch size
+    """
+    variants = _variants()
+    return {
+        "orjson": ORJSON_AVAILABLE,
+        "sizes": {str(size): bench_size(size, variants) for size in sizes},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /predict response rendering.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated batch sizes")
+    parser.add_argument("--out", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run([int(n) for n in args.sizes.split(",")])
+    print(f"orjson={results['orjson']}")
+    print(f"{'rows':>8} {'variant':>10} {'p50_ms':>9} {'p99_ms':>9} {'bytes':>10}")
+    for size, by_variant in results["sizes"].items():
+        for name, r in by_variant.items():
+            print(f"{size:>8} {name:>10} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['bytes']:>10}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,406 @@
+"""
+Benchmark and load-test suite for the API hot paths.
+
+Measures, on synthetic churn-like data (`benchmarks.datasets`):
+
+- `/train`: wall time, per-stage timings and peak RSS of a training run per
+  dataset scale, each in a fresh process so RSS is not shared between scales.
+- `/predict`: p50/p95/p99 latency at batch sizes 1, 100 and 10K rows through
+  an in-process ASGI client (no network) and through a local uvicorn server.
+- Cold start: uvicorn spawn -> `/health` ready, and -> first `/predict`
+  answered (includes loading the model).
+
+Results are written as JSON with a flat `metrics` mapping (every metric is
+lower-is-better) that `compare` checks against a stored baseline.
+
+Usage (from apps/api):
+    python -m benchmarks.suite run --out bench.json
+    python -m benchmarks.suite run --scales 1000,100000,1000000,10000000 --plan-cardinality 50
+    python -m benchmarks.suite compare bench.json benchmarks/baseline.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.datasets import TARGET, make_records, write_churn_csv
+
+API_ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_SCALES = (1_000, 100_000)
+BATCH_SIZES = (1, 100, 10_000)
+DEFAULT_THRESHOLD = 0.2
+# Relative changes on metrics below this many ms/s/MB are treated as noise
+NOISE_FLOOR = {"_ms": 0.5, "_s": 0.05, "_mb": 5.0}
+
+
+def latency_summary(latencies_s: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean of request latencies, in milliseconds."""
+    ms = np.asarray(latencies_s) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def requests_for_batch(batch_size: int, requests: int) -> int:
+    """Fewer requests for large batches so every batch size moves similar row counts."""
+    return max(10, min(requests, requests * 100 // batch_size))
+
+
+def _subprocess_env(artifacts_dir: Path) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["ARTIFACTS_DIR"] = str(artifacts_dir)
+    # Keep the access log off the measurements (errors are still logged)
+    env["LOG_SAMPLE_RATE"] = "0"
+    env["PYTHONPATH"] = str(API_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def bench_train(csv_path: Path, artifacts_dir: Path) -> Dict[str, Any]:
+    """
+    Run one training in a child process.
+
+    Args:
+        csv_path: Training CSV
+        artifacts_dir: Where the child writes the model artifacts
+
+    Returns:
+        Dict with wall_s, peak_rss_mb and the per-stage timings of the run
+
+    Raises:
+        RuntimeError: If the training process fails
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.suite", "train-worker", str(csv_path), str(artifacts_dir)],
+        cwd=API_ROOT, env=_subprocess_env(artifacts_dir),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stdout, stderr = process.communicate()
+    wall_s = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"Training failed for {csv_path}: {stderr.decode(errors='replace')[-2000:]}")
+    result = json.loads(stdout.decode().strip().splitlines()[-1])
+    return {"wall_s": round(wall_s, 3), "peak_rss_mb": result["peak_rss_mb"], "timings": result["timings"]}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _train_worker(csv_path: str, artifacts_dir: str) -> int:
+    # Peak RSS is read by the child itself: RUSAGE_CHILDREN in the parent is
+    # the maximum over every child, not this run
+    from ml.training import run_training
+
+    result = run_training(csv_path, TARGET, 0.2, 0.5, artifacts_dir=artifacts_dir)
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(), "timings": result["timings"], "rows": result["rows"]}))
+    return 0
+
+
+async def _predict_loop(
+    post: Callable[[List[Dict[str, Any]]], Any],
+    records: List[Dict[str, Any]],
+    batch_sizes: Sequence[int],
+    requests: int
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for batch_size in batch_sizes:
+        batch = records[:batch_size]
+        for _ in range(3):
+            await post(batch)
+        latencies = []
+        for _ in range(requests_for_batch(batch_size, requests)):
+            started = time.perf_counter()
+            await post(batch)
+            latencies.append(time.perf_counter() - started)
+        results[f"batch_{batch_size}"] = latency_summary(latencies)
+    return results
+
+
+def bench_predict_asgi(
+    records: List[Dict[str, Any]],
+    batch_sizes: Sequence[int] = BATCH_SIZES,
+    requests: int = 200
+) -> Dict[str, Dict[str, float]]:
+    """
+    /predict latency through an in-process ASGI client.
+
+    The app is imported here, so ARTIFACTS_DIR must already point at the
+    benchmark model; the app's lifespan runs around the measurements.
+    """
+    import httpx
+
+    import main
+
+    async def scenario():
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                async def post(batch):
+                    response = await client.post("/predict", json={"records": batch})
+                    response.raise_for_status()
+
+                return await _predict_loop(post, records, batch_sizes, requests)
+
+    return asyncio.run(scenario())
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_uvicorn(
+    artifacts_dir: Path,
+    records: List[Dict[str, Any]],
+    batch_sizes: Sequence[int] = BATCH_SIZES,
+    requests: int = 200,
+    startup_timeout_s: float = 60.0
+) -> Dict[str, Any]:
+    """
+    Cold start and /predict latency against a local uvicorn process.
+
+    Returns:
+        Dict with "cold_start" (startup_s, first_predict_s) and per-batch latencies
+    """
+    import httpx
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=API_ROOT, env=_subprocess_env(artifacts_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=60.0) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                if time.perf_counter() - started > startup_timeout_s:
+                    raise RuntimeError("uvicorn did not become ready in time")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            startup_s = time.perf_counter() - started
+            client.post("/predict", json={"records": records[:1]}).raise_for_status()
+            first_predict_s = time.perf_counter() - started
+
+            async def post(batch):
+                client.post("/predict", json={"records": batch}).raise_for_status()
+
+            latencies = asyncio.run(_predict_loop(post, records, batch_sizes, requests))
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        "cold_start": {"startup_s": round(startup_s, 3), "first_predict_s": round(first_predict_s, 3)},
+        **latencies,
+    }
+
+
+def flatten(tree: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Nested result dicts to dotted metric names."""
+    flat: Dict[str, float] = {}
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+
+def run_suite(
+    work_dir: Path,
+    scales: Sequence[int] = DEFAULT_SCALES,
+    plan_cardinality: int = 3,
+    region_cardinality: int = 3,
+    predict_rows: int = 10_000,
+    requests: int = 200,
+    uvicorn: bool = True
+) -> Dict[str, Any]:
+    """
+    Run every benchmark and return the results document.
+
+    Args:
+        work_dir: Scratch directory for datasets and artifacts (datasets are reused)
+        scales: Training dataset sizes in rows
+        plan_cardinality: Distinct `plan` values in the generated data
+        region_cardinality: Distinct `region` values in the generated data
+        predict_rows: Size of the dataset the served model is trained on
+        requests: Requests per batch size (fewer for large batches)
+        uvicorn: Also benchmark through a local uvicorn server
+
+    Returns:
+        Dict with meta, config and the flat metrics mapping
+    """
+    cardinality = {"plan_cardinality": plan_cardinality, "region_cardinality": region_cardinality}
+    suffix = f"p{plan_cardinality}_r{region_cardinality}"
+    results: Dict[str, Any] = {"train": {}}
+
+    for rows in scales:
+        csv_path = write_churn_csv(work_dir / "data" / f"churn_{rows}_{suffix}.csv", rows, **cardinality)
+        run = bench_train(csv_path, work_dir / f"train_{rows}")
+        results["train"][f"rows_{rows}"] = {
+            "wall_s": run["wall_s"],
+            "peak_rss_mb": run["peak_rss_mb"],
+            **{f"{stage}_s": seconds for stage, seconds in run["timings"].items()},
+        }
+
+    # The served model lives in the legacy single-model layout of its own dir
+    serve_dir = work_dir / "serve"
+    predict_csv = write_churn_csv(work_dir / "data" / f"churn_{predict_rows}_{suffix}.csv", predict_rows, **cardinality)
+    bench_train(predict_csv, serve_dir)
+    records = make_records(max(BATCH_SIZES), seed=1, **cardinality)
+
+    os.environ["ARTIFACTS_DIR"] = str(serve_dir)
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+    results["predict_asgi"] = bench_predict_asgi(records, requests=requests)
+    if uvicorn:
+        served = bench_uvicorn(serve_dir, records, requests=requests)
+        results["cold_start"] = served.pop("cold_start")
+        results["predict_uvicorn"] = served
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {"scales": list(scales), "predict_rows": predict_rows, "requests": requests, **cardinality},
+        "metrics": flatten(results),
+    }
+
+
+def _noise_floor(metric: str) -> float:
+    for suffix, floor in NOISE_FLOOR.items():
+        if metric.endswith(suffix):
+            return floor
+    return 0.0
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Compare two results documents metric by metric.
+
+    A metric regresses when it grew by more than `threshold` (relative) and
+    by more than its noise floor (absolute). Metrics missing from either
+    document are skipped.
+
+    Returns:
+        One row per shared metric: metric, baseline, current, change, regression
+    """
+    rows = []
+    for metric, base in sorted(baseline["metrics"].items()):
+        value = current["metrics"].get(metric)
+        if value is None or base is None:
+            continue
+        change = (value - base) / base if base else 0.0
+        regression = change > threshold and value - base > _noise_floor(metric)
+        rows.append({
+            "metric": metric, "baseline": base, "current": value,
+            "change": round(change, 4), "regression": regression,
+        })
+    return rows
+
+
+def _report(rows: List[Dict[str, Any]], threshold: float) -> int:
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['metric']:<48} {row['baseline']:>12} {row['current']:>12} {row['change']:>+8.1%} {flag}")
+    print(f"{len(regressions)} regression(s) above {threshold:.0%} in {len(rows)} metrics")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the API hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write a JSON results file")
+    run.add_argument("--out", type=Path, default=Path("bench.json"), help="Results file (default: bench.json)")
+    run.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                     help="Comma-separated training dataset sizes (default: 1000,100000)")
+    run.add_argument("--plan-cardinality", type=int, default=3, help="Distinct plan values (default: 3)")
+    run.add_argument("--region-cardinality", type=int, default=3, help="Distinct region values (default: 3)")
+    run.add_argument("--predict-rows", type=int, default=10_000, help="Rows the served model is trained on")
+    run.add_argument("--requests", type=int, default=200, help="Requests per batch size (default: 200)")
+    run.add_argument("--no-uvicorn", action="store_true", help="Skip the uvicorn and cold-start benchmarks")
+    run.add_argument("--work-dir", type=Path, default=None, help="Scratch directory (default: a temp dir)")
+    run.add_argument("--baseline", type=Path, default=None, help="Baseline results to compare against")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown")
+
+    check = commands.add_parser("compare", help="Compare a results file against a baseline")
+    check.add_argument("current", type=Path)
+    check.add_argument("baseline", type=Path)
+    check.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown")
+
+    worker = commands.add_parser("train-worker")
+    worker.add_argument("csv_path")
+    worker.add_argument("artifacts_dir")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "train-worker":
+        return _train_worker(args.csv_path, args.artifacts_dir)
+
+    if args.command == "compare":
+        current = json.loads(args.current.read_text())
+        baseline = json.loads(args.baseline.read_text())
+        return _report(compare(current, baseline, args.threshold), args.threshold)
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    with tempfile.TemporaryDirectory(prefix="api-bench-") as tmp:
+        work_dir = args.work_dir or Path(tmp)
+        document = run_suite(
+            work_dir, scales, args.plan_cardinality, args.region_cardinality,
+            args.predict_rows, args.requests, uvicorn=not args.no_uvicorn
+        )
+    args.out.write_text(json.dumps(document, indent=2))
+    print(f"Wrote {len(document['metrics'])} metrics to {args.out}")
+
+    if args.baseline is not None:
+        return _report(compare(document, json.loads(args.baseline.read_text()), args.threshold), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Throughput of the pre-fork server (`serve.py`) at 1, 2, 4 and 8 workers.
+
+For each worker count a `serve.py` process is started on a model trained
+beforehand, and `--concurrency` clients send single-record `/predict`
+requests for `--duration` seconds. Reported per worker count:
+
+- requests per second and p50/p95/p99 latency;
+- total PSS of the master and its workers (`/proc/<pid>/smaps_rollup`,
+  Linux only), which counts the pages shared copy-on-write only once;
+- `converge_s`: after a `/train` answered by one worker, the time until
+  every worker serves the new model (`2 * workers` consecutive
+  `/model/status` responses with the new `trained_at`).
+
+The load generator runs on the same machine, so with few cores it competes
+with the workers; compare worker counts on a machine with at least as many
+cores as workers.
+
+Usage (from apps/api):
+    python -m benchmarks.workers
+    python -m benchmarks.workers --workers 1,2,4,8 --duration 10 --concurrency 64 --out workers.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.datasets import make_records, write_churn_csv
+from benchmarks.suite import API_ROOT, _free_port, _subprocess_env, bench_train, latency_summary
+
+DEFAULT_WORKERS = (1, 2, 4, 8)
+DEFAULT_DURATION_S = 5.0
+DEFAULT_CONCURRENCY = 32
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        return [int(p) for p in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+    except OSError:
+        return []
+
+
+def pss_mb(pids: Sequence[int]) -> Optional[float]:
+    """Total proportional set size of `pids` in MB (None where /proc is unavailable)."""
+    total_kb = 0
+    for pid in pids:
+        try:
+            lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+        except OSError:
+            return None
+        total_kb += next(int(line.split()[1]) for line in lines if line.startswith("Pss:"))
+    return round(total_kb / 1024, 1)
+
+
+def _wait_ready(client, server: subprocess.Popen, timeout_s: float) -> None:
+    import httpx
+
+    deadline = time.perf_counter() + timeout_s
+    while True:
+        if server.poll() is not None:
+            raise RuntimeError(f"serve.py exited with code {server.returncode}")
+        if time.perf_counter() > deadline:
+            raise RuntimeError("serve.py did not become ready in time")
+        try:
+            if client.get("/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+
+
+async def _load(base_url: str, record: Dict[str, Any], duration_s: float, concurrency: int) -> List[float]:
+    import httpx
+
+    latencies: List[float] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits) as client:
+        deadline = time.perf_counter() + duration_s
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                resp = await client.post("/predict", json={"records": [record]})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def _converge_s(base_url: str, workers: int, timeout_s: float = 30.0) -> float:
+    import httpx
+
+    # No keep-alive: every status request is a new connection, accepted by any worker
+    with httpx.Client(base_url=base_url, timeout=60.0, limits=httpx.Limits(max_keepalive_connections=0)) as client:
+        trained = client.post("/train", json={"source": "demo", "target": "churn"})
+        trained.raise_for_status()
+        trained_at = trained.json()["trained_at"]
+        started = time.perf_counter()
+        streak = 0
+        while streak < 2 * workers:
+            if time.perf_counter() - started > timeout_s:
+                raise RuntimeError("workers did not converge on the new model")
+            streak = streak + 1 if client.get("/model/status").json().get("trained_at") == trained_at else 0
+        return time.perf_counter() - started
+
+
+def bench_workers(
+    artifacts_dir: Path,
+    record: Dict[str, Any],
+    workers: int,
+    duration_s: float = DEFAULT_DURATION_S,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    startup_timeout_s: float = 60.0
+) -> Dict[str, Any]:
+    """Throughput, latency, memory and model convergence of one `serve.py` run."""
+    import httpx
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)],
+        cwd=API_ROOT, env=_subprocess_env(artifacts_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=60.0) as client:
+            _wait_ready(client, server, startup_timeout_s)
+            for _ in range(4 * workers):
+                client.post("/predict", json={"records": [record]}).raise_for_status()
+            memory = pss_mb([server.pid] + _children(server.pid))
+
+            latencies = asyncio.run(_load(base_url, record, duration_s, concurrency))
+            converge_s = _converge_s(base_url, workers)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        "requests_per_s": round(len(latencies) / duration_s, 1),
+        **latency_summary(latencies),
+        "pss_mb": memory,
+        "converge_s": round(converge_s, 3),
+    }
+
+
+def run(
+    workers: Sequence[int] = DEFAULT_WORKERS,
+    duration_s: float = DEFAULT_DURATION_S,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rows: int = 10_000,
+    work_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    Benchmark `serve.py` at each worker count on a freshly trained model.
+
+    Returns:
+        Dict with cpu_count and the results keyed by worker count
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = work_dir or Path(tmp)
+        csv_path = write_churn_csv(work_dir / "data" / f"churn_{rows}.csv", rows)
+        results: Dict[str, Any] = {"cpu_count": os.cpu_count(), "workers": {}}
+        record = make_records(1, seed=1)[0]
+        for n in workers:
+            # A fresh artifacts dir per run: convergence starts from the same state
+            artifacts_dir = work_dir / f"serve_{n}"
+            bench_train(csv_path, artifacts_dir)
+            results["workers"][str(n)] = bench_workers(artifacts_dir, record, n, duration_s, concurrency)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark serve.py throughput by worker count.")
+    parser.add_argument("--workers", default=",".join(str(n) for n in DEFAULT_WORKERS),
+                        help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_S, help="Load seconds per run")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent clients")
+    parser.add_argument("--out", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run([int(n) for n in args.workers.split(",")], args.duration, args.concurrency)
+    print(f"cpu_count={results['cpu_count']}")
+    print(f"{'workers':>7} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'pss_mb':>8} {'converge_s':>10}")
+    for n, r in results["workers"].items():
+        print(f"{n:>7} {r['requests_per_s']:>8.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['pss_mb'] if r['pss_mb'] is not None else float('nan'):>8.1f} {r['converge_s']:>10.3f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
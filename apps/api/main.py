@@ -1,150 +1,204 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from pydantic import BaseModel, Field
-import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Literal, Annotated
-from sklearn.model_selection import train_test_split
+from typing import List, Dict, Any, Optional, Literal, Annotated, Union
+import asyncio
 import json
-import pickle
+import os
+import signal
 from contextlib import asynccontextmanager
-import logging
 import uuid
 import time
 
+import observability
+from access_log import configure_access_log
+from observability import (
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    PREDICT_STAGES,
+    TRAIN_STAGES,
+    StageTimer,
+    mark_request_start,
+    render_bucket_counts,
+    render_labeled_counts,
+    request_started,
+)
+
+from uploads import receive_form
 from version import __version__
 from schemas import ModelStatus, VersionResponse
-from ml.pipeline import build_pipeline
-from ml.metrics import compute_classification_metrics
-from ml.store import model_store
-
-try:
-    import joblib
-    JOBLIB_AVAILABLE = True
-except Exception:
-    joblib = None
-    JOBLIB_AVAILABLE = False
-
-ARTIFACTS_DIR = Path(__file__).parent / "artifacts"
-MODEL_JOBLIB_PATH = ARTIFACTS_DIR / "model.joblib"
-MODEL_PICKLE_PATH = ARTIFACTS_DIR / "model.pkl"
-SCHEMA_PATH = ARTIFACTS_DIR / "schema.json"
-METRICS_PATH = ARTIFACTS_DIR / "metrics.json"
-TRAINED_AT_PATH = ARTIFACTS_DIR / "trained_at.json"
-
-
-def save_pipeline(pipeline) -> None:
-    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
-    if JOBLIB_AVAILABLE:
-        joblib.dump(pipeline, MODEL_JOBLIB_PATH)
-    else:
-        with open(MODEL_PICKLE_PATH, "wb") as f:
-            pickle.dump(pipeline, f)
+from ml.artifacts import load_artifacts
+from ml.batching import BATCH_SIZE_BUCKETS, MicroBatcher
+from ml.cache import PredictionCache, take_rows
+from ml.explain import DEFAULT_TOP_K, explain_records
+from ml.incremental import run_incremental_training
+from ml.jobs import TrainingJob, TrainingJobManager
+from ml.quality import DataQualityMonitor
+from ml.registry import CHAMPION, ModelRegistry, new_version_id
+from ml.arrow import ARROW_AVAILABLE, ARROW_STREAM, read_arrow_batch
+from ml.responses import ARROW, RECORDS, media_type, negotiate_layout, render_predictions
+from ml.scoring import DEFAULT_THRESHOLD, apply_threshold, model_classes, predict_proba_arrays, score_arrays
+from ml.store import ModelSnapshot, RenderedPayload, build_snapshot, model_store, render_json
+from ml.streaming import (
+    format_ndjson_predictions,
+    iter_line_chunks,
+    parse_csv_chunk,
+    parse_csv_header,
+    parse_ndjson_chunk,
+    read_first_line,
+)
+from ml.training import run_training
+from ml.tuning import DEFAULT_GRID
+from ml.validation import CompiledValidator
 
 
-def load_pipeline(path: Path):
-    if path.suffix == ".joblib":
-        if not JOBLIB_AVAILABLE:
-            raise RuntimeError("joblib not available to load model.joblib")
-        return joblib.load(path)
-    with open(path, "rb") as f:
-        return pickle.load(f)
+def _score_for_batcher(model_data: Dict[str, Any], arrays: Dict[str, Any]):
+    return predict_proba_arrays(model_data, arrays, model_data["schema"]["feature_names"])
 
 
-def get_model_path_for_load() -> Optional[Path]:
-    if MODEL_JOBLIB_PATH.exists():
-        return MODEL_JOBLIB_PATH
-    if MODEL_PICKLE_PATH.exists():
-        return MODEL_PICKLE_PATH
-    return None
+# Optional micro-batcher for concurrent small /predict calls (PREDICT_MICROBATCH=1)
+predict_batcher = MicroBatcher.from_env(_score_for_batcher)
 
+# Optional cache of repeated /predict rows (PREDICT_CACHE=1); emptied on model install
+prediction_cache = PredictionCache.from_env()
+model_store.add_listener(lambda _: prediction_cache.clear())
 
-def save_json(path: Path, data: Dict[str, Any]) -> None:
-    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+# Optional out-of-vocabulary / out-of-range counters (DATA_QUALITY_CHECKS=1)
+data_quality = DataQualityMonitor.from_env()
 
+# Training runs in a separate process pool (TRAIN_MAX_WORKERS)
+training_jobs = TrainingJobManager.from_env()
 
-def load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
+# Versioned models on disk; MODEL_CACHE_SIZE pipelines kept deserialized
+model_registry = ModelRegistry.from_env()
 
+# Seconds between checks of the registry index for a champion installed by
+# another process sharing it (serve.py workers); 0 disables the watch
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", "1"))
+# Set by serve.py for its workers: PID of the master, which relays
+# CHAMPION_SIGNAL to every worker so a new champion is picked up right away
+SERVE_MASTER_PID_ENV = "SERVE_MASTER_PID"
+CHAMPION_SIGNAL = getattr(signal, "SIGUSR1", None)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup: Load artifacts
-    model_path = get_model_path_for_load()
-    if model_path and SCHEMA_PATH.exists() and METRICS_PATH.exists() and TRAINED_AT_PATH.exists():
+
+def sync_champion() -> bool:
+    """
+    Serve the registry's champion if another process changed it.
+
+    Returns:
+        True if a different snapshot was installed
+    """
+    model_registry.reload_if_changed()
+    current = model_store.snapshot()
+    if current is None or not model_registry.has(CHAMPION):
+        # Nothing served yet: the champion is loaded on first use
+        return False
+    version = model_registry.resolve(CHAMPION)
+    if current.version == version:
+        return False
+    model_store.install(model_registry.get(version))
+    return True
+
+
+def announce_champion() -> None:
+    """Ask the serve.py master to have every worker re-check the champion now."""
+    master = os.getenv(SERVE_MASTER_PID_ENV)
+    if not master or CHAMPION_SIGNAL is None:
+        return
+    try:
+        os.kill(int(master), CHAMPION_SIGNAL)
+    except (ValueError, OSError):
+        # The index poll still converges
+        pass
+
+
+async def _watch_champion(interval_s: float, wake: asyncio.Event) -> None:
+    # Checks every interval_s seconds (never if 0) and whenever `wake` is set
+    while True:
         try:
-            pipeline = load_pipeline(model_path)
-            schema = load_json(SCHEMA_PATH)
-            metrics = load_json(METRICS_PATH)
-            trained_at_data = load_json(TRAINED_AT_PATH)
-            trained_at = trained_at_data.get("trained_at")
-
-            preprocessor = pipeline.named_steps.get("preprocessor")
-            if preprocessor is None:
-                raise ValueError("Pipeline missing preprocessor step")
-            feature_names_transformed = preprocessor.get_feature_names_out().tolist()
-
-            model_store.set_model(
-                pipeline=pipeline,
-                feature_names=feature_names_transformed,
-                metrics=metrics,
-                schema=schema,
-                trained_at=trained_at
-            )
+            await asyncio.wait_for(wake.wait(), timeout=interval_s if interval_s > 0 else None)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+        try:
+            await run_in_threadpool(sync_champion)
         except Exception:
-            model_store.clear()
+            # e.g. artifacts still being written: keep serving, retry next tick
+            pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Restart the access log listener if a previous lifespan stopped it
+    access_logger.start()
+
+    # Startup: read the registry index only; the champion is loaded on first use
+    try:
+        model_registry.load_index()
+        if not model_registry.has(CHAMPION):
+            # Single-model layout from before the registry
+            artifacts = load_artifacts()
+            if artifacts is not None:
+                model_store.set_model(**artifacts)
+    except Exception:
+        model_store.clear()
+    wake = asyncio.Event()
+    signalled = CHAMPION_SIGNAL is not None and bool(os.getenv(SERVE_MASTER_PID_ENV))
+    if signalled:
+        asyncio.get_running_loop().add_signal_handler(CHAMPION_SIGNAL, wake.set)
+    watcher = None
+    if MODEL_WATCH_INTERVAL_S > 0 or signalled:
+        watcher = asyncio.create_task(_watch_champion(MODEL_WATCH_INTERVAL_S, wake))
 
     yield
 
-    # Shutdown: cleanup if needed (currently none)
+    # Shutdown: stop the registry watch, the micro-batcher dispatch loop, the
+    # training pool and flush the access log queue
+    if signalled:
+        asyncio.get_running_loop().remove_signal_handler(CHAMPION_SIGNAL)
+    if watcher is not None:
+        watcher.cancel()
+    await predict_batcher.stop()
+    await run_in_threadpool(training_jobs.shutdown)
+    access_logger.stop()
 
 
 app = FastAPI(title="DecisionOps AI API", lifespan=lifespan)
 
-# Configure logging
-logger = logging.getLogger("api")
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter("%(message)s"))
-    logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
+# Configure logging (queue-backed: serialization and I/O run on a listener thread)
+access_logger = configure_access_log("api")
+
+
+def _observe_request(request: Request, status_code: int, latency_s: float) -> None:
+    # Route template (not the raw path) keeps label cardinality bounded
+    route = request.scope.get("route")
+    labels = (request.method, route.path if route is not None else "unmatched", str(status_code))
+    HTTP_REQUESTS.inc(labels)
+    HTTP_LATENCY.observe(latency_s, labels)
 
 
 # Observability middleware
 @app.middleware("http")
 async def observability_middleware(request: Request, call_next):
     request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-    start_time = time.time()
+    start_time = mark_request_start()
     
     try:
         response = await call_next(request)
-    except Exception as exc:
-        latency_ms = (time.time() - start_time) * 1000
-        logger.info(
-            json.dumps({
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": 500,
-                "latency_ms": round(latency_ms, 2)
-            })
-        )
+    except Exception:
+        latency_s = time.perf_counter() - start_time
+        _observe_request(request, 500, latency_s)
+        access_logger.log_request(request_id, request.method, request.url.path, 500, latency_s * 1000)
         raise
     
-    latency_ms = (time.time() - start_time) * 1000
+    latency_s = time.perf_counter() - start_time
+    _observe_request(request, response.status_code, latency_s)
     response.headers["X-Request-ID"] = request_id
-    
-    logger.info(
-        json.dumps({
-            "request_id": request_id,
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-            "latency_ms": round(latency_ms, 2)
-        })
-    )
+    access_logger.log_request(request_id, request.method, request.url.path, response.status_code, latency_s * 1000)
     
     return response
 
@@ -164,6 +218,44 @@ app.add_middleware(
 )
 
 # Request/Response models
+class TuningGrid(BaseModel):
+    C: List[Annotated[float, Field(gt=0.0)]] = Field(
+        default_factory=lambda: list(DEFAULT_GRID["C"]), min_length=1, description="Inverse regularization strengths"
+    )
+    penalty: List[Literal["l1", "l2"]] = Field(
+        default_factory=lambda: list(DEFAULT_GRID["penalty"]), min_length=1, description="Regularization types"
+    )
+    class_weight: List[Optional[Literal["balanced"]]] = Field(
+        default_factory=lambda: list(DEFAULT_GRID["class_weight"]), min_length=1,
+        description="Class weighting (null or \"balanced\")"
+    )
+
+
+class TuningConfig(BaseModel):
+    grid: TuningGrid = Field(default_factory=TuningGrid, description="Candidate hyperparameters")
+    folds: int = Field(5, ge=2, le=20, description="Number of stratified CV folds")
+    scoring: Literal["roc_auc", "f1", "accuracy", "neg_log_loss"] = Field(
+        "roc_auc", description="CV score to maximize"
+    )
+    successive_halving: bool = Field(
+        False, description="Score candidates on growing samples and keep the best 1/factor per rung"
+    )
+    factor: int = Field(3, ge=2, le=10, description="Successive halving factor")
+    n_jobs: Optional[int] = Field(None, description="Parallel fits (default TUNING_N_JOBS, -1 = all cores)")
+
+
+class EncodingConfig(BaseModel):
+    sparse: Optional[bool] = Field(
+        None, description="Sparse one-hot output (default: when the one-hot width exceeds SPARSE_ONEHOT_WIDTH)"
+    )
+    min_frequency: Optional[Union[Annotated[int, Field(ge=1)], Annotated[float, Field(gt=0.0, lt=1.0)]]] = Field(
+        None, description="Group categories seen fewer times (int) or in a smaller share of rows (float)"
+    )
+    max_categories: Optional[int] = Field(
+        None, ge=2, description="Maximum one-hot columns per categorical feature, infrequent column included"
+    )
+
+
 class TrainRequest(BaseModel):
     source: Literal["demo", "upload"] = Field(
         ...,
@@ -184,6 +276,27 @@ class TrainRequest(BaseModel):
             examples=[0.2]
         )
     ] = 0.2
+    decision_threshold: Annotated[
+        float,
+        Field(
+            gt=0.0,
+            lt=1.0,
+            description="Probability threshold for the positive label, stored with the model",
+            examples=[0.5]
+        )
+    ] = DEFAULT_THRESHOLD
+    background: bool = Field(
+        False,
+        description="Return a job ID immediately (202) instead of waiting for training to finish"
+    )
+    tuning: Optional[TuningConfig] = Field(
+        None,
+        description="Tune C/penalty/class_weight with k-fold CV on the training split before the final fit"
+    )
+    encoding: Optional[EncodingConfig] = Field(
+        None,
+        description="One-hot encoding options: sparse output and rare-level grouping"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -191,7 +304,8 @@ class TrainRequest(BaseModel):
                 {
                     "source": "demo",
                     "target": "churn",
-                    "test_size": 0.2
+                    "test_size": 0.2,
+                    "decision_threshold": 0.5
                 }
             ]
         }
@@ -199,9 +313,9 @@ class TrainRequest(BaseModel):
 
 
 class PredictRequest(BaseModel):
-    records: List[Dict[str, Any]] = Field(
-        ...,
-        description="List of records to score",
+    records: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="List of records to score (row-oriented)",
         examples=[
             [
                 {
@@ -215,6 +329,33 @@ class PredictRequest(BaseModel):
             ]
         ]
     )
+    columns: Optional[Dict[str, List[Any]]] = Field(
+        None,
+        description="Columnar batch to score: feature name -> list of values (faster for large batches)",
+        examples=[
+            {
+                "age": [34, 50],
+                "tenure_months": [12, 36],
+                "monthly_spend": [50.5, 129.99],
+                "support_tickets_last_90d": [1, 0],
+                "plan": ["pro", "enterprise"],
+                "region": ["latam", "eu"]
+            }
+        ]
+    )
+
+    threshold: Optional[float] = Field(
+        None,
+        gt=0.0,
+        lt=1.0,
+        description="Optional override of the model's stored decision threshold"
+    )
+
+    @model_validator(mode="after")
+    def _check_one_format(self) -> "PredictRequest":
+        if (self.records is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'records' or 'columns'")
+        return self
 
     model_config = {
         "json_schema_extra": {
@@ -238,6 +379,16 @@ class PredictRequest(BaseModel):
                             "region": "eu"
                         }
                     ]
+                },
+                {
+                    "columns": {
+                        "age": [34, 50],
+                        "tenure_months": [12, 36],
+                        "monthly_spend": [50.5, 129.99],
+                        "support_tickets_last_90d": [1, 0],
+                        "plan": ["pro", "enterprise"],
+                        "region": ["latam", "eu"]
+                    }
                 }
             ]
         }
@@ -248,13 +399,27 @@ class PredictResponse(BaseModel):
     predictions: List[Dict[str, Any]]
 
 
+class ColumnarPredictResponse(BaseModel):
+    # /predict?format=columnar: one array per field, row i across both
+    labels: List[Any]
+    probabilities: List[float]
+
+
 class ExplainResponse(BaseModel):
     method: str
     top_features: List[Dict[str, Any]]
 
 
+class ExplainRecordsRequest(PredictRequest):
+    top_k: int = Field(
+        DEFAULT_TOP_K,
+        ge=1,
+        description="Feature contributions returned per record (largest magnitude first)"
+    )
+
+
 # ✅ FIX Pydantic v2: asegurar modelos “reconstruidos” para TypeAdapter / FastAPI
-for _cls in (TrainRequest, PredictRequest, PredictResponse, ExplainResponse):
+for _cls in (TrainRequest, PredictRequest, PredictResponse, ColumnarPredictResponse, ExplainResponse, ExplainRecordsRequest):
     if hasattr(_cls, "model_rebuild"):
         _cls.model_rebuild()
 
@@ -269,202 +434,692 @@ def version() -> VersionResponse:
     return VersionResponse(name="decisionops-ai-toolkit", version=__version__)
 
 
+def _resolve_snapshot(model: Optional[str] = None) -> Optional[ModelSnapshot]:
+    if model is not None:
+        try:
+            return model_registry.get(model)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+
+    snapshot = model_store.snapshot()
+    if snapshot is None and model_registry.has(CHAMPION):
+        # Index-only startup: deserialize the champion on first use
+        snapshot = model_registry.get(CHAMPION)
+        if not model_store.install(snapshot, only_if_empty=True):
+            snapshot = model_store.snapshot()
+    return snapshot
+
+
+def _current_model(model: Optional[str] = None) -> Dict[str, Any]:
+    # One snapshot read per request: every field comes from the same model
+    snapshot = _resolve_snapshot(model)
+    if snapshot is None:
+        raise HTTPException(status_code=400, detail="No model trained yet. Call /train first.")
+    return snapshot.as_dict()
+
+
+# Body of /model/status before any model is installed
+NO_MODEL_STATUS = render_json(ModelStatus(has_model=False).model_dump())
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Weak comparison (RFC 9110): W/ prefixes are ignored
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _payload_response(request: Request, payload: RenderedPayload) -> Response:
+    # Pre-rendered per model: a poll is a header compare plus a bytes write
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
 @app.get("/model/status", response_model=ModelStatus)
-def model_status() -> ModelStatus:
-    if not model_store.has_model():
-        return ModelStatus(
-            has_model=False,
-            trained_at=None,
-            target=None,
-            rows=None,
-            metrics=None,
-            feature_names=None,
-            numeric_features=None,
-            categorical_features=None
-        )
+def model_status(request: Request) -> ModelStatus:
+    snapshot = _resolve_snapshot()
+    if snapshot is None:
+        return Response(content=NO_MODEL_STATUS, media_type="application/json", headers={"Cache-Control": "no-cache"})
+    return _payload_response(request, snapshot.status_payload)
+
+
+def _install_trained_model(job: TrainingJob, result: Dict[str, Any]) -> None:
+    # Runs when the job finishes: register the version, then swap it in as champion
+    snapshot = build_snapshot(
+        pipeline=result["pipeline"],
+        feature_names=result["feature_names"],
+        metrics=result["metrics"],
+        schema=result["schema"],
+        trained_at=result["trained_at"],
+        threshold=result["threshold"],
+        version=result["version"],
+        compiled=result.get("compiled")
+    )
+    # Cached first, so a registry watch that sees the new index reuses this snapshot
+    model_registry.put(snapshot)
+    model_registry.register(
+        result["version"], result["schema"], result["metrics"], result["trained_at"], result["threshold"]
+    )
+    model_store.install(snapshot)
+    announce_champion()
+
+
+def _submit_job(params: Dict[str, Any], on_finish=None, runner=run_training) -> TrainingJob:
+    def _finished(job: TrainingJob) -> None:
+        timings = job.result["timings"] if job.result is not None else job.progress.get("timings", {})
+        for stage, seconds in timings.items():
+            TRAIN_STAGES.observe(seconds, (stage,))
+        if on_finish is not None:
+            on_finish(job)
+
+    return training_jobs.submit(params, on_success=_install_trained_model, on_finish=_finished, runner=runner)
+
+
+def _submit_training(
+    data_path: Path,
+    target: str,
+    test_size: float,
+    decision_threshold: float,
+    on_finish=None,
+    tuning: Optional[TuningConfig] = None,
+    encoding: Optional[EncodingConfig] = None
+) -> TrainingJob:
+    version = new_version_id()
+    params = {
+        "data_path": str(data_path),
+        "target": target,
+        "test_size": test_size,
+        "decision_threshold": decision_threshold,
+        "artifacts_dir": str(model_registry.version_dir(version)),
+        "version": version,
+        "tuning": tuning.model_dump() if tuning is not None else None,
+        "encoding": encoding.model_dump() if encoding is not None else None,
+    }
+    return _submit_job(params, on_finish)
 
-    model_data = model_store.get_model()
-    schema = model_data.get("schema") or {}
-
-    return ModelStatus(
-        has_model=True,
-        trained_at=model_data.get("trained_at"),
-        target=schema.get("target"),
-        rows=schema.get("rows"),
-        metrics=model_data.get("metrics"),
-        feature_names=schema.get("feature_names"),
-        numeric_features=schema.get("numeric_features"),
-        categorical_features=schema.get("categorical_features")
+
+def _job_accepted(job: TrainingJob) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.job_id, "state": job.state, "status_url": f"/train/jobs/{job.job_id}"}
     )
 
 
+async def _wait_for_job(job: TrainingJob) -> Dict[str, Any]:
+    # Awaiting the future keeps the event loop free while the pool trains
+    await asyncio.wrap_future(job.completed)
+    if job.state != "succeeded":
+        raise HTTPException(status_code=400 if job.error_is_client else 500, detail=job.error)
+
+    result = job.result
+    return {
+        "status": "trained",
+        "target": result["schema"]["target"],
+        "rows": result["rows"],
+        "metrics": result["metrics"],
+        "decision_threshold": result["threshold"],
+        "trained_at": result["trained_at"],
+        "version": result["version"],
+        "ingest": result["ingest"],
+        "encoding": result["schema"].get("encoding"),
+        "job_id": job.job_id,
+        "timings": result["timings"],
+        **({"incremental": result["incremental"]} if "incremental" in result else {})
+    }
+
+
 @app.post("/train")
-def train(request: TrainRequest) -> Dict[str, Any]:
+async def train(request: TrainRequest):
     # Load data
     if request.source == "demo":
         data_path = Path(__file__).parent / "data" / "demo_churn.csv"
         if not data_path.exists():
             raise HTTPException(status_code=400, detail=f"Demo dataset not found at {data_path}")
-        df = pd.read_csv(data_path)
     elif request.source == "upload":
-        raise HTTPException(status_code=400, detail="Upload not implemented yet")
-    else:
-        raise HTTPException(status_code=400, detail=f"Unknown source: {request.source}")
-
-    # Validate target
-    if request.target not in df.columns:
         raise HTTPException(
             status_code=400,
-            detail=f"Target '{request.target}' not found in dataset. Available columns: {list(df.columns)}"
+            detail="Uploads are sent as multipart/form-data to POST /train/upload"
         )
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown source: {request.source}")
 
-    # Separate features and target
-    X = df.drop(columns=[request.target])
-    y = df[request.target]
-
-    # Store schema info
-    feature_names_original = list(X.columns)
-    numeric_features = X.select_dtypes(include=['int64', 'int32', 'float64', 'float32']).columns.tolist()
-    categorical_features = X.select_dtypes(include=['object']).columns.tolist()
-
-    schema = {
-        "feature_names": feature_names_original,
-        "numeric_features": numeric_features,
-        "categorical_features": categorical_features,
-        "target": request.target,
-        "rows": len(df)
-    }
+    job = _submit_training(
+        data_path, request.target, request.test_size, request.decision_threshold,
+        tuning=request.tuning, encoding=request.encoding
+    )
+    if request.background:
+        return _job_accepted(job)
+    return await _wait_for_job(job)
+
+
+class TrainUploadForm(BaseModel):
+    """Text fields of POST /train/upload (the CSV is the `file` part)."""
 
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=request.test_size, random_state=42
+    target: str = Field(..., description="Target column name")
+    test_size: float = Field(0.2, ge=0.05, le=0.5, description="Test split size between 0.05 and 0.5")
+    decision_threshold: float = Field(
+        DEFAULT_THRESHOLD, gt=0.0, lt=1.0, description="Probability threshold for the positive label"
     )
+    background: bool = Field(False, description="Return a job ID immediately instead of waiting")
+    tuning: Optional[str] = Field(None, description="Tuning config as JSON (same fields as in /train)")
+    encoding: Optional[str] = Field(None, description="Encoding options as JSON (same fields as in /train)")
 
-    # Build and train pipeline
-    pipeline = build_pipeline(
-        numeric_features=numeric_features,
-        categorical_features=categorical_features
+
+class IncrementalUploadForm(BaseModel):
+    """Text fields of POST /train/incremental (CSVs are the `file` and `base_file` parts)."""
+
+    model: str = Field(CHAMPION, description="Registry version ID or alias of the model to update")
+    test_size: float = Field(0.2, ge=0.05, le=0.5, description="Fraction of the new rows held out for evaluation")
+    decision_threshold: Optional[float] = Field(
+        None, gt=0.0, lt=1.0, description="Probability threshold (defaults to the base model's)"
     )
-    pipeline.fit(X_train, y_train)
+    background: bool = Field(False, description="Return a job ID immediately instead of waiting")
 
-    # Predictions
-    y_pred = pipeline.predict(X_test)
-    y_proba = pipeline.predict_proba(X_test)[:, 1]
 
-    # Compute metrics
-    metrics = compute_classification_metrics(y_test, y_pred, y_proba)
+def _upload_openapi(form: type, files: Dict[str, str], required: List[str]) -> Dict[str, Any]:
+    # Upload endpoints read their own multipart body, so it is documented here
+    schema = form.model_json_schema()
+    for name, description in files.items():
+        schema["properties"][name] = {"type": "string", "format": "binary", "description": description}
+    schema["required"] = [*schema.get("required", []), *required]
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": schema}}}}
 
-    # Get feature names after preprocessing
-    preprocessor = pipeline.named_steps['preprocessor']
-    feature_names_transformed = preprocessor.get_feature_names_out().tolist()
 
-    # Store model
-    model_store.set_model(
-        pipeline=pipeline,
-        feature_names=feature_names_transformed,
-        metrics=metrics,
-        schema=schema
-    )
+async def _receive_upload(request: Request, form: type, file_fields: List[str], required: List[str]):
+    """
+    Stream a multipart upload to disk once and validate its text fields.
 
-    save_pipeline(pipeline)
-    save_json(SCHEMA_PATH, schema)
-    save_json(METRICS_PATH, metrics)
-    save_json(TRAINED_AT_PATH, {"trained_at": model_store.trained_at})
+    Returns:
+        Tuple (validated form, paths of the received files); the caller
+        removes the files once the job is done with them
+    """
+    try:
+        fields, paths = await receive_form(request.stream(), request.headers.get("content-type"), file_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    errors = [
+        {"type": "missing", "loc": ("body", name), "msg": "Field required", "input": None}
+        for name in required if name not in paths
+    ]
+    try:
+        parsed = form.model_validate(fields)
+    except ValidationError as e:
+        errors += [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+    if errors:
+        for path in paths.values():
+            path.unlink(missing_ok=True)
+        # Same 422 body as FastAPI's own form validation
+        raise RequestValidationError(errors)
+    return parsed, paths
+
+
+@app.post("/train/upload", openapi_extra=_upload_openapi(TrainUploadForm, {"file": "CSV dataset"}, ["file"]))
+async def train_upload(request: Request):
+    form, paths = await _receive_upload(request, TrainUploadForm, ["file"], ["file"])
+    upload_path = paths["file"]
+    try:
+        tuning_config = TuningConfig.model_validate_json(form.tuning) if form.tuning else None
+    except ValueError as e:
+        upload_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Invalid tuning config: {e}")
+    try:
+        encoding_config = EncodingConfig.model_validate_json(form.encoding) if form.encoding else None
+    except ValueError as e:
+        upload_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Invalid encoding config: {e}")
+
+    # The temp file is removed once the job is done with it
+    job = _submit_training(
+        upload_path, form.target, form.test_size, form.decision_threshold,
+        on_finish=lambda _: upload_path.unlink(missing_ok=True),
+        tuning=tuning_config,
+        encoding=encoding_config
+    )
+    if form.background:
+        return _job_accepted(job)
+    return await _wait_for_job(job)
+
+
+@app.post("/train/incremental", openapi_extra=_upload_openapi(
+    IncrementalUploadForm,
+    {
+        "file": "CSV with the new rows only",
+        "base_file": "CSV the base model was trained on; adds a full-refit comparison to the report",
+    },
+    ["file"]
+))
+async def train_incremental(request: Request):
+    form, paths = await _receive_upload(request, IncrementalUploadForm, ["file", "base_file"], ["file"])
+    upload_path = paths["file"]
+    base_path = paths.get("base_file")
+
+    def _cleanup(_: Optional[TrainingJob] = None) -> None:
+        upload_path.unlink(missing_ok=True)
+        if base_path is not None:
+            base_path.unlink(missing_ok=True)
 
-    return {
-        "status": "trained",
-        "target": request.target,
-        "rows": len(df),
-        "metrics": metrics,
-        "trained_at": model_store.trained_at
+    try:
+        base_version = model_registry.resolve(form.model)
+    except KeyError:
+        _cleanup()
+        raise HTTPException(status_code=404, detail=f"Unknown model: {form.model}")
+
+    version = new_version_id()
+    params = {
+        "data_path": str(upload_path),
+        "base_artifacts_dir": str(model_registry.version_dir(base_version)),
+        "test_size": form.test_size,
+        "decision_threshold": form.decision_threshold,
+        "artifacts_dir": str(model_registry.version_dir(version)),
+        "version": version,
+        "base_version": base_version,
+        "base_data_path": str(base_path) if base_path is not None else None,
     }
+    job = _submit_job(params, on_finish=_cleanup, runner=run_incremental_training)
+    if form.background:
+        return _job_accepted(job)
+    return await _wait_for_job(job)
 
 
-@app.post("/predict", response_model=PredictResponse)
-def predict(request: PredictRequest) -> PredictResponse:
-    if not model_store.has_model():
-        raise HTTPException(status_code=400, detail="No model trained yet. Call /train first.")
+@app.get("/train/jobs/{job_id}")
+def train_job_status(job_id: str) -> Dict[str, Any]:
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return job.to_dict()
+
+
+def _validator(model_data: Dict[str, Any]) -> CompiledValidator:
+    # Compiled once per snapshot; built here only for schemas without feature names
+    return model_data["validator"] or CompiledValidator(model_data["schema"])
 
-    model_data = model_store.get_model()
-    pipeline = model_data["pipeline"]
-    schema = model_data["schema"]
 
-    # Convert records to DataFrame
+def _check_quality(validator: CompiledValidator, arrays: Dict[str, Any]) -> None:
+    if data_quality.enabled:
+        data_quality.record(validator.quality(arrays), len(arrays[validator.feature_names[0]]))
+
+
+def _prepare_predict(request: PredictRequest, model: Optional[str] = None, timer: Optional[StageTimer] = None):
+    model_data = _current_model(model)
+    validator = _validator(model_data)
+
+    # Validate column-wise (one type check per column, not per cell)
+    try:
+        if request.columns is not None:
+            arrays = validator.validate(request.columns, source="columns")
+        else:
+            arrays = validator.validate_records(request.records)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _check_quality(validator, arrays)
+
+    if timer is not None:
+        timer.mark("validate")
+    return model_data, arrays
+
+
+def _predict_response(y_pred, y_proba, timer: Optional[StageTimer] = None, layout: str = RECORDS) -> Response:
+    # Rendered here (not by FastAPI after the handler) so serialization is timed
+    response = Response(content=render_predictions(y_pred, y_proba, layout), media_type=media_type(layout))
+    if timer is not None:
+        timer.mark("serialize")
+    return response
+
+
+def _cached_proba(model_data: Dict[str, Any], arrays: Dict[str, Any], timer: Optional[StageTimer] = None):
+    # Only the rows missing from the cache are scored, as one batch
+    feature_names = model_data["schema"]["feature_names"]
+    lookup = prediction_cache.lookup(model_data["generation"], arrays, feature_names)
+    if timer is not None:
+        timer.mark("cache")
+    if len(lookup.missing):
+        proba, _ = predict_proba_arrays(model_data, take_rows(arrays, lookup.missing), feature_names, timer)
+        prediction_cache.fill(lookup, proba)
+    return lookup.proba, model_classes(model_data)
+
+
+def _score_response(
+    model_data: Dict[str, Any],
+    arrays: Dict[str, Any],
+    threshold: Optional[float] = None,
+    timer: Optional[StageTimer] = None,
+    layout: str = RECORDS
+) -> Response:
+    # Make predictions (single probability pass, compiled engine when available)
     try:
-        df_input = pd.DataFrame(request.records)
+        if prediction_cache.enabled:
+            y_proba, classes = _cached_proba(model_data, arrays, timer)
+            y_pred = apply_threshold(y_proba, threshold if threshold is not None else model_data["threshold"], classes)
+        else:
+            y_pred, y_proba = score_arrays(
+                model_data, arrays, model_data["schema"]["feature_names"], threshold, timer
+            )
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid records format: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
 
-    # Validate columns
-    expected_features = schema["feature_names"]
-    missing_cols = set(expected_features) - set(df_input.columns)
-    if missing_cols:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Missing columns: {list(missing_cols)}. Expected: {expected_features}"
-        )
+    return _predict_response(y_pred, y_proba, timer, layout)
 
-    numeric_features = set(schema.get("numeric_features", []))
-    categorical_features = set(schema.get("categorical_features", []))
-    expected_set = set(expected_features)
 
-    extra_cols = set(df_input.columns) - expected_set
-    if extra_cols:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unexpected columns: {list(extra_cols)}. Expected: {expected_features}"
+def _predict_direct(
+    request: PredictRequest,
+    model: Optional[str] = None,
+    timer: Optional[StageTimer] = None,
+    layout: str = RECORDS
+) -> Response:
+    model_data, arrays = _prepare_predict(request, model, timer)
+    return _score_response(model_data, arrays, request.threshold, timer, layout)
+
+
+def _predict_arrow(body: bytes, model: Optional[str], timer: StageTimer, layout: str) -> Response:
+    model_data = _current_model(model)
+    validator = _validator(model_data)
+    try:
+        arrays = read_arrow_batch(body, model_data["schema"], validator)
+    except RuntimeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _check_quality(validator, arrays)
+    timer.mark("validate")
+    return _score_response(model_data, arrays, None, timer, layout)
+
+
+def _prepare_batched(request: PredictRequest, model: Optional[str] = None, timer: Optional[StageTimer] = None):
+    model_data, arrays = _prepare_predict(request, model, timer)
+    lookup = None
+    if prediction_cache.enabled:
+        lookup = prediction_cache.lookup(model_data["generation"], arrays, model_data["schema"]["feature_names"])
+        if timer is not None:
+            timer.mark("cache")
+    return model_data, arrays, lookup
+
+
+def _parse_predict_request(body: bytes) -> PredictRequest:
+    try:
+        return PredictRequest.model_validate_json(body)
+    except ValidationError as e:
+        # Same 422 body as FastAPI's own request validation
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
         )
 
-    if numeric_features or categorical_features:
-        invalid_fields: List[str] = []
-        for idx, record in enumerate(request.records):
-            for field in numeric_features:
-                value = record.get(field)
-                if value is None:
-                    continue
-                if not isinstance(value, (int, float)):
-                    invalid_fields.append(f"records[{idx}].{field} must be numeric")
-            for field in categorical_features:
-                value = record.get(field)
-                if value is None:
-                    continue
-                if not isinstance(value, str):
-                    invalid_fields.append(f"records[{idx}].{field} must be string")
-        if invalid_fields:
-            raise HTTPException(status_code=400, detail="; ".join(invalid_fields))
-
-    # Select only expected features and reorder
-    df_input = df_input[expected_features]
-
-    # Make predictions
+
+def _is_arrow(content_type: Optional[str]) -> bool:
+    return (content_type or "").split(";")[0].strip().lower() == ARROW_STREAM
+
+
+# /predict reads its own body (JSON or Arrow IPC), so the request body is
+# documented here instead of through a PredictRequest parameter
+PREDICT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": PredictRequest.model_json_schema()},
+            ARROW_STREAM: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+@app.post(
+    "/predict",
+    response_model=Union[PredictResponse, ColumnarPredictResponse],
+    responses={200: {"content": {ARROW_STREAM: {}}}},
+    openapi_extra=PREDICT_OPENAPI
+)
+async def predict(
+    http_request: Request,
+    model: Optional[str] = Query(None, description="Model version ID or alias (default: champion)"),
+    response_format: Optional[Literal["records", "columnar", "arrow"]] = Query(
+        None,
+        alias="format",
+        description="Response layout (default records, or arrow for Arrow requests; also set by the Accept header)"
+    )
+) -> PredictResponse:
+    body = await http_request.body()
+    accept = http_request.headers.get("accept")
+    arrow_request = _is_arrow(http_request.headers.get("content-type"))
+    if not arrow_request:
+        request = _parse_predict_request(body)
+    layout = negotiate_layout(response_format, accept, default=ARROW if arrow_request else RECORDS)
+    if layout == ARROW and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=406, detail="Arrow IPC responses require pyarrow")
+
+    # "parse": from the middleware to here (body read, JSON decode, pydantic)
+    timer = StageTimer(PREDICT_STAGES, request_started())
+    timer.mark("parse")
     try:
-        y_pred = pipeline.predict(df_input)
-        y_proba = pipeline.predict_proba(df_input)[:, 1]
+        if arrow_request:
+            return await run_in_threadpool(_predict_arrow, body, model, timer, layout)
+        return await _predict(request, model, timer, layout)
+    finally:
+        timer.flush()
+
+
+async def _predict(request: PredictRequest, model: Optional[str], timer: StageTimer, layout: str = RECORDS) -> Response:
+    n_rows = len(request.records) if request.records is not None else max(map(len, request.columns.values()), default=0)
+    if not predict_batcher.enabled or n_rows >= predict_batcher.max_rows:
+        return await run_in_threadpool(_predict_direct, request, model, timer, layout)
+
+    # Small request: validate (and look up cached rows) off the event loop,
+    # then coalesce the remaining rows with concurrent callers
+    model_data, arrays, lookup = await run_in_threadpool(_prepare_batched, request, model, timer)
+    try:
+        if lookup is not None:
+            if len(lookup.missing):
+                proba, _ = await predict_batcher.submit(
+                    model_data, take_rows(arrays, lookup.missing), len(lookup.missing)
+                )
+                prediction_cache.fill(lookup, proba)
+            y_proba, classes = lookup.proba, model_classes(model_data)
+        else:
+            y_proba, classes = await predict_batcher.submit(model_data, arrays, n_rows)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
+    # Queueing and scoring happen in a shared batch, so they are one stage here
+    timer.mark("batch")
+
+    threshold = request.threshold if request.threshold is not None else model_data["threshold"]
+    return _predict_response(apply_threshold(y_proba, threshold, classes), y_proba, timer, layout)
+
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator reads the request body.
+
+    The default StreamingResponse consumes `receive` in a concurrent
+    disconnect listener, which would steal body messages from the generator;
+    here the generator is the only reader.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@app.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    chunk_size: int = Query(10000, ge=1, le=1_000_000, description="Rows scored per chunk"),
+    threshold: Optional[float] = Query(None, gt=0.0, lt=1.0, description="Override of the stored decision threshold"),
+    model: Optional[str] = Query(None, description="Model version ID or alias (default: champion)")
+) -> StreamingResponse:
+    # May deserialize a registry version, so resolve off the event loop
+    model_data = await run_in_threadpool(_current_model, model)
+    schema = model_data["schema"]
+    validator = _validator(model_data)
+    is_csv = request.headers.get("content-type", "").startswith("text/csv")
+    body = request.stream()
+
+    # CSV header is checked up front so a bad header is a real 400
+    header = None
+    prefix = b""
+    first_line_no = 1
+    if is_csv:
+        try:
+            header_line, prefix = await read_first_line(body)
+            header = parse_csv_header(header_line, schema, validator)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV header: {str(e)}")
+        first_line_no = 2
+
+    def score_chunk(lines) -> bytes:
+        # Parsing and validating up to chunk_size lines is as heavy as
+        # scoring them, so the whole chunk runs off the event loop
+        if is_csv:
+            arrays = parse_csv_chunk(lines, header, schema, validator)
+        else:
+            arrays = parse_ndjson_chunk(lines, schema, validator)
+        _check_quality(validator, arrays)
+        y_pred, y_proba = score_arrays(model_data, arrays, schema["feature_names"], threshold)
+        return format_ndjson_predictions(y_pred, y_proba)
+
+    async def generate():
+        next_line = first_line_no
+        try:
+            async for lines in iter_line_chunks(body, chunk_size, prefix, first_line_no):
+                next_line = lines[0][0]
+                yield await run_in_threadpool(score_chunk, lines)
+                next_line = lines[-1][0] + 1
+        except Exception as e:
+            # Status is already sent: report the first unscored line in-band and stop
+            yield (json.dumps({"error": str(e), "chunk_start_line": next_line}) + "\n").encode("utf-8")
+
+    return RequestBodyStreamingResponse(generate(), media_type="application/x-ndjson")
 
-    predictions = [{"label": int(pred), "probability": float(prob)} for pred, prob in zip(y_pred, y_proba)]
-    return PredictResponse(predictions=predictions)
+
+@app.get("/models")
+def list_models() -> Dict[str, Any]:
+    return model_registry.list_versions()
+
+
+@app.post("/models/{model}/promote")
+def promote_model(model: str) -> Dict[str, Any]:
+    # Roll forward/back: point "champion" at another version and serve it.
+    # The version is loaded first, so an unknown ref or missing artifacts
+    # leave the alias untouched
+    model_registry.reload_if_changed()
+    try:
+        snapshot = model_registry.get(model)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+    version = model_registry.set_alias(CHAMPION, snapshot.version)
+    model_store.install(snapshot)
+    announce_champion()
+    return {"champion": version}
+
+
+def _collect_serving_metrics() -> List[str]:
+    snapshot = model_store.snapshot()
+    stats = predict_batcher.stats
+    cache_stats = prediction_cache.stats()
+    lines = [
+        "# HELP model_loaded Whether a champion model is installed.",
+        "# TYPE model_loaded gauge",
+        f"model_loaded {int(snapshot is not None)}",
+        "# HELP model_generation Generation of the installed model snapshot.",
+        "# TYPE model_generation gauge",
+        f"model_generation {snapshot.generation if snapshot is not None else 0}",
+        "# HELP model_registry_loaded_versions Registry versions deserialized in memory.",
+        "# TYPE model_registry_loaded_versions gauge",
+        f"model_registry_loaded_versions {model_registry.loaded_count()}",
+        "# HELP prediction_cache_entries Rows held in the prediction cache.",
+        "# TYPE prediction_cache_entries gauge",
+        f"prediction_cache_entries {cache_stats['entries']}",
+        "# HELP prediction_cache_hits_total Prediction cache hits (rows).",
+        "# TYPE prediction_cache_hits_total counter",
+        f"prediction_cache_hits_total {cache_stats['hits']}",
+        "# HELP prediction_cache_misses_total Prediction cache misses (rows).",
+        "# TYPE prediction_cache_misses_total counter",
+        f"prediction_cache_misses_total {cache_stats['misses']}",
+    ]
+    lines += [
+        "# HELP access_log_dropped_records_total Access records dropped because the log queue was full.",
+        "# TYPE access_log_dropped_records_total counter",
+        f"access_log_dropped_records_total {access_logger.dropped}",
+    ]
+    lines += [
+        "# HELP predict_data_quality_rows_total Rows checked for data-quality issues.",
+        "# TYPE predict_data_quality_rows_total counter",
+        f"predict_data_quality_rows_total {data_quality.rows}",
+    ]
+    # Feature names come from the training data: label values are escaped
+    lines += render_labeled_counts(
+        "predict_data_quality_issues_total",
+        "Rows with an unknown category or a value outside the training range.",
+        ("issue", "feature"),
+        data_quality.counts(),
+    )
+    lines += render_bucket_counts(
+        "predict_batch_rows", "Rows per micro-batch dispatched to the model.",
+        BATCH_SIZE_BUCKETS, stats.size_histogram, stats.rows
+    )
+    return lines
+
+
+observability.registry.add_collector(_collect_serving_metrics)
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(observability.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/predict/cache")
+def predict_cache() -> Dict[str, Any]:
+    return {"config": prediction_cache.config(), "stats": prediction_cache.stats()}
+
+
+@app.get("/predict/quality")
+def predict_quality() -> Dict[str, Any]:
+    return {"config": data_quality.config(), "stats": data_quality.stats()}
+
+
+@app.get("/predict/batching")
+def predict_batching() -> Dict[str, Any]:
+    return {"config": predict_batcher.config(), "stats": predict_batcher.stats.snapshot()}
 
 
 @app.get("/explain")
-def explain() -> Dict[str, Any]:
-    if not model_store.has_model():
+def explain(request: Request) -> Dict[str, Any]:
+    snapshot = _resolve_snapshot()
+    if snapshot is None:
         raise HTTPException(status_code=400, detail="No model trained yet. Call /train first.")
+    if snapshot.explain_payload is None:
+        raise HTTPException(status_code=400, detail=snapshot.explain_error)
+    return _payload_response(request, snapshot.explain_payload)
 
-    model_data = model_store.get_model()
-    pipeline = model_data["pipeline"]
-    feature_names = model_data["feature_names"]
 
-    classifier = pipeline.named_steps['classifier']
-    if not hasattr(classifier, 'coef_'):
+def _explain_records(request: ExplainRecordsRequest, model: Optional[str]) -> Dict[str, Any]:
+    model_data, arrays = _prepare_predict(request, model)
+    compiled = model_data["compiled"]
+    if compiled is None:
+        classifier = model_data["pipeline"].named_steps["classifier"]
         raise HTTPException(
             status_code=400,
-            detail=f"Classifier {type(classifier).__name__} does not support coefficient-based explanation"
+            detail=f"Classifier {type(classifier).__name__} does not support per-record explanation"
         )
 
-    coef = classifier.coef_[0]
-    feature_importance = [{"feature": fname, "weight": float(w)} for fname, w in zip(feature_names, coef)]
-    top_features = sorted(feature_importance, key=lambda x: abs(x["weight"]), reverse=True)[:10]
+    threshold = request.threshold if request.threshold is not None else model_data["threshold"]
+    try:
+        explanations = explain_records(
+            compiled, arrays, model_data["schema"]["feature_names"], threshold, request.top_k
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Explanation error: {str(e)}")
+    return {"method": "linear_contributions", "intercept": compiled.intercept, "explanations": explanations}
+
 
-    return {"method": "logreg_coefficients", "top_features": top_features}
+@app.post("/explain/records")
+async def explain_records_endpoint(
+    request: ExplainRecordsRequest,
+    model: Optional[str] = Query(None, description="Model version ID or alias (default: champion)")
+) -> Dict[str, Any]:
+    # Rendered as a JSONResponse here so large batches skip response-model validation
+    return JSONResponse(content=await run_in_threadpool(_explain_records, request, model))
@@ -0,0 +1,146 @@
+"""
+Apache Arrow IPC stream input and output for /predict.
+
+Callers that already hold pandas/Arrow data can send a batch as an Arrow IPC
+stream (`Content-Type: application/vnd.apache.arrow.stream`) and receive the
+label/probability table in the same format, skipping JSON entirely.
+
+Incoming columns are checked against the stored schema (names, and numeric vs
+string types) and converted to the same arrays `validate_columns` produces.
+float64 columns without nulls in a single chunk are used without copying;
+dictionary-encoded strings (pandas categoricals) are decoded with one take
+over their levels. pyarrow is optional: without it Arrow requests are
+rejected and JSON keeps working.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except Exception:
+    pa = None
+    ARROW_AVAILABLE = False
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def _is_numeric_type(arrow_type) -> bool:
+    return (
+        pa.types.is_integer(arrow_type)
+        or pa.types.is_floating(arrow_type)
+        or pa.types.is_boolean(arrow_type)
+        or pa.types.is_null(arrow_type)
+    )
+
+
+def _is_string_type(arrow_type) -> bool:
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    return (
+        pa.types.is_string(arrow_type)
+        or pa.types.is_large_string(arrow_type)
+        or pa.types.is_null(arrow_type)
+        or getattr(pa.types, "is_string_view", lambda t: False)(arrow_type)
+    )
+
+
+def _numeric_values(column) -> np.ndarray:
+    if column.type != pa.float64():
+        column = column.cast(pa.float64())
+    if column.num_chunks == 1:
+        # Zero-copy view of the Arrow buffer when there are no nulls
+        # (nulls become NaN in a copy)
+        return column.chunk(0).to_numpy(zero_copy_only=False)
+    return column.to_numpy()
+
+
+def _string_values(column) -> np.ndarray:
+    parts: List[np.ndarray] = []
+    for chunk in column.chunks:
+        if pa.types.is_dictionary(chunk.type):
+            levels = chunk.dictionary.to_numpy(zero_copy_only=False).astype(object)
+            codes = chunk.indices.fill_null(0).to_numpy(zero_copy_only=False)
+            values = levels[codes] if len(levels) else np.full(len(chunk), None, dtype=object)
+        else:
+            values = chunk.to_numpy(zero_copy_only=False).astype(object, copy=False)
+        if chunk.null_count:
+            values[chunk.is_null().to_numpy(zero_copy_only=False)] = np.nan
+        parts.append(values)
+    if not parts:
+        return np.empty(0, dtype=object)
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def read_arrow_batch(body: bytes, schema: Dict[str, Any], validator=None) -> Dict[str, np.ndarray]:
+    """
+    Parse and validate an Arrow IPC stream against the model schema.
+
+    Args:
+        body: Arrow IPC stream bytes (one table, any number of record batches)
+        schema: Model schema (feature_names, numeric_features, categorical_features)
+        validator: The model's `CompiledValidator` (built from `schema` if None)
+
+    Returns:
+        Dictionary of arrays in schema["feature_names"] order, in the same
+        form as `validate_columns` (float64 numeric, object categorical,
+        missing values as NaN)
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+        ValueError: If the stream is invalid, columns are missing/unexpected,
+            the batch is empty or a column has the wrong type
+    """
+    from ml.validation import CompiledValidator
+
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("Arrow IPC requests require pyarrow")
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {str(e)}")
+
+    (validator or CompiledValidator(schema)).check_column_names(table.column_names)
+    if table.num_rows == 0:
+        raise ValueError("Batch must contain at least one row")
+
+    numeric_features = set(schema.get("numeric_features", []))
+    categorical_features = set(schema.get("categorical_features", []))
+    arrays: Dict[str, np.ndarray] = {}
+    invalid_fields: List[str] = []
+    for field in schema["feature_names"]:
+        column = table.column(field)
+        if field in numeric_features:
+            if not _is_numeric_type(column.type):
+                invalid_fields.append(f"arrow.{field} must be numeric, got {column.type}")
+                continue
+            arrays[field] = _numeric_values(column)
+        elif field in categorical_features:
+            if not _is_string_type(column.type):
+                invalid_fields.append(f"arrow.{field} must be string, got {column.type}")
+                continue
+            arrays[field] = _string_values(column)
+        else:
+            arrays[field] = column.to_numpy().astype(object)
+
+    if invalid_fields:
+        raise ValueError("; ".join(invalid_fields))
+    return arrays
+
+
+def write_arrow_predictions(labels: np.ndarray, proba: np.ndarray) -> bytes:
+    """
+    Label/probability table as an Arrow IPC stream.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("Arrow IPC responses require pyarrow")
+    table = pa.table({"label": np.asarray(labels), "probability": np.asarray(proba, dtype=np.float64)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
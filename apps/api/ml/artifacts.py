@@ -0,0 +1,346 @@
+"""
+Persistence of trained model artifacts.
+
+A trained model is stored in the artifacts directory in one or both formats:
+
+- "joblib": the serialized pipeline (joblib, or pickle when joblib is
+  unavailable) plus small JSON files for the schema, metrics, training
+  timestamp and decision threshold.
+- "compiled": the parameters of the compiled engine (imputer fills, scaler
+  statistics, coefficients) as one aligned little-endian float64 file read
+  with `np.memmap`, plus a single manifest with the vocabularies, offsets and
+  model metadata. Loading it unpickles nothing and processes loading the same
+  file share its pages.
+
+`MODEL_ARTIFACT_FORMAT` selects what training writes ("joblib", "compiled" or
+"both", default "both"); loaders prefer the compiled format when present.
+"""
+
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from ml.compiled import CompiledPipeline, check_parity, compile_pipeline
+from ml.scoring import DEFAULT_THRESHOLD
+
+try:
+    import joblib
+    JOBLIB_AVAILABLE = True
+except Exception:
+    joblib = None
+    JOBLIB_AVAILABLE = False
+
+# ARTIFACTS_DIR overrides the location (e.g. benchmarks use a scratch directory)
+ARTIFACTS_DIR = Path(os.getenv("ARTIFACTS_DIR", Path(__file__).resolve().parents[1] / "artifacts"))
+MODEL_JOBLIB_NAME = "model.joblib"
+MODEL_PICKLE_NAME = "model.pkl"
+SCHEMA_NAME = "schema.json"
+METRICS_NAME = "metrics.json"
+TRAINED_AT_NAME = "trained_at.json"
+THRESHOLD_NAME = "threshold.json"
+MANIFEST_NAME = "manifest.json"
+PARAMS_NAME = "params.bin"
+INCREMENTAL_STATE_NAME = "incremental.json"
+
+COMPILED_FORMAT_VERSION = 1
+# Array blocks in params.bin start on cache-line boundaries
+PARAMS_ALIGNMENT = 64
+ARTIFACT_FORMATS = ("joblib", "compiled")
+
+MODEL_JOBLIB_PATH = ARTIFACTS_DIR / MODEL_JOBLIB_NAME
+MODEL_PICKLE_PATH = ARTIFACTS_DIR / MODEL_PICKLE_NAME
+SCHEMA_PATH = ARTIFACTS_DIR / SCHEMA_NAME
+METRICS_PATH = ARTIFACTS_DIR / METRICS_NAME
+TRAINED_AT_PATH = ARTIFACTS_DIR / TRAINED_AT_NAME
+THRESHOLD_PATH = ARTIFACTS_DIR / THRESHOLD_NAME
+
+
+def artifact_formats_from_env() -> Tuple[str, ...]:
+    """Formats written by training, from MODEL_ARTIFACT_FORMAT (default "both")."""
+    value = os.getenv("MODEL_ARTIFACT_FORMAT", "both")
+    if value == "both":
+        return ARTIFACT_FORMATS
+    if value not in ARTIFACT_FORMATS:
+        raise ValueError(f"MODEL_ARTIFACT_FORMAT must be one of {ARTIFACT_FORMATS + ('both',)}, got '{value}'")
+    return (value,)
+
+
+def save_compiled(compiled: CompiledPipeline, artifacts_dir: Path, metadata: Dict[str, Any]) -> None:
+    """
+    Write the compiled format (params.bin + manifest.json).
+
+    Args:
+        compiled: Compiled model
+        artifacts_dir: Target directory
+        metadata: JSON-serializable model metadata stored in the manifest
+            (feature_names, schema, metrics, trained_at, decision_threshold)
+    """
+    blocks = {
+        "numeric_fill": compiled.numeric_fill,
+        "mean": compiled.mean,
+        "scale": compiled.scale,
+        "coef": compiled.coef,
+    }
+    layout: Dict[str, Dict[str, int]] = {}
+    offset = 0
+    for name, values in blocks.items():
+        offset = -(-offset // PARAMS_ALIGNMENT) * PARAMS_ALIGNMENT
+        layout[name] = {"offset": offset, "length": len(values)}
+        offset += len(values) * 8
+
+    buffer = np.zeros(max(offset, 1), dtype=np.uint8)
+    for name, values in blocks.items():
+        start = layout[name]["offset"]
+        buffer[start:start + len(values) * 8] = np.ascontiguousarray(values, dtype="<f8").view(np.uint8)
+
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    buffer.tofile(artifacts_dir / PARAMS_NAME)
+    save_json(artifacts_dir / MANIFEST_NAME, {
+        "format": "compiled",
+        "format_version": COMPILED_FORMAT_VERSION,
+        "params_file": PARAMS_NAME,
+        "params_bytes": int(buffer.size),
+        "dtype": "<f8",
+        "arrays": layout,
+        "numeric_features": compiled.numeric_features,
+        "categorical_features": compiled.categorical_features,
+        "categorical_fill": compiled.categorical_fill,
+        "categories": [c.tolist() for c in compiled.categories],
+        "infrequent_categories": [c.tolist() for c in compiled.infrequent_categories],
+        "intercept": compiled.intercept,
+        "classes": compiled.classes.tolist(),
+        **metadata,
+    })
+
+
+def load_compiled(artifacts_dir: Path) -> Tuple[CompiledPipeline, Dict[str, Any]]:
+    """
+    Load the compiled format, memory-mapping params.bin.
+
+    Returns:
+        Tuple (CompiledPipeline whose arrays are read-only views of the
+        mapped file, manifest)
+
+    Raises:
+        ValueError: If the manifest version or the params file size is wrong
+    """
+    manifest = load_json(artifacts_dir / MANIFEST_NAME)
+    if manifest.get("format_version") != COMPILED_FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled artifact version: {manifest.get('format_version')}")
+    params_path = artifacts_dir / manifest["params_file"]
+    if params_path.stat().st_size != manifest["params_bytes"]:
+        raise ValueError(f"{params_path.name} has {params_path.stat().st_size} bytes, expected {manifest['params_bytes']}")
+
+    mapped = np.memmap(params_path, dtype=np.uint8, mode="r")
+
+    def block(name: str) -> np.ndarray:
+        spec = manifest["arrays"][name]
+        start = spec["offset"]
+        return mapped[start:start + spec["length"] * 8].view(manifest["dtype"])
+
+    compiled = CompiledPipeline(
+        numeric_features=manifest["numeric_features"],
+        numeric_fill=block("numeric_fill"),
+        mean=block("mean"),
+        scale=block("scale"),
+        categorical_features=manifest["categorical_features"],
+        categorical_fill=manifest["categorical_fill"],
+        categories=manifest["categories"],
+        coef=block("coef"),
+        intercept=manifest["intercept"],
+        classes=manifest["classes"],
+        infrequent_categories=manifest.get("infrequent_categories")
+    )
+    return compiled, manifest
+
+
+def save_pipeline(
+    pipeline,
+    artifacts_dir: Path = ARTIFACTS_DIR,
+    formats: Iterable[str] = ("joblib",),
+    metadata: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Persist a fitted pipeline.
+
+    The compiled format is read back after writing and checked against the
+    pipeline on probe rows; on mismatch its files are removed.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+        artifacts_dir: Target directory
+        formats: "joblib" and/or "compiled"
+        metadata: Manifest metadata for the compiled format
+
+    Raises:
+        ValueError: If the pipeline cannot be compiled or fails the parity check
+    """
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    formats = tuple(formats)
+    if "joblib" in formats:
+        if JOBLIB_AVAILABLE:
+            joblib.dump(pipeline, artifacts_dir / MODEL_JOBLIB_NAME)
+        else:
+            with open(artifacts_dir / MODEL_PICKLE_NAME, "wb") as f:
+                pickle.dump(pipeline, f)
+
+    if "compiled" in formats:
+        compiled = CompiledPipeline.from_pipeline(pipeline)
+        save_compiled(compiled, artifacts_dir, metadata or {})
+        try:
+            check_parity(pipeline, load_compiled(artifacts_dir)[0])
+        except ValueError:
+            (artifacts_dir / MANIFEST_NAME).unlink(missing_ok=True)
+            (artifacts_dir / PARAMS_NAME).unlink(missing_ok=True)
+            raise
+
+
+def save_model_artifacts(
+    pipeline,
+    artifacts_dir: Path,
+    schema: Dict[str, Any],
+    metrics: Dict[str, Any],
+    trained_at: str,
+    threshold: float,
+    formats: Optional[Iterable[str]] = None
+) -> Tuple[str, ...]:
+    """
+    Persist a trained model with its metadata.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+        artifacts_dir: Target directory
+        schema: Feature schema
+        metrics: Evaluation metrics
+        trained_at: ISO training timestamp
+        threshold: Decision threshold
+        formats: Formats to write (defaults to `artifact_formats_from_env`)
+
+    Returns:
+        The formats actually written ("compiled" is skipped when the
+        pipeline layout cannot be compiled and joblib is written as well)
+    """
+    formats = tuple(formats or artifact_formats_from_env())
+    if "compiled" in formats and "joblib" in formats and compile_pipeline(pipeline) is None:
+        formats = ("joblib",)
+
+    feature_names = pipeline.named_steps["preprocessor"].get_feature_names_out().tolist()
+    save_pipeline(pipeline, artifacts_dir, formats, metadata={
+        "feature_names": feature_names,
+        "schema": schema,
+        "metrics": metrics,
+        "trained_at": trained_at,
+        "decision_threshold": threshold,
+    })
+    if "joblib" in formats:
+        save_json(artifacts_dir / SCHEMA_NAME, schema)
+        save_json(artifacts_dir / METRICS_NAME, metrics)
+        save_json(artifacts_dir / TRAINED_AT_NAME, {"trained_at": trained_at})
+        save_json(artifacts_dir / THRESHOLD_NAME, {"decision_threshold": threshold})
+    return formats
+
+
+def load_pipeline(path: Path, mmap: bool = False):
+    """
+    Load a serialized model.
+
+    Args:
+        path: Path to model.joblib, model.pkl or a compiled manifest.json
+        mmap: Memory-map large NumPy arrays (joblib only; the compiled
+            format is always memory-mapped), so worker processes share
+            pages instead of copying them
+
+    Returns:
+        sklearn Pipeline, or CompiledPipeline for a manifest
+    """
+    if path.name == MANIFEST_NAME:
+        return load_compiled(path.parent)[0]
+    if path.suffix == ".joblib":
+        if not JOBLIB_AVAILABLE:
+            raise RuntimeError("joblib not available to load model.joblib")
+        return joblib.load(path, mmap_mode="r" if mmap else None)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def get_model_path_for_load(artifacts_dir: Path = ARTIFACTS_DIR, prefer_compiled: bool = False) -> Optional[Path]:
+    if prefer_compiled and (artifacts_dir / MANIFEST_NAME).exists():
+        return artifacts_dir / MANIFEST_NAME
+    if (artifacts_dir / MODEL_JOBLIB_NAME).exists():
+        return artifacts_dir / MODEL_JOBLIB_NAME
+    if (artifacts_dir / MODEL_PICKLE_NAME).exists():
+        return artifacts_dir / MODEL_PICKLE_NAME
+    return None
+
+
+def save_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def load_json(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_artifacts(
+    artifacts_dir: Path = ARTIFACTS_DIR,
+    mmap: bool = False,
+    prefer_compiled: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Load a persisted model and its metadata.
+
+    With the compiled format only the manifest is parsed and the parameters
+    are memory-mapped; the returned pipeline is then None.
+
+    Args:
+        artifacts_dir: Directory holding the artifacts
+        mmap: Memory-map the pipeline's arrays (see `load_pipeline`)
+        prefer_compiled: Use the compiled format when it is present
+
+    Returns:
+        Dictionary with pipeline, compiled, feature_names, metrics, schema,
+        trained_at, threshold; None if the artifacts are incomplete
+
+    Raises:
+        ValueError: If the stored pipeline has no preprocessor step
+    """
+    if prefer_compiled and (artifacts_dir / MANIFEST_NAME).exists():
+        compiled, manifest = load_compiled(artifacts_dir)
+        return {
+            "pipeline": None,
+            "compiled": compiled,
+            "feature_names": manifest["feature_names"],
+            "metrics": manifest["metrics"],
+            "schema": manifest["schema"],
+            "trained_at": manifest["trained_at"],
+            "threshold": manifest.get("decision_threshold", DEFAULT_THRESHOLD),
+        }
+
+    model_path = get_model_path_for_load(artifacts_dir)
+    required = (artifacts_dir / SCHEMA_NAME, artifacts_dir / METRICS_NAME, artifacts_dir / TRAINED_AT_NAME)
+    if model_path is None or not all(p.exists() for p in required):
+        return None
+
+    pipeline = load_pipeline(model_path, mmap=mmap)
+    threshold = DEFAULT_THRESHOLD
+    if (artifacts_dir / THRESHOLD_NAME).exists():
+        threshold = load_json(artifacts_dir / THRESHOLD_NAME).get("decision_threshold", DEFAULT_THRESHOLD)
+
+    preprocessor = pipeline.named_steps.get("preprocessor")
+    if preprocessor is None:
+        raise ValueError("Pipeline missing preprocessor step")
+
+    return {
+        "pipeline": pipeline,
+        "compiled": None,
+        "feature_names": preprocessor.get_feature_names_out().tolist(),
+        "metrics": load_json(artifacts_dir / METRICS_NAME),
+        "schema": load_json(artifacts_dir / SCHEMA_NAME),
+        "trained_at": load_json(artifacts_dir / TRAINED_AT_NAME).get("trained_at"),
+        "threshold": threshold,
+    }
@@ -0,0 +1,275 @@
+"""
+Asyncio micro-batching for small scoring requests.
+
+Concurrent small `/predict` calls are queued, coalesced for up to a short
+window (or until a row budget is reached), scored as one matrix against the
+model they were validated for, and the probabilities are fanned back out to
+each caller.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ScoreFn = Callable[[Dict[str, Any], Dict[str, np.ndarray]], Tuple[np.ndarray, np.ndarray]]
+
+# Upper bounds of the batch-size histogram buckets (rows per batch)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class BatchStats:
+    """Rolling statistics about dispatched batches."""
+
+    def __init__(self, window: int = 1024):
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.max_batch_rows = 0
+        self.size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._latencies_ms: Deque[float] = deque(maxlen=window)
+        self._scoring_ms: Deque[float] = deque(maxlen=window)
+
+    def record(self, n_requests: int, n_rows: int, latency_s: float, scoring_s: float) -> None:
+        """
+        Record one dispatched batch.
+
+        Args:
+            n_requests: Number of coalesced requests
+            n_rows: Total rows scored
+            latency_s: Time from the oldest request's arrival to fan-out
+            scoring_s: Time spent scoring the batch
+        """
+        self.batches += 1
+        self.requests += n_requests
+        self.rows += n_rows
+        self.max_batch_rows = max(self.max_batch_rows, n_rows)
+        self.size_histogram[int(np.searchsorted(BATCH_SIZE_BUCKETS, n_rows))] += 1
+        self._latencies_ms.append(latency_s * 1000)
+        self._scoring_ms.append(scoring_s * 1000)
+
+    @staticmethod
+    def _percentiles(values: Deque[float]) -> Dict[str, Optional[float]]:
+        if not values:
+            return {"p50": None, "p95": None, "p99": None}
+        p50, p95, p99 = np.percentile(np.fromiter(values, dtype=np.float64), [50, 95, 99])
+        return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Statistics as a JSON-serializable dict."""
+        labels = [f"<={b}" for b in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "mean_batch_rows": round(self.rows / self.batches, 2) if self.batches else None,
+            "mean_batch_requests": round(self.requests / self.batches, 2) if self.batches else None,
+            "max_batch_rows": self.max_batch_rows,
+            "batch_rows_histogram": dict(zip(labels, self.size_histogram)),
+            "batch_latency_ms": self._percentiles(self._latencies_ms),
+            "scoring_ms": self._percentiles(self._scoring_ms),
+        }
+
+
+class _Pending:
+    __slots__ = ("model_data", "arrays", "n_rows", "future", "enqueued_at")
+
+    def __init__(self, model_data, arrays, n_rows, future):
+        self.model_data = model_data
+        self.arrays = arrays
+        self.n_rows = n_rows
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into batched calls to `score_fn`."""
+
+    def __init__(
+        self,
+        score_fn: ScoreFn,
+        enabled: bool = False,
+        window_ms: float = 2.0,
+        max_rows: int = 512
+    ):
+        """
+        Args:
+            score_fn: Callable (model_data, arrays) -> (probabilities, classes)
+            enabled: Whether requests should be routed through the batcher
+            window_ms: Maximum time to wait for more requests after the first one
+            max_rows: Row budget per batch; a batch is dispatched once reached
+        """
+        self.score_fn = score_fn
+        self.enabled = enabled
+        self.window_ms = window_ms
+        self.max_rows = max_rows
+        self.stats = BatchStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: List[_Pending] = []
+
+    @classmethod
+    def from_env(cls, score_fn: ScoreFn) -> "MicroBatcher":
+        """
+        Build a batcher configured from environment variables.
+
+        PREDICT_MICROBATCH=1 enables it; PREDICT_BATCH_WINDOW_MS and
+        PREDICT_BATCH_MAX_ROWS set the window and row budget.
+        """
+        return cls(
+            score_fn,
+            enabled=os.getenv("PREDICT_MICROBATCH", "0").lower() in ("1", "true", "yes"),
+            window_ms=float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2")),
+            max_rows=int(os.getenv("PREDICT_BATCH_MAX_ROWS", "512"))
+        )
+
+    def config(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "window_ms": self.window_ms, "max_rows": self.max_rows}
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        # (Re)bind to the current loop, e.g. after a test client created a new one;
+        # anything left on the previous binding would otherwise wait forever
+        if self._task is not None and not self._task.done():
+            self._call_on_owner_loop(self._task, self._task.cancel)
+        self._abandon()
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._run())
+
+    async def submit(
+        self,
+        model_data: Dict[str, Any],
+        arrays: Dict[str, np.ndarray],
+        n_rows: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Queue a validated batch and wait for its share of a coalesced batch.
+
+        Args:
+            model_data: Model entry the arrays were validated against
+            arrays: Validated column arrays
+            n_rows: Number of rows in `arrays`
+
+        Returns:
+            Tuple (probabilities, classes) for this request's rows
+        """
+        self._ensure_running()
+        future = self._loop.create_future()
+        self._queue.put_nowait(_Pending(model_data, arrays, n_rows, future))
+        return await future
+
+    async def stop(self) -> None:
+        """Cancel the dispatch loop (pending callers receive CancelledError)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._abandon()
+        self._task = None
+        self._queue = None
+        self._loop = None
+
+    @staticmethod
+    def _call_on_owner_loop(awaitable, callback) -> None:
+        loop = awaitable.get_loop()
+        if loop.is_closed():
+            return
+        try:
+            if loop is asyncio.get_running_loop():
+                callback()
+            else:
+                loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass
+
+    def _abandon(self) -> None:
+        """Cancel the futures of every queued or in-flight request."""
+        pending = list(self._inflight)
+        self._inflight = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+        for item in pending:
+            if not item.future.done():
+                self._call_on_owner_loop(item.future, item.future.cancel)
+
+    async def _collect(self) -> List[_Pending]:
+        queue = self._queue
+        first = await queue.get()
+        batch = [first]
+        rows = first.n_rows
+        deadline = self._loop.time() + self.window_ms / 1000
+        while rows < self.max_rows:
+            if queue.empty():
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = queue.get_nowait()
+            batch.append(item)
+            rows += item.n_rows
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            self._inflight = batch
+            # Only requests validated against the same model can share a matrix
+            groups: Dict[int, List[_Pending]] = {}
+            for item in batch:
+                if not item.future.cancelled():
+                    groups.setdefault(item.model_data["generation"], []).append(item)
+            for items in groups.values():
+                await self._dispatch(items)
+            self._inflight = []
+
+    async def _dispatch(self, items: List[_Pending]) -> None:
+        model_data = items[0].model_data
+        if len(items) == 1:
+            arrays = items[0].arrays
+        else:
+            arrays = {
+                name: np.concatenate([item.arrays[name] for item in items])
+                for name in items[0].arrays
+            }
+
+        started = time.perf_counter()
+        try:
+            proba, classes = await self._loop.run_in_executor(None, self.score_fn, model_data, arrays)
+        except Exception as exc:
+            if len(items) > 1:
+                # One bad request must not fail the others it was batched with:
+                # score each on its own so only the offending caller gets the error
+                for item in items:
+                    await self._dispatch([item])
+                return
+            if not items[0].future.done():
+                items[0].future.set_exception(exc)
+            return
+        finished = time.perf_counter()
+
+        offset = 0
+        for item in items:
+            if not item.future.done():
+                item.future.set_result((proba[offset:offset + item.n_rows], classes))
+            offset += item.n_rows
+
+        self.stats.record(
+            n_requests=len(items),
+            n_rows=offset,
+            latency_s=finished - min(item.enqueued_at for item in items),
+            scoring_s=finished - started
+        )
@@ -0,0 +1,163 @@
+"""
+In-process cache of positive-class probabilities for repeated records.
+
+Keys are (model generation, canonical row) where the canonical row is the
+tuple of a record's validated feature values in `schema["feature_names"]`
+order, with every missing value normalized to None. Entries are bounded
+(LRU eviction), expire after a TTL and are dropped when a new model is
+installed. Only the rows that miss are sent to the model, as one batch.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+RowKey = Tuple[Hashable, ...]
+
+
+def row_keys(arrays: Dict[str, np.ndarray], feature_names: List[str]) -> List[RowKey]:
+    """
+    Canonical per-row keys for validated column arrays.
+
+    Args:
+        arrays: Validated column arrays (numeric float64, categorical object)
+        feature_names: Feature order of the model schema
+
+    Returns:
+        One tuple of feature values per row (NaN and None both become None)
+    """
+    columns = []
+    for name in feature_names:
+        # v != v is only true for NaN; normalizing keeps missing rows equal
+        columns.append([None if v is None or v != v else v for v in arrays[name].tolist()])
+    return list(zip(*columns))
+
+
+def take_rows(arrays: Dict[str, np.ndarray], rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Subset every column array to the given row indices."""
+    return {name: values[rows] for name, values in arrays.items()}
+
+
+class CacheLookup:
+    """Result of `PredictionCache.lookup` for one batch."""
+
+    __slots__ = ("generation", "keys", "proba", "missing")
+
+    def __init__(self, generation: int, keys: List[RowKey], proba: np.ndarray, missing: np.ndarray):
+        self.generation = generation
+        self.keys = keys
+        # Cached probabilities; NaN at the `missing` row indices until filled
+        self.proba = proba
+        self.missing = missing
+
+
+class PredictionCache:
+    """Bounded LRU + TTL map from (generation, row) to probability."""
+
+    def __init__(self, enabled: bool = False, max_entries: int = 100_000, ttl_s: float = 300.0):
+        """
+        Args:
+            enabled: Whether the predict path consults the cache
+            max_entries: Maximum cached rows (least recently used dropped first)
+            ttl_s: Seconds an entry stays valid
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Tuple[int, RowKey], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "PredictionCache":
+        """Configure from PREDICT_CACHE, PREDICT_CACHE_SIZE and PREDICT_CACHE_TTL_S."""
+        return cls(
+            enabled=os.getenv("PREDICT_CACHE", "0") == "1",
+            max_entries=int(os.getenv("PREDICT_CACHE_SIZE", "100000")),
+            ttl_s=float(os.getenv("PREDICT_CACHE_TTL_S", "300"))
+        )
+
+    def config(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "max_entries": self.max_entries, "ttl_s": self.ttl_s}
+
+    def lookup(self, generation: int, arrays: Dict[str, np.ndarray], feature_names: List[str]) -> CacheLookup:
+        """
+        Look up every row of a batch.
+
+        Args:
+            generation: Generation of the model snapshot scoring the batch
+            arrays: Validated column arrays
+            feature_names: Feature order of the model schema
+
+        Returns:
+            CacheLookup with the cached probabilities and the missing rows
+        """
+        keys = row_keys(arrays, feature_names)
+        proba = np.full(len(keys), np.nan)
+        missing: List[int] = []
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get((generation, key))
+                if entry is not None and entry[0] <= now:
+                    del self._entries[(generation, key)]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(i)
+                    continue
+                self._entries.move_to_end((generation, key))
+                proba[i] = entry[1]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return CacheLookup(generation, keys, proba, np.asarray(missing, dtype=np.intp))
+
+    def fill(self, lookup: CacheLookup, missing_proba: np.ndarray) -> np.ndarray:
+        """
+        Store freshly scored rows and complete the lookup.
+
+        Args:
+            lookup: Result of `lookup`
+            missing_proba: Probabilities for `lookup.missing`, in that order
+
+        Returns:
+            Probabilities for the whole batch
+        """
+        lookup.proba[lookup.missing] = missing_proba
+        expires_at = time.monotonic() + self.ttl_s
+        with self._lock:
+            for i, value in zip(lookup.missing.tolist(), missing_proba.tolist()):
+                cache_key = (lookup.generation, lookup.keys[i])
+                self._entries[cache_key] = (expires_at, value)
+                self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return lookup.proba
+
+    def clear(self) -> None:
+        """Drop every entry (called when a new model is installed)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters as a JSON-serializable dict."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
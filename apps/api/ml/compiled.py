@@ -0,0 +1,354 @@
+"""
+Compiled, pandas-free scoring engine for fitted pipelines.
+
+A fitted pipeline from `build_pipeline` is flattened into plain NumPy arrays
+(imputation constants, scaler statistics, category lookup tables, coefficient
+vector and intercept) that can be evaluated directly on validated column
+arrays, without pandas or the sklearn transformer dispatch.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.special import expit
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+
+def _is_missing(arr: np.ndarray) -> np.ndarray:
+    """Missing-value mask for object arrays (NaN and None)."""
+    return (arr != arr) | (arr == None)  # noqa: E711 (elementwise comparison)
+
+
+class CompiledPipeline:
+    """Flat NumPy representation of a fitted preprocessing + LogisticRegression pipeline."""
+
+    def __init__(
+        self,
+        numeric_features: List[str],
+        numeric_fill: np.ndarray,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        categorical_features: List[str],
+        categorical_fill: List[Any],
+        categories: List[np.ndarray],
+        coef: np.ndarray,
+        intercept: float,
+        classes: np.ndarray,
+        infrequent_categories: Optional[List[np.ndarray]] = None
+    ):
+        """
+        Args:
+            numeric_features: Numeric column names (transformed column order)
+            numeric_fill: Imputation value per numeric column
+            mean: Scaler mean per numeric column
+            scale: Scaler scale per numeric column
+            categorical_features: Categorical column names (transformed column order)
+            categorical_fill: Imputation value per categorical column
+            categories: Known categories per categorical column (one-hot order),
+                without the infrequent ones
+            coef: Coefficients over the transformed feature space
+            intercept: Intercept of the linear model
+            classes: Class labels (negative class first)
+            infrequent_categories: Categories grouped into a trailing
+                infrequent column, per categorical column (OneHotEncoder
+                `min_frequency` / `max_categories`); empty when not grouped
+        """
+        self.numeric_features = list(numeric_features)
+        self.numeric_fill = np.asarray(numeric_fill, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categorical_features = list(categorical_features)
+        self.categorical_fill = list(categorical_fill)
+        self.categories = [np.asarray(c, dtype=object) for c in categories]
+        if infrequent_categories is None:
+            infrequent_categories = [[] for _ in self.categories]
+        self.infrequent_categories = [np.asarray(c, dtype=object) for c in infrequent_categories]
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+
+        n_numeric = len(self.numeric_features)
+        self.coef_numeric = self.coef[:n_numeric]
+
+        # category -> transformed column index, one table per categorical column
+        self.category_index: List[Dict[Any, int]] = []
+        offset = n_numeric
+        for cats, rare in zip(self.categories, self.infrequent_categories):
+            index = {cat: offset + i for i, cat in enumerate(cats.tolist())}
+            offset += len(cats)
+            if len(rare):
+                # Every infrequent category shares the trailing column
+                index.update((cat, offset) for cat in rare.tolist())
+                offset += 1
+            self.category_index.append(index)
+        self.n_features_out = offset
+
+        # Unknown categories map to the trailing zero (OneHotEncoder handle_unknown="ignore")
+        self.coef_padded = np.append(self.coef, 0.0)
+        self.unknown_index = self.n_features_out
+
+        if self.coef.shape != (self.n_features_out,):
+            raise ValueError(
+                f"Coefficient vector has {self.coef.shape[0]} entries, "
+                f"expected {self.n_features_out} transformed features"
+            )
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Pipeline) -> "CompiledPipeline":
+        """
+        Compile a fitted pipeline produced by `build_pipeline`.
+
+        Args:
+            pipeline: Fitted sklearn Pipeline
+
+        Returns:
+            CompiledPipeline with the same scoring behaviour
+
+        Raises:
+            ValueError: If the pipeline layout is not supported
+        """
+        preprocessor = pipeline.named_steps.get("preprocessor")
+        classifier = pipeline.named_steps.get("classifier")
+        if preprocessor is None or not hasattr(preprocessor, "transformers_"):
+            raise ValueError("Pipeline missing fitted preprocessor step")
+        if not isinstance(classifier, LogisticRegression) or len(classifier.classes_) != 2:
+            raise ValueError("Only binary LogisticRegression classifiers can be compiled")
+
+        numeric_features: List[str] = []
+        numeric_fill = mean = scale = np.empty(0)
+        categorical_features: List[str] = []
+        categorical_fill: List[Any] = []
+        categories: List[np.ndarray] = []
+        infrequent_categories: List[np.ndarray] = []
+
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == "remainder":
+                if transformer != "drop":
+                    raise ValueError("Only remainder='drop' is supported")
+                continue
+            if len(columns) == 0:
+                continue
+            steps = dict(transformer.steps)
+            imputer = steps.get("imputer")
+            if not isinstance(imputer, SimpleImputer) or imputer.add_indicator:
+                raise ValueError(f"Unsupported imputer in '{name}' transformer")
+
+            if name == "num":
+                scaler = steps.get("scaler")
+                if not isinstance(scaler, StandardScaler):
+                    raise ValueError("Numeric transformer must use StandardScaler")
+                n = len(columns)
+                numeric_features = list(columns)
+                numeric_fill = imputer.statistics_.astype(np.float64)
+                mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+                scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+            elif name == "cat":
+                encoder = steps.get("onehot")
+                if not isinstance(encoder, OneHotEncoder) or encoder.drop_idx_ is not None:
+                    raise ValueError("Categorical transformer must use OneHotEncoder without drop")
+                categorical_features = list(columns)
+                categorical_fill = imputer.statistics_.tolist()
+                categories = list(encoder.categories_)
+                infrequent_categories = [np.empty(0, dtype=object) for _ in categories]
+                if getattr(encoder, "_infrequent_enabled", False):
+                    # Frequent categories keep their order; the infrequent
+                    # ones share the last column of the feature
+                    for i, rare in enumerate(encoder.infrequent_categories_):
+                        if rare is not None:
+                            categories[i] = categories[i][~np.isin(categories[i], rare)]
+                            infrequent_categories[i] = np.asarray(rare, dtype=object)
+            else:
+                raise ValueError(f"Unsupported transformer '{name}'")
+
+        return cls(
+            numeric_features=numeric_features,
+            numeric_fill=numeric_fill,
+            mean=mean,
+            scale=scale,
+            categorical_features=categorical_features,
+            categorical_fill=categorical_fill,
+            categories=categories,
+            coef=classifier.coef_[0],
+            intercept=classifier.intercept_[0],
+            classes=classifier.classes_,
+            infrequent_categories=infrequent_categories
+        )
+
+    def feature_names_out(self) -> List[str]:
+        """Transformed feature names, as `ColumnTransformer.get_feature_names_out` reports them."""
+        names = [f"num__{name}" for name in self.numeric_features]
+        for name, cats, rare in zip(self.categorical_features, self.categories, self.infrequent_categories):
+            names.extend(f"cat__{name}_{cat}" for cat in cats.tolist())
+            if len(rare):
+                names.append(f"cat__{name}_infrequent_sklearn")
+        return names
+
+    def _n_rows(self, arrays: Dict[str, np.ndarray]) -> int:
+        first = (self.numeric_features or self.categorical_features)[0]
+        return len(arrays[first])
+
+    def transform_numeric(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Impute and scale numeric columns into an (n_rows, n_numeric) matrix."""
+        n_rows = self._n_rows(arrays)
+        X = np.empty((n_rows, len(self.numeric_features)), dtype=np.float64)
+        for j, name in enumerate(self.numeric_features):
+            X[:, j] = arrays[name]
+        if np.isinf(X).any():
+            # Same contract as sklearn's input validation
+            raise ValueError("Input X contains infinity or a value too large for dtype('float64').")
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.numeric_fill, X)
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def category_codes(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Map categorical columns to transformed column indices.
+
+        Returns:
+            (n_rows, n_categorical) int matrix; unknown categories map to
+            `unknown_index` (a zero coefficient)
+        """
+        n_rows = self._n_rows(arrays)
+        codes = np.empty((n_rows, len(self.categorical_features)), dtype=np.intp)
+        for j, name in enumerate(self.categorical_features):
+            values = np.asarray(arrays[name], dtype=object)
+            missing = _is_missing(values)
+            if missing.any():
+                values = values.copy()
+                values[missing] = self.categorical_fill[j]
+            lookup = self.category_index[j].get
+            unknown = self.unknown_index
+            codes[:, j] = np.fromiter((lookup(v, unknown) for v in values), dtype=np.intp, count=n_rows)
+        return codes
+
+    def transform(self, arrays: Dict[str, np.ndarray]) -> Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Preprocess a batch without applying the linear model.
+
+        Returns:
+            Tuple (n_rows, scaled numeric matrix or None, category codes or None)
+        """
+        X = self.transform_numeric(arrays) if self.numeric_features else None
+        codes = self.category_codes(arrays) if self.categorical_features else None
+        return self._n_rows(arrays), X, codes
+
+    def decision_from_transformed(self, transformed: Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]) -> np.ndarray:
+        """Linear decision values from the output of `transform`."""
+        n_rows, X, codes = transformed
+        z = np.full(n_rows, self.intercept)
+        if X is not None:
+            z += X @ self.coef_numeric
+        if codes is not None:
+            z += self.coef_padded[codes].sum(axis=1)
+        return z
+
+    def contributions_from_transformed(
+        self,
+        transformed: Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]
+    ) -> np.ndarray:
+        """
+        Per-row, per-input-feature terms of the linear decision value.
+
+        A numeric feature contributes its scaled value times its coefficient.
+        A categorical feature has exactly one active one-hot column per row
+        (or none for an unknown category), so its contribution is that
+        column's coefficient. Each row sums to its decision value minus the
+        intercept.
+
+        Returns:
+            (n_rows, n_numeric + n_categorical) matrix, columns in
+            `numeric_features + categorical_features` order
+        """
+        n_rows, X, codes = transformed
+        contributions = np.empty((n_rows, len(self.numeric_features) + len(self.categorical_features)))
+        n_numeric = len(self.numeric_features)
+        if X is not None:
+            np.multiply(X, self.coef_numeric, out=contributions[:, :n_numeric])
+        if codes is not None:
+            np.take(self.coef_padded, codes, out=contributions[:, n_numeric:])
+        return contributions
+
+    def decision_function(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Linear decision values for a batch of validated column arrays."""
+        return self.decision_from_transformed(self.transform(arrays))
+
+    def predict_proba(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Probability of the positive class for each row."""
+        return expit(self.decision_function(arrays))
+
+    def predict_proba_transformed(self, transformed: Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]) -> np.ndarray:
+        """Probability of the positive class from the output of `transform`."""
+        return expit(self.decision_from_transformed(transformed))
+
+
+def compile_pipeline(pipeline: Pipeline) -> Optional[CompiledPipeline]:
+    """
+    Compile a fitted pipeline, returning None when its layout is not supported.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+
+    Returns:
+        CompiledPipeline or None (callers fall back to the sklearn pipeline)
+    """
+    try:
+        return CompiledPipeline.from_pipeline(pipeline)
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+
+def probe_arrays(compiled: CompiledPipeline) -> Dict[str, np.ndarray]:
+    """
+    Synthetic rows that exercise every compiled parameter.
+
+    Covers each known (and infrequent) category, an unknown category and
+    missing values in every column, with numeric values around the scaler
+    statistics.
+    """
+    known_categories = [
+        cats.tolist() + rare.tolist()
+        for cats, rare in zip(compiled.categories, compiled.infrequent_categories)
+    ]
+    n_rows = max([len(c) for c in known_categories] + [1]) + 2
+    arrays: Dict[str, np.ndarray] = {}
+    for j, name in enumerate(compiled.numeric_features):
+        values = compiled.mean[j] + compiled.scale[j] * np.linspace(-2.0, 2.0, n_rows)
+        values[-1] = np.nan
+        arrays[name] = values
+    for j, name in enumerate(compiled.categorical_features):
+        known = known_categories[j]
+        values = np.array([known[i % len(known)] if known else None for i in range(n_rows)], dtype=object)
+        values[-2] = "__unknown_category__"
+        values[-1] = np.nan
+        arrays[name] = values
+    return arrays
+
+
+def check_parity(pipeline: Pipeline, compiled: CompiledPipeline, rtol: float = 1e-6) -> None:
+    """
+    Verify that a compiled model scores like the pipeline it came from.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+        compiled: Compiled (or reloaded) model
+        rtol: Relative tolerance on positive-class probabilities (sklearn
+            keeps some float32 arithmetic for models fitted on float32 data)
+
+    Raises:
+        ValueError: If any probe row scores differently
+    """
+    import pandas as pd
+
+    arrays = probe_arrays(compiled)
+    columns = compiled.numeric_features + compiled.categorical_features
+    expected = pipeline.predict_proba(pd.DataFrame(arrays, columns=columns))[:, 1]
+    actual = compiled.predict_proba(arrays)
+    if not np.allclose(actual, expected, rtol=rtol, atol=1e-9):
+        worst = float(np.max(np.abs(actual - expected)))
+        raise ValueError(f"Compiled model does not match the pipeline (max abs diff {worst:.3g})")
@@ -0,0 +1,146 @@
+"""
+Global and per-record explanations for linear models.
+
+Globally, the largest coefficients of the transformed feature space are
+listed (`/explain`). Per record, the contribution of an input feature to a row's score is its term in the
+logistic regression's decision value: scaled value x coefficient for numeric
+features, and the coefficient of the active one-hot column for categorical
+ones (all one-hot columns of a feature aggregate to that single term). The
+contributions come from the same compiled transform as `/predict`, as one
+matrix for the whole batch, and the top-k per row is selected with
+`np.argpartition` instead of sorting every row.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy.special import expit
+
+from ml.compiled import CompiledPipeline
+from ml.scoring import apply_threshold
+
+DEFAULT_TOP_K = 5
+# Coefficients listed by /explain
+TOP_COEFFICIENTS = 10
+
+
+def coefficient_importance(
+    pipeline,
+    compiled: Optional[CompiledPipeline],
+    feature_names: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Largest coefficients by magnitude over the transformed feature space.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline (None for compiled-only artifacts)
+        compiled: Compiled model, if any
+        feature_names: Transformed feature names (coefficient order)
+
+    Returns:
+        Up to `TOP_COEFFICIENTS` dicts with feature and weight
+
+    Raises:
+        ValueError: If the classifier has no coefficients
+    """
+    if pipeline is None:
+        # Compiled-only artifacts carry the coefficients directly
+        coef = compiled.coef
+    else:
+        classifier = pipeline.named_steps["classifier"]
+        if not hasattr(classifier, "coef_"):
+            raise ValueError(
+                f"Classifier {type(classifier).__name__} does not support coefficient-based explanation"
+            )
+        coef = classifier.coef_[0]
+
+    coef = np.asarray(coef, dtype=np.float64)[:len(feature_names)]
+    order = np.argsort(-np.abs(coef), kind="stable")[:TOP_COEFFICIENTS]
+    return [{"feature": feature_names[i], "weight": float(coef[i])} for i in order.tolist()]
+
+
+def record_contributions(
+    compiled: CompiledPipeline,
+    arrays: Dict[str, np.ndarray],
+    feature_names: List[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Score a batch and attribute each row's decision value to its input features.
+
+    Args:
+        compiled: Compiled model
+        arrays: Validated column arrays (see ml.validation.validate_columns)
+        feature_names: Input feature order of the returned matrix (schema["feature_names"])
+
+    Returns:
+        Dict with `contributions` ((n_rows, n_features) matrix, columns in
+        `feature_names` order) and `proba` (positive-class probabilities)
+    """
+    transformed = compiled.transform(arrays)
+    contributions = compiled.contributions_from_transformed(transformed)
+    proba = expit(contributions.sum(axis=1) + compiled.intercept)
+
+    compiled_order = compiled.numeric_features + compiled.categorical_features
+    if compiled_order != list(feature_names):
+        position = {name: j for j, name in enumerate(compiled_order)}
+        contributions = contributions[:, [position[name] for name in feature_names]]
+    return {"contributions": contributions, "proba": proba}
+
+
+def top_k_indices(contributions: np.ndarray, k: int) -> np.ndarray:
+    """
+    Column indices of the `k` largest absolute contributions per row.
+
+    Args:
+        contributions: (n_rows, n_features) matrix
+        k: Features to keep per row (capped at n_features)
+
+    Returns:
+        (n_rows, k) int matrix, ordered by decreasing absolute contribution
+    """
+    n_features = contributions.shape[1]
+    k = min(k, n_features)
+    magnitude = np.abs(contributions)
+    if k < n_features:
+        # O(n_features) selection per row; only the k survivors are sorted
+        top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(n_features), contributions.shape)
+    order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def explain_records(
+    compiled: CompiledPipeline,
+    arrays: Dict[str, np.ndarray],
+    feature_names: List[str],
+    threshold: float,
+    top_k: int = DEFAULT_TOP_K
+) -> List[Dict[str, Any]]:
+    """
+    Label, probability and top-k feature contributions for every row.
+
+    Args:
+        compiled: Compiled model
+        arrays: Validated column arrays
+        feature_names: Input feature names (schema["feature_names"])
+        threshold: Decision threshold for the labels
+        top_k: Contributions returned per row
+
+    Returns:
+        One dict per row: label, probability, `features` and the matching
+        `contributions` (decision-value units, largest magnitude first)
+    """
+    scored = record_contributions(compiled, arrays, feature_names)
+    contributions, proba = scored["contributions"], scored["proba"]
+    top = top_k_indices(contributions, top_k)
+
+    # Whole-matrix gathers and one tolist() per field; the per-row work is
+    # only assembling the dicts
+    labels = apply_threshold(proba, threshold, compiled.classes).tolist()
+    names = np.asarray(feature_names, dtype=object)[top].tolist()
+    values = np.take_along_axis(contributions, top, axis=1).tolist()
+    return [
+        {"label": label, "probability": p, "features": f, "contributions": c}
+        for label, p, f, c in zip(labels, proba.tolist(), names, values)
+    ]
@@ -0,0 +1,469 @@
+"""
+Incremental (warm-start) training from new rows.
+
+A full training run also persists `incremental.json`: running statistics of
+the training rows (count, mean and sum of squared deviations per numeric
+column, category counts per categorical column). An incremental run reads
+only the new rows and:
+
+1. merges their statistics into the running ones (Chan et al. parallel
+   update), which gives the imputer means, scaler statistics, most frequent
+   categories and one-hot vocabularies a full refit on all rows would learn;
+2. re-expresses the current coefficients in the updated feature space
+   (rescaled numeric weights, zero weights for new categories), so the warm
+   model scores exactly like the previous one before any update;
+3. runs a few epochs of SGD with log loss over the new training rows,
+   starting from those coefficients, with the L2 penalty of the full
+   objective (`alpha = 1 / (C * total rows)`); the design matrix is CSR when
+   the base model's one-hot encoding was sparse.
+
+The result is a compiled-only model (no sklearn Pipeline), persisted in the
+compiled artifact format with the updated statistics. Optionally a full
+refit on the previous data plus the new rows is run as well, to report the
+time saved and the metric drift of the incremental model on the same
+holdout rows.
+"""
+
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+
+from ml.artifacts import INCREMENTAL_STATE_NAME, load_artifacts, load_json, save_compiled, save_json
+from ml.compiled import CompiledPipeline, compile_pipeline
+from ml.ingest import load_training_csv
+from ml.metrics import compute_classification_metrics
+from ml.pipeline import build_pipeline
+from ml.score import frame_to_arrays
+from ml.scoring import apply_threshold, positive_proba
+from ml.training import TrainingError, _StageTimer
+from ml.validation import merge_numeric_ranges, numeric_ranges
+
+# Inverse regularization strength of the LogisticRegression in `build_pipeline`
+C = 1.0
+EPOCHS = 5
+LEARNING_RATE = 0.01
+
+
+def fit_state(
+    X: pd.DataFrame,
+    numeric_features: List[str],
+    categorical_features: List[str]
+) -> Dict[str, Any]:
+    """
+    Running statistics of a batch of training rows.
+
+    Args:
+        X: Feature rows
+        numeric_features: Numeric columns
+        categorical_features: Categorical columns
+
+    Returns:
+        JSON-serializable state: rows, per-numeric count/mean/m2 (over the
+        non-missing values) and per-categorical category counts
+    """
+    numeric: Dict[str, Dict[str, float]] = {}
+    for name in numeric_features:
+        values = pd.to_numeric(X[name]).to_numpy(dtype=np.float64, na_value=np.nan)
+        observed = values[~np.isnan(values)]
+        mean = float(observed.mean()) if observed.size else 0.0
+        numeric[name] = {
+            "count": int(observed.size),
+            "mean": mean,
+            "m2": float(((observed - mean) ** 2).sum()),
+        }
+
+    categorical: Dict[str, Dict[str, int]] = {}
+    for name in categorical_features:
+        counts = X[name].astype(object).value_counts(dropna=True)
+        categorical[name] = {str(cat): int(n) for cat, n in counts.items()}
+
+    return {"rows": int(len(X)), "numeric": numeric, "categorical": categorical}
+
+
+def merge_state(state: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine the statistics of two disjoint row sets.
+
+    Returns:
+        New state equal to `fit_state` over the union of the rows
+    """
+    numeric = {}
+    for name, a in state["numeric"].items():
+        b = update["numeric"][name]
+        n = a["count"] + b["count"]
+        if n == 0:
+            numeric[name] = dict(a)
+            continue
+        delta = b["mean"] - a["mean"]
+        numeric[name] = {
+            "count": n,
+            "mean": a["mean"] + delta * b["count"] / n,
+            "m2": a["m2"] + b["m2"] + delta * delta * a["count"] * b["count"] / n,
+        }
+
+    categorical = {}
+    for name, counts in state["categorical"].items():
+        merged = dict(counts)
+        for cat, n in update["categorical"][name].items():
+            merged[cat] = merged.get(cat, 0) + n
+        categorical[name] = merged
+
+    return {"rows": state["rows"] + update["rows"], "numeric": numeric, "categorical": categorical}
+
+
+def preprocessing_from_state(
+    state: Dict[str, Any],
+    numeric_features: List[str],
+    categorical_features: List[str]
+) -> Dict[str, Any]:
+    """
+    Imputer, scaler and encoder parameters implied by running statistics.
+
+    Matches `build_pipeline`: mean imputation followed by StandardScaler (the
+    imputed values add no deviation, so the variance is m2 / rows),
+    most-frequent imputation (ties go to the smallest value) and sorted
+    one-hot categories.
+    """
+    rows = max(state["rows"], 1)
+    means = np.array([state["numeric"][n]["mean"] for n in numeric_features], dtype=np.float64)
+    var = np.array([state["numeric"][n]["m2"] / rows for n in numeric_features], dtype=np.float64)
+    scale = np.sqrt(var)
+    scale[scale == 0] = 1.0
+
+    categorical_fill = []
+    categories = []
+    for name in categorical_features:
+        counts = state["categorical"][name]
+        categories.append(np.array(sorted(counts), dtype=object))
+        categorical_fill.append(min(counts, key=lambda cat: (-counts[cat], cat)) if counts else None)
+
+    return {
+        "numeric_fill": means,
+        "mean": means,
+        "scale": scale,
+        "categorical_fill": categorical_fill,
+        "categories": categories,
+    }
+
+
+def warm_start(compiled: CompiledPipeline, preprocessing: Dict[str, Any]) -> CompiledPipeline:
+    """
+    Carry a model's coefficients over to updated preprocessing parameters.
+
+    Numeric weights are rescaled and the intercept shifted so that
+    w . (x - m_old) / s_old == w' . (x - m_new) / s_new + (b' - b); categories
+    keep their weight and new ones start at zero. Categories grouped as
+    infrequent get their own column, starting from the shared weight.
+    """
+    old_scale = compiled.scale
+    new_mean, new_scale = preprocessing["mean"], preprocessing["scale"]
+    coef_numeric = compiled.coef_numeric * new_scale / old_scale
+    intercept = compiled.intercept + float(np.sum(compiled.coef_numeric * (new_mean - compiled.mean) / old_scale))
+
+    coef_categorical = []
+    for j, cats in enumerate(preprocessing["categories"]):
+        index = compiled.category_index[j]
+        coef_categorical.extend(compiled.coef[index[cat]] if cat in index else 0.0 for cat in cats.tolist())
+
+    return CompiledPipeline(
+        numeric_features=compiled.numeric_features,
+        categorical_features=compiled.categorical_features,
+        coef=np.concatenate([coef_numeric, np.asarray(coef_categorical, dtype=np.float64)]),
+        intercept=intercept,
+        classes=compiled.classes,
+        **preprocessing
+    )
+
+
+def design_matrix(
+    compiled: CompiledPipeline,
+    arrays: Dict[str, np.ndarray],
+    sparse: bool = False
+) -> Union[np.ndarray, sp.csr_matrix]:
+    """
+    Transformed feature matrix (scaled numerics + one-hot columns).
+
+    Args:
+        compiled: Model whose preprocessing is applied
+        arrays: Validated feature columns
+        sparse: Return a CSR matrix (the model's one-hot encoding was sparse)
+
+    Returns:
+        Matrix of shape (rows, compiled.n_features_out)
+    """
+    n_rows, X_numeric, codes = compiled.transform(arrays)
+    n_out = compiled.n_features_out
+    if sparse:
+        blocks = [sp.csr_matrix(X_numeric)] if X_numeric is not None else []
+        if codes is not None:
+            n_numeric = X_numeric.shape[1] if X_numeric is not None else 0
+            # Unknown categories have no active column
+            known = codes != compiled.unknown_index
+            rows = np.broadcast_to(np.arange(n_rows)[:, None], codes.shape)[known]
+            onehot = sp.csr_matrix(
+                (np.ones(rows.size), (rows, codes[known] - n_numeric)), shape=(n_rows, n_out - n_numeric)
+            )
+            blocks.append(onehot)
+        return sp.hstack(blocks, format="csr")
+    # One spare column absorbs unknown categories (zero weight, dropped below)
+    X = np.zeros((n_rows, n_out + 1), dtype=np.float64)
+    if X_numeric is not None:
+        X[:, :X_numeric.shape[1]] = X_numeric
+    if codes is not None:
+        X[np.arange(n_rows)[:, None], codes] = 1.0
+    return X[:, :n_out]
+
+
+def update_model(
+    compiled: CompiledPipeline,
+    state: Dict[str, Any],
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    schema: Dict[str, Any],
+    epochs: int = EPOCHS,
+    learning_rate: float = LEARNING_RATE
+) -> Tuple[CompiledPipeline, Dict[str, Any]]:
+    """
+    Update a model with new rows only.
+
+    Args:
+        compiled: Current model
+        state: Running statistics of the rows the current model was trained on
+        X_new: New feature rows
+        y_new: New labels (must be among the model's classes)
+        schema: Feature schema of the current model
+        epochs: SGD passes over the new rows
+        learning_rate: Constant SGD step size
+
+    Returns:
+        Tuple (updated model, updated running statistics)
+
+    Raises:
+        TrainingError: If the new labels are not classes of the model
+    """
+    unknown_labels = set(pd.unique(y_new)) - set(compiled.classes.tolist())
+    if unknown_labels:
+        raise TrainingError(f"New rows have labels the model does not know: {sorted(map(str, unknown_labels))}")
+
+    new_state = merge_state(state, fit_state(X_new, compiled.numeric_features, compiled.categorical_features))
+    preprocessing = preprocessing_from_state(new_state, compiled.numeric_features, compiled.categorical_features)
+    warm = warm_start(compiled, preprocessing)
+
+    sparse = bool((schema.get("encoding") or {}).get("sparse"))
+    X = design_matrix(warm, frame_to_arrays(X_new, schema), sparse=sparse)
+    classifier = SGDClassifier(
+        loss="log_loss",
+        alpha=1.0 / (C * new_state["rows"]),
+        learning_rate="constant",
+        eta0=learning_rate,
+        random_state=42
+    )
+    classifier.coef_ = warm.coef.reshape(1, -1).copy()
+    classifier.intercept_ = np.array([warm.intercept])
+    y = np.asarray(y_new)
+    order = np.random.default_rng(42)
+    for _ in range(epochs):
+        # partial_fit keeps the coefficients set above (fit would reinitialize them)
+        rows = order.permutation(len(y))
+        classifier.partial_fit(X[rows], y[rows], classes=compiled.classes)
+
+    updated = CompiledPipeline(
+        numeric_features=warm.numeric_features,
+        categorical_features=warm.categorical_features,
+        coef=classifier.coef_[0],
+        intercept=float(classifier.intercept_[0]),
+        classes=compiled.classes,
+        **preprocessing
+    )
+    return updated, new_state
+
+
+def _load_base(base_artifacts_dir: Path) -> Tuple[CompiledPipeline, Dict[str, Any], Dict[str, Any]]:
+    artifacts = load_artifacts(base_artifacts_dir)
+    state_path = base_artifacts_dir / INCREMENTAL_STATE_NAME
+    if artifacts is None:
+        raise TrainingError("Base model artifacts not found")
+    if not state_path.exists():
+        raise TrainingError("Base model has no incremental state; train it with a full /train first")
+    compiled = artifacts["compiled"]
+    if compiled is None:
+        compiled = compile_pipeline(artifacts["pipeline"])
+    if compiled is None:
+        raise TrainingError("Only preprocessing + LogisticRegression models can be updated incrementally")
+    return compiled, artifacts, load_json(state_path)
+
+
+def _evaluate(compiled: CompiledPipeline, X: pd.DataFrame, y: pd.Series, schema, threshold: float):
+    proba = compiled.predict_proba(frame_to_arrays(X, schema))
+    return compute_classification_metrics(y, apply_threshold(proba, threshold, compiled.classes), proba)
+
+
+def _full_refit(
+    base_data_path: Path,
+    target: str,
+    schema: Dict[str, Any],
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    threshold: float
+) -> Tuple[float, Dict[str, Any]]:
+    # What /train would do: load the whole history and fit from scratch on it
+    # plus the new training rows; the new holdout rows stay unseen
+    started = time.perf_counter()
+    df, _ = load_training_csv(base_data_path, target)
+    X_full = pd.concat([df[schema["feature_names"]].astype(object), X_new.astype(object)], ignore_index=True)
+    y_full = pd.concat([df[target], y_new], ignore_index=True)
+    for name in schema["numeric_features"]:
+        X_full[name] = pd.to_numeric(X_full[name])
+    pipeline = build_pipeline(
+        schema["numeric_features"], schema["categorical_features"], encoding=schema.get("encoding")
+    )
+    pipeline.fit(X_full, y_full)
+    seconds = time.perf_counter() - started
+
+    proba = positive_proba(pipeline, X_test)
+    metrics = compute_classification_metrics(y_test, apply_threshold(proba, threshold, pipeline.classes_), proba)
+    return seconds, metrics
+
+
+def run_incremental_training(
+    data_path: str,
+    base_artifacts_dir: str,
+    test_size: float,
+    decision_threshold: Optional[float] = None,
+    artifacts_dir: Optional[str] = None,
+    progress: Optional[MutableMapping[str, Any]] = None,
+    version: Optional[str] = None,
+    base_version: Optional[str] = None,
+    base_data_path: Optional[str] = None,
+    epochs: int = EPOCHS
+) -> Dict[str, Any]:
+    """
+    Update a persisted model with the rows of a CSV file.
+
+    Args:
+        data_path: CSV with the new rows only (same columns as the base data)
+        base_artifacts_dir: Artifacts of the model to update
+        test_size: Fraction of the new rows held out for evaluation
+        decision_threshold: Positive-label threshold (defaults to the base model's)
+        artifacts_dir: Where the updated model is written
+        progress: Optional shared mapping updated with the current stage
+        version: Registry version ID of the updated model
+        base_version: Registry version ID of the base model (recorded in the schema)
+        base_data_path: Optional CSV the base model was trained on; when
+            given, a full refit on it plus the new training rows is timed and
+            evaluated on the same holdout rows
+        epochs: SGD passes over the new rows
+
+    Returns:
+        Same fields as `ml.training.run_training` (pipeline is None, compiled
+        is set) plus an "incremental" report
+
+    Raises:
+        TrainingError: If the base model or the new rows cannot be used
+    """
+    timer = _StageTimer(progress)
+    base_dir = Path(base_artifacts_dir)
+
+    timer.start("load")
+    compiled, base, state = _load_base(base_dir)
+    schema = base["schema"]
+    target = schema["target"]
+    threshold = base["threshold"] if decision_threshold is None else decision_threshold
+    try:
+        df, ingest = load_training_csv(Path(data_path), target)
+    except Exception as e:
+        raise TrainingError(f"Could not parse dataset: {str(e)}")
+    if target not in df.columns:
+        raise TrainingError(f"Target '{target}' not found in dataset. Available columns: {list(df.columns)}")
+    missing = [c for c in schema["feature_names"] if c not in df.columns]
+    if missing:
+        raise TrainingError(f"New rows are missing columns: {missing}")
+    timer.stop()
+
+    timer.start("split")
+    X = df[schema["feature_names"]]
+    X_train, X_test, y_train, y_test = train_test_split(X, df[target], test_size=test_size, random_state=42)
+    timer.stop()
+
+    timer.start("fit")
+    try:
+        updated, new_state = update_model(compiled, state, X_train, y_train, schema, epochs=epochs)
+    except ValueError as e:
+        raise TrainingError(f"Could not update model: {str(e)}")
+    timer.stop()
+
+    timer.start("evaluate")
+    metrics = _evaluate(updated, X_test, y_test, schema, threshold)
+    report: Dict[str, Any] = {
+        "base_version": base_version,
+        "rows_added": len(X_train),
+        "rows_held_out": len(X_test),
+        "total_training_rows": new_state["rows"],
+        "new_categories": {
+            name: sorted(set(new_state["categorical"][name]) - set(state["categorical"][name]))
+            for name in updated.categorical_features
+        },
+        "metrics_before": _evaluate(compiled, X_test, y_test, schema, threshold),
+    }
+    incremental_s = timer.timings["load"] + timer.timings["split"] + timer.timings["fit"]
+    if base_data_path is not None:
+        full_s, full_metrics = _full_refit(
+            Path(base_data_path), target, schema, X_train, y_train, X_test, y_test, threshold
+        )
+        report["comparison"] = {
+            "incremental_seconds": round(incremental_s, 4),
+            "full_refit_seconds": round(full_s, 4),
+            "time_saved_seconds": round(full_s - incremental_s, 4),
+            "speedup": round(full_s / incremental_s, 2) if incremental_s > 0 else None,
+            "full_refit_metrics": full_metrics,
+            "metric_drift": {
+                name: round(metrics[name] - full_metrics[name], 6)
+                for name in ("accuracy", "precision", "recall", "f1", "roc_auc")
+                if metrics.get(name) is not None and full_metrics.get(name) is not None
+            },
+        }
+    timer.stop()
+
+    timer.start("persist")
+    trained_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    new_schema = {**schema, "rows": schema.get("rows", 0) + len(df), "incremental_from": base_version}
+    if schema.get("numeric_ranges"):
+        new_schema["numeric_ranges"] = merge_numeric_ranges(
+            schema["numeric_ranges"], numeric_ranges(X_train, schema["numeric_features"])
+        )
+    feature_names = updated.feature_names_out()
+    out_dir = Path(artifacts_dir) if artifacts_dir is not None else base_dir
+    save_compiled(updated, out_dir, {
+        "feature_names": feature_names,
+        "schema": new_schema,
+        "metrics": metrics,
+        "trained_at": trained_at,
+        "decision_threshold": threshold,
+    })
+    save_json(out_dir / INCREMENTAL_STATE_NAME, new_state)
+    timer.stop()
+
+    return {
+        "pipeline": None,
+        "compiled": updated,
+        "feature_names": feature_names,
+        "metrics": metrics,
+        "schema": new_schema,
+        "trained_at": trained_at,
+        "threshold": threshold,
+        "version": version,
+        "artifact_formats": ["compiled"],
+        "rows": len(df),
+        "ingest": ingest,
+        "timings": timer.timings,
+        "incremental": report,
+    }
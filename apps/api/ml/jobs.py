@@ -0,0 +1,203 @@
+"""
+Background training jobs.
+
+Training runs in a separate process pool so a long `pipeline.fit` never ties
+up a serving worker. Each submitted job gets an ID whose state, current
+stage, per-stage timings and final metrics can be polled; when a job
+succeeds its model is installed into the model store by a completion hook.
+"""
+
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from ml.training import STAGES, TrainingError, run_training
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class TrainingJob:
+    """State of one training job."""
+
+    def __init__(self, job_id: str, params: Dict[str, Any], progress):
+        self.job_id = job_id
+        self.params = params
+        self.progress = progress
+        self.state = "queued"
+        self.created_at = _utc_now()
+        self.finished_at: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.error_is_client = False
+        # Resolved once the job is finished *and* its completion hook has run
+        self.completed: Future = Future()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status as a JSON-serializable dict."""
+        progress = dict(self.progress)
+        state = self.state
+        if state == "queued" and "started_at" in progress:
+            state = "running"
+        completed_stages = len(STAGES) if state == "succeeded" else progress.get("completed_stages", 0)
+
+        status: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "state": state,
+            "stage": progress.get("stage") if state == "running" else None,
+            "progress": round(completed_stages / len(STAGES), 2),
+            "target": self.params.get("target"),
+            "created_at": self.created_at,
+            "started_at": progress.get("started_at"),
+            "finished_at": self.finished_at,
+            "timings": progress.get("timings", {}),
+            "metrics": None,
+            "error": self.error,
+        }
+        if self.result is not None:
+            status["timings"] = self.result["timings"]
+            status["metrics"] = self.result["metrics"]
+            status["rows"] = self.result["rows"]
+            status["trained_at"] = self.result["trained_at"]
+            status["version"] = self.result["version"]
+            if "incremental" in self.result:
+                status["incremental"] = self.result["incremental"]
+        return status
+
+
+def _run_job(runner: Callable[..., Dict[str, Any]], params: Dict[str, Any], progress) -> Dict[str, Any]:
+    if progress is not None:
+        progress["started_at"] = _utc_now()
+    return runner(progress=progress, **params)
+
+
+class TrainingJobManager:
+    """Runs training jobs in a process pool and tracks their state."""
+
+    def __init__(self, max_workers: int = 1, max_jobs: int = 100):
+        """
+        Args:
+            max_workers: Concurrent training processes
+            max_jobs: Finished jobs kept for status queries (oldest dropped first)
+        """
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._context = multiprocessing.get_context("spawn")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TrainingJobManager":
+        """Configure from TRAIN_MAX_WORKERS (default 1)."""
+        return cls(max_workers=int(os.getenv("TRAIN_MAX_WORKERS", "1")))
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            # spawn: the serving process has threads, which fork does not copy safely
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+        if self._manager is None:
+            self._manager = self._context.Manager()
+
+    def submit(
+        self,
+        params: Dict[str, Any],
+        on_success: Callable[[TrainingJob, Dict[str, Any]], None],
+        on_finish: Optional[Callable[[TrainingJob], None]] = None,
+        runner: Callable[..., Dict[str, Any]] = run_training
+    ) -> TrainingJob:
+        """
+        Enqueue a training job.
+
+        Args:
+            params: Keyword arguments for `runner`
+            on_success: Called with the job and the runner's result once it
+                succeeded (installs the model); the job only reports the
+                result, and "succeeded", if this returns
+            on_finish: Called with the job after it finished either way
+                (cleanup); its errors never keep the job from resolving
+            runner: Module-level training function run in the pool (picklable);
+                `ml.training.run_training` or `ml.incremental.run_incremental_training`
+
+        Returns:
+            The queued TrainingJob
+        """
+        with self._lock:
+            self._ensure_started()
+            job = TrainingJob(uuid.uuid4().hex, params, self._manager.dict())
+            self._jobs[job.job_id] = job
+            self._evict()
+            try:
+                future = self._executor.submit(_run_job, runner, params, job.progress)
+            except BrokenProcessPool:
+                # A worker died since the last job: start a fresh pool
+                self._discard_executor(self._executor)
+                self._ensure_started()
+                future = self._executor.submit(_run_job, runner, params, job.progress)
+            executor = self._executor
+
+        def _done(fut: Future) -> None:
+            job.finished_at = _utc_now()
+            exc = fut.exception()
+            try:
+                if exc is None:
+                    result = fut.result()
+                    on_success(job, result)
+                    job.result = result
+                    job.state = "succeeded"
+                else:
+                    job.state = "failed"
+                    job.error = str(exc)
+                    job.error_is_client = isinstance(exc, TrainingError)
+                    if isinstance(exc, BrokenProcessPool):
+                        # Every later submit would fail too; the next one rebuilds the pool
+                        with self._lock:
+                            self._discard_executor(executor)
+            except Exception as install_exc:
+                job.state = "failed"
+                job.error = f"Could not install model: {install_exc}"
+            finally:
+                # Keep progress readable after the manager proxy is gone
+                try:
+                    job.progress = dict(job.progress)
+                except Exception:
+                    job.progress = {}
+                try:
+                    if on_finish is not None:
+                        on_finish(job)
+                finally:
+                    # Always resolve, or a synchronous /train would wait forever
+                    job.completed.set_result(job)
+
+        future.add_done_callback(_done)
+        return job
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        # Caller holds the lock; the pool may already have been replaced
+        if executor is not None and self._executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        finished = [j for j in self._jobs.values() if j.completed.done()]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0).job_id]
+
+    def shutdown(self) -> None:
+        """Stop the pool (waits for running jobs) and the progress manager."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
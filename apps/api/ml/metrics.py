@@ -1,52 +1,260 @@
 """
 Classification metrics computation module.
+
+Everything is derived with NumPy from two passes over the test rows:
+
+- one `bincount` builds the confusion matrix, from which accuracy,
+  precision, recall and F1 follow;
+- one sort of the scores gives cumulative true/false positive counts at
+  every distinct score, from which ROC-AUC (trapezoids, exact with ties) and
+  precision/recall at any set of thresholds follow.
+
+Bootstrap confidence intervals reuse both: confusion-matrix metrics are
+resampled as multinomial draws over the four cells, and ROC-AUC as resample
+weights accumulated along the same sort order. Results match the sklearn
+scorers with `zero_division=0`.
 """
 
-from typing import Dict, Any
+from typing import Any, Dict, Optional, Tuple
+
 import numpy as np
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, confusion_matrix
+
+# Bootstrap resamples and threshold curve points used for training reports
+BOOTSTRAP_RESAMPLES = 200
+CONFIDENCE_LEVEL = 0.95
+CURVE_POINTS = 101
+# Resample x row cells held at once by the ROC-AUC bootstrap
+_BOOTSTRAP_CHUNK_CELLS = 4_000_000
+
+
+def confusion_counts(y_true: np.ndarray, y_pred: np.ndarray, pos_label: Any = 1) -> np.ndarray:
+    """
+    Confusion matrix in one pass.
+
+    Returns:
+        Array [true_negatives, false_positives, false_negatives, true_positives]
+    """
+    actual = np.asarray(y_true) == pos_label
+    predicted = np.asarray(y_pred) == pos_label
+    return np.bincount(2 * actual + predicted, minlength=4)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # zero_division=0, like the sklearn scorers
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), 0.0)
+
+
+def rates_from_counts(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Accuracy, precision, recall and F1 from confusion counts.
+
+    Args:
+        counts: [..., 4] array of (tn, fp, fn, tp); leading axes (e.g.
+            bootstrap resamples) are kept
+
+    Returns:
+        Dictionary of arrays shaped like `counts[..., 0]`
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    tn, fp, fn, tp = counts[..., 0], counts[..., 1], counts[..., 2], counts[..., 3]
+    return {
+        "accuracy": _safe_divide(tp + tn, counts.sum(axis=-1)),
+        "precision": _safe_divide(tp, tp + fp),
+        "recall": _safe_divide(tp, tp + fn),
+        "f1": _safe_divide(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def ranked_counts(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    pos_label: Any = 1
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sort the scores once and count positives above each distinct score.
+
+    Returns:
+        Tuple (descending sort order, index of the last row of each group of
+        tied scores in that order, distinct scores in descending order,
+        cumulative positive counts at those group ends)
+    """
+    scores = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(-scores, kind="mergesort")
+    sorted_scores = scores[order]
+    group_ends = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(scores) - 1]
+    positives = np.cumsum(np.asarray(y_true)[order] == pos_label)[group_ends]
+    return order, group_ends, sorted_scores[group_ends], positives
+
+
+def _auc(tps: np.ndarray, fps: np.ndarray) -> np.ndarray:
+    """ROC-AUC from cumulative counts along the last axis (nan without both classes)."""
+    tps = np.asarray(tps, dtype=np.int64)
+    fps = np.asarray(fps, dtype=np.int64)
+    d_tps = np.diff(tps, axis=-1, prepend=0)
+    d_fps = np.diff(fps, axis=-1, prepend=0)
+    # Twice the trapezoid area under the (unnormalized) ROC curve, in integers
+    area = 2 * np.einsum("...i,...i->...", d_fps, tps) - np.einsum("...i,...i->...", d_fps, d_tps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return area / (2.0 * tps[..., -1] * fps[..., -1])
+
+
+def roc_auc(y_true: np.ndarray, y_score: np.ndarray, pos_label: Any = 1) -> Optional[float]:
+    """Sort-based ROC-AUC; None when `y_true` has a single class."""
+    _, group_ends, _, tps = ranked_counts(y_true, y_score, pos_label)
+    fps = group_ends + 1 - tps
+    if tps[-1] == 0 or fps[-1] == 0:
+        return None
+    return float(_auc(tps, fps))
+
+
+def threshold_curve(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    thresholds: Optional[np.ndarray] = None,
+    pos_label: Any = 1
+) -> Dict[str, list]:
+    """
+    Precision, recall, F1 and false positive rate at many thresholds, from one sort.
+
+    Args:
+        y_true: Ground truth labels
+        y_score: Positive-class probabilities
+        thresholds: Decision thresholds (rows with score >= threshold are
+            positive); default `CURVE_POINTS` evenly spaced in [0, 1]
+        pos_label: Positive label
+
+    Returns:
+        Dictionary of lists: thresholds, precision, recall, f1, fpr
+    """
+    if thresholds is None:
+        thresholds = np.linspace(0.0, 1.0, CURVE_POINTS)
+    # Rounded first so the reported thresholds are exactly the ones applied
+    thresholds = np.round(np.asarray(thresholds, dtype=np.float64), 6)
+    _, group_ends, distinct, tps = ranked_counts(y_true, y_score, pos_label)
+    fps = group_ends + 1 - tps
+
+    # Groups with score >= t form a prefix of the descending order
+    k = np.searchsorted(-distinct, -thresholds, side="right")
+    tp = np.where(k > 0, tps[np.maximum(k - 1, 0)], 0)
+    fp = np.where(k > 0, fps[np.maximum(k - 1, 0)], 0)
+    fn, tn = tps[-1] - tp, fps[-1] - fp
+    rates = rates_from_counts(np.stack([tn, fp, fn, tp], axis=-1))
+    return {
+        "thresholds": thresholds.tolist(),
+        "precision": np.round(rates["precision"], 6).tolist(),
+        "recall": np.round(rates["recall"], 6).tolist(),
+        "f1": np.round(rates["f1"], 6).tolist(),
+        "fpr": np.round(_safe_divide(fp, fp + tn), 6).tolist(),
+    }
+
+
+def bootstrap_intervals(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    y_score: Optional[np.ndarray] = None,
+    n_resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE_LEVEL,
+    pos_label: Any = 1,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """
+    Percentile bootstrap confidence intervals of the test metrics.
+
+    Resampling rows with replacement only changes how often each
+    (label, prediction) cell occurs, so the confusion-matrix metrics are
+    computed from multinomial draws over the four cells. ROC-AUC weights the
+    rows of the single score sort with each resample's row counts.
+
+    Args:
+        y_true: Ground truth labels
+        y_pred: Predicted labels
+        y_score: Positive-class probabilities (for ROC-AUC)
+        n_resamples: Bootstrap resamples
+        confidence: Two-sided confidence level
+        pos_label: Positive label
+        seed: Random seed
+
+    Returns:
+        Dictionary with level, resamples and a [low, high] pair per metric
+        (None where undefined, e.g. ROC-AUC without both classes)
+    """
+    rng = np.random.default_rng(seed)
+    counts = confusion_counts(y_true, y_pred, pos_label)
+    n_rows = int(counts.sum())
+    samples = rates_from_counts(rng.multinomial(n_rows, counts / max(n_rows, 1), size=n_resamples))
+
+    if y_score is not None:
+        order, group_ends, _, _ = ranked_counts(y_true, y_score, pos_label)
+        positive = (np.asarray(y_true) == pos_label)[order]
+        chunk = max(1, _BOOTSTRAP_CHUNK_CELLS // max(n_rows, 1))
+        aucs = []
+        for start in range(0, n_resamples, chunk):
+            size = min(chunk, n_resamples - start)
+            # Row counts of `size` resamples, in sorted order
+            drawn = rng.integers(0, n_rows, size=(size, n_rows)) + (np.arange(size) * n_rows)[:, None]
+            weights = np.bincount(drawn.ravel(), minlength=size * n_rows).reshape(size, n_rows)
+            rows_above = np.cumsum(weights, axis=1, dtype=np.int32)[:, group_ends]
+            weights *= positive
+            tps = np.cumsum(weights, axis=1, dtype=np.int32)[:, group_ends]
+            fps = rows_above - tps
+            aucs.append(_auc(tps, fps))
+        samples["roc_auc"] = np.concatenate(aucs)
+
+    alpha = (1.0 - confidence) / 2
+    intervals: Dict[str, Any] = {"level": confidence, "resamples": n_resamples}
+    for name, values in samples.items():
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            intervals[name] = None
+            continue
+        low, high = np.quantile(values, [alpha, 1.0 - alpha])
+        intervals[name] = [round(float(low), 6), round(float(high), 6)]
+    return intervals
 
 
 def compute_classification_metrics(
     y_true: np.ndarray,
     y_pred: np.ndarray,
-    y_proba: np.ndarray = None
+    y_proba: np.ndarray = None,
+    n_bootstrap: int = 0,
+    curve_points: int = 0
 ) -> Dict[str, Any]:
     """
     Compute classification metrics.
-    
+
     Args:
         y_true: Ground truth labels (binary: 0 or 1)
         y_pred: Predicted labels (0 or 1)
         y_proba: Predicted probabilities for class 1 (for ROC-AUC)
-    
+        n_bootstrap: Bootstrap resamples for `confidence_intervals` (0 = skip)
+        curve_points: Evenly spaced thresholds in [0, 1] for
+            `threshold_curve` (0 = skip; needs `y_proba`)
+
     Returns:
         Dictionary with metrics including accuracy, precision, recall, f1, roc_auc, confusion_matrix
+        (plus confidence_intervals and threshold_curve when requested)
     """
-    
-    metrics = {
-        "accuracy": float(accuracy_score(y_true, y_pred)),
-        "precision": float(precision_score(y_true, y_pred, zero_division=0)),
-        "recall": float(recall_score(y_true, y_pred, zero_division=0)),
-        "f1": float(f1_score(y_true, y_pred, zero_division=0)),
-    }
-    
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    counts = confusion_counts(y_true, y_pred)
+    metrics: Dict[str, Any] = {name: float(value) for name, value in rates_from_counts(counts).items()}
+
     # Add ROC-AUC if probabilities provided
-    if y_proba is not None:
-        try:
-            metrics["roc_auc"] = float(roc_auc_score(y_true, y_proba))
-        except Exception:
-            metrics["roc_auc"] = None
-    else:
-        metrics["roc_auc"] = None
-    
+    metrics["roc_auc"] = roc_auc(y_true, y_proba) if y_proba is not None else None
+
     # Confusion matrix as dict
-    cm = confusion_matrix(y_true, y_pred)
     metrics["confusion_matrix"] = {
-        "true_negatives": int(cm[0, 0]),
-        "false_positives": int(cm[0, 1]),
-        "false_negatives": int(cm[1, 0]),
-        "true_positives": int(cm[1, 1])
+        "true_negatives": int(counts[0]),
+        "false_positives": int(counts[1]),
+        "false_negatives": int(counts[2]),
+        "true_positives": int(counts[3])
     }
-    
+
+    if n_bootstrap > 0:
+        metrics["confidence_intervals"] = bootstrap_intervals(y_true, y_pred, y_proba, n_bootstrap)
+    if curve_points > 0 and y_proba is not None:
+        metrics["threshold_curve"] = threshold_curve(y_true, y_proba, np.linspace(0.0, 1.0, curve_points))
+
     return metrics
+
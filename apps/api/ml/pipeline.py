@@ -1,17 +1,86 @@
 """
 ML Pipeline module for tabular classification.
+
+The one-hot encoder outputs a dense matrix by default. Past
+`SPARSE_ONEHOT_WIDTH` one-hot columns (high-cardinality categoricals such as
+city or SKU) `resolve_encoding` switches to CSR output, so neither `fit` nor a
+per-request transform materializes an (n_rows, n_levels) dense matrix. Rare
+levels can be grouped into a single column with `min_frequency` /
+`max_categories`.
 """
 
+import os
+from typing import Optional
+
+import pandas as pd
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LogisticRegression
 
+# One-hot width above which the encoder switches to sparse output
+SPARSE_ONEHOT_WIDTH = int(os.getenv("SPARSE_ONEHOT_WIDTH", "512"))
+
+
+def onehot_width(
+    X: pd.DataFrame,
+    categorical_features: list,
+    max_categories: Optional[int] = None
+) -> int:
+    """
+    Number of one-hot columns the encoder would produce for `X`.
+
+    Args:
+        X: Training features
+        categorical_features: Categorical column names
+        max_categories: Per-column cap on output columns (rare-level grouping)
+
+    Returns:
+        Total one-hot width (an upper bound when `min_frequency` also applies)
+    """
+    width = 0
+    for name in categorical_features:
+        levels = int(X[name].nunique(dropna=True))
+        width += min(levels, max_categories) if max_categories else levels
+    return width
+
+
+def resolve_encoding(
+    X: pd.DataFrame,
+    categorical_features: list,
+    encoding: Optional[dict] = None
+) -> dict:
+    """
+    One-hot options for training on `X`.
+
+    Args:
+        X: Training features
+        categorical_features: Categorical column names
+        encoding: Requested options: `sparse` (None = choose by width),
+            `min_frequency`, `max_categories`
+
+    Returns:
+        Dictionary with sparse, min_frequency, max_categories (the
+        `build_pipeline` encoding) and onehot_width
+    """
+    encoding = encoding or {}
+    max_categories = encoding.get('max_categories')
+    width = onehot_width(X, categorical_features, max_categories)
+    sparse = encoding.get('sparse')
+    return {
+        'sparse': width > SPARSE_ONEHOT_WIDTH if sparse is None else bool(sparse),
+        'min_frequency': encoding.get('min_frequency'),
+        'max_categories': max_categories,
+        'onehot_width': width,
+    }
+
 
 def build_pipeline(
     numeric_features: list = None,
-    categorical_features: list = None
+    categorical_features: list = None,
+    classifier_params: dict = None,
+    encoding: dict = None
 ) -> Pipeline:
     """
     Build a sklearn Pipeline with preprocessing and LogisticRegression.
@@ -19,6 +88,14 @@ def build_pipeline(
     Args:
         numeric_features: List of numeric column names
         categorical_features: List of categorical column names
+        classifier_params: Extra LogisticRegression arguments (e.g. tuned C,
+            penalty, class_weight, solver)
+        encoding: One-hot options (see `resolve_encoding`): `sparse` keeps
+            the one-hot output and the transformed matrix in CSR format (the
+            numeric block is still imputed and scaled densely before being
+            stacked, so no scaler ever centers sparse columns);
+            `min_frequency` / `max_categories` group rare levels into one
+            infrequent column per feature
     
     Returns:
         Fitted sklearn Pipeline
@@ -29,6 +106,9 @@ def build_pipeline(
     
     if categorical_features is None:
         categorical_features = ['plan', 'region']
+
+    encoding = encoding or {}
+    sparse = bool(encoding.get('sparse', False))
     
     # Numeric preprocessing
     numeric_transformer = Pipeline(
@@ -42,23 +122,29 @@ def build_pipeline(
     categorical_transformer = Pipeline(
         steps=[
             ('imputer', SimpleImputer(strategy='most_frequent')),
-            ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+            ('onehot', OneHotEncoder(
+                handle_unknown='ignore',
+                sparse_output=sparse,
+                min_frequency=encoding.get('min_frequency'),
+                max_categories=encoding.get('max_categories')
+            ))
         ]
     )
     
-    # Combine preprocessors
+    # Combine preprocessors (sparse_threshold=1.0 keeps the stacked output CSR)
     preprocessor = ColumnTransformer(
         transformers=[
             ('num', numeric_transformer, numeric_features),
             ('cat', categorical_transformer, categorical_features)
-        ]
+        ],
+        sparse_threshold=1.0 if sparse else 0.0
     )
     
     # Build full pipeline
     pipeline = Pipeline(
         steps=[
             ('preprocessor', preprocessor),
-            ('classifier', LogisticRegression(max_iter=200, random_state=42))
+            ('classifier', LogisticRegression(max_iter=200, random_state=42, **(classifier_params or {})))
         ]
     )
     
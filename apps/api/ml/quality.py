@@ -0,0 +1,66 @@
+"""
+Data-quality counters for scored batches.
+
+With `DATA_QUALITY_CHECKS=1`, every validated /predict batch is checked by
+the model's `CompiledValidator` for categories the fitted one-hot encoder has
+never seen and numeric values outside the training range. Scoring is not
+affected: unknown categories still contribute nothing and out-of-range values
+are still scored. The counts are accumulated here and exposed at
+`/predict/quality` and `/metrics`, so drift shows up instead of being absorbed.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+ISSUES = ("out_of_vocabulary", "below_range", "above_range")
+
+
+class DataQualityMonitor:
+    """Thread-safe per-(issue, feature) counters of offending rows."""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Whether the predict path runs the quality checks
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self.rows = 0
+        self.batches = 0
+
+    @classmethod
+    def from_env(cls) -> "DataQualityMonitor":
+        """Configure from DATA_QUALITY_CHECKS."""
+        return cls(enabled=os.getenv("DATA_QUALITY_CHECKS", "0") == "1")
+
+    def config(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled}
+
+    def record(self, report: Dict[str, Dict[str, int]], rows: int) -> None:
+        """
+        Add one batch's report (from `CompiledValidator.quality`).
+
+        Args:
+            report: Offending rows per issue and feature
+            rows: Rows in the batch
+        """
+        with self._lock:
+            self.rows += rows
+            self.batches += 1
+            for issue, by_feature in report.items():
+                for feature, count in by_feature.items():
+                    self._counts[(issue, feature)] = self._counts.get((issue, feature), 0) + count
+
+    def counts(self) -> Dict[Tuple[str, str], int]:
+        """Copy of the (issue, feature) -> rows counters."""
+        with self._lock:
+            return dict(self._counts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters as a JSON-serializable dict, grouped by issue."""
+        issues: Dict[str, Dict[str, int]] = {issue: {} for issue in ISSUES}
+        for (issue, feature), count in sorted(self.counts().items()):
+            issues.setdefault(issue, {})[feature] = count
+        return {"rows": self.rows, "batches": self.batches, **issues}
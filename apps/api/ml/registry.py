@@ -0,0 +1,258 @@
+"""
+Multi-version model registry.
+
+Every trained model is persisted under `artifacts/models/<version>/` with the
+usual artifact files, and `artifacts/models/index.json` lists the versions
+with their metadata plus aliases such as "champion" -> version. Only the
+index is read at startup; pipelines are deserialized on first use and the
+`cache_size` most recently used ones are kept in memory.
+
+Several serving processes can share one registry: index updates are
+serialized with an exclusive lock on `index.lock` and re-read the index from
+disk first, and `reload_if_changed` lets each process pick up the versions
+and aliases written by the others.
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates are only serialized within the process
+    fcntl = None
+
+from ml.artifacts import ARTIFACTS_DIR, load_artifacts, load_json, save_json
+from ml.store import ModelSnapshot, build_snapshot
+
+REGISTRY_DIR = ARTIFACTS_DIR / "models"
+INDEX_NAME = "index.json"
+LOCK_NAME = "index.lock"
+CHAMPION = "champion"
+
+
+def new_version_id() -> str:
+    """Sortable, unique version ID such as 20250130T123456Z-3f2a1c."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-" + uuid.uuid4().hex[:6]
+
+
+class ModelRegistry:
+    """Versioned models on disk with an LRU of deserialized pipelines."""
+
+    def __init__(self, root: Path = REGISTRY_DIR, cache_size: int = 4):
+        """
+        Args:
+            root: Registry directory (holds index.json and one dir per version)
+            cache_size: Maximum number of deserialized models kept in memory
+        """
+        self.root = root
+        self.cache_size = max(1, cache_size)
+        self._index: Dict[str, Any] = {"versions": {}, "aliases": {}}
+        self._cache: "OrderedDict[str, ModelSnapshot]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._index_stamp: Optional[Tuple[int, int, int]] = None
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        """Configure from MODEL_CACHE_SIZE (default 4)."""
+        return cls(cache_size=int(os.getenv("MODEL_CACHE_SIZE", "4")))
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / INDEX_NAME
+
+    def version_dir(self, version: str) -> Path:
+        return self.root / version
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        # The index is replaced by rename, so a new inode means a new index
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load_index(self) -> None:
+        """Read index.json (no pipeline is deserialized)."""
+        with self._lock:
+            stamp = self._stamp()
+            if stamp is not None:
+                index = load_json(self.index_path)
+                self._index = {"versions": index.get("versions", {}), "aliases": index.get("aliases", {})}
+            self._index_stamp = stamp
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-read index.json if another process replaced it since the last read.
+
+        Returns:
+            True if the index was reloaded
+        """
+        with self._lock:
+            if self._stamp() == self._index_stamp:
+                return False
+            self.load_index()
+            return True
+
+    @contextmanager
+    def _index_file_lock(self) -> Iterator[None]:
+        # Serializes read-modify-write cycles of the index across processes
+        self.root.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.root / LOCK_NAME, "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write_index(self) -> None:
+        # Write-then-rename so readers of the file never see a partial index
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        save_json(tmp_path, self._index)
+        os.replace(tmp_path, self.index_path)
+        self._index_stamp = self._stamp()
+
+    def register(
+        self,
+        version: str,
+        schema: Dict[str, Any],
+        metrics: Dict[str, Any],
+        trained_at: str,
+        threshold: float,
+        alias: Optional[str] = CHAMPION
+    ) -> Dict[str, Any]:
+        """
+        Add a version (already persisted in `version_dir(version)`) to the index.
+
+        Args:
+            version: Version ID
+            schema: Feature schema of the model
+            metrics: Evaluation metrics
+            trained_at: ISO training timestamp
+            threshold: Stored decision threshold
+            alias: Alias pointed at the new version (None to leave aliases alone)
+
+        Returns:
+            The index entry of the version
+        """
+        entry = {
+            "version": version,
+            "target": schema.get("target"),
+            "rows": schema.get("rows"),
+            "trained_at": trained_at,
+            "decision_threshold": threshold,
+            "metrics": metrics,
+        }
+        with self._lock, self._index_file_lock():
+            # Another process may have registered versions since our last read
+            self.load_index()
+            self._index["versions"][version] = entry
+            if alias is not None:
+                self._index["aliases"][alias] = version
+            self._write_index()
+        return entry
+
+    def set_alias(self, alias: str, ref: str) -> str:
+        """
+        Point an alias at a version.
+
+        Raises:
+            KeyError: If `ref` is not a known version or alias
+        """
+        with self._lock, self._index_file_lock():
+            self.load_index()
+            version = self.resolve(ref)
+            self._index["aliases"][alias] = version
+            self._write_index()
+        return version
+
+    def resolve(self, ref: str) -> str:
+        """
+        Resolve an alias or version ID to a version ID.
+
+        Raises:
+            KeyError: If `ref` is neither a known alias nor a known version
+        """
+        index = self._index
+        version = index["aliases"].get(ref, ref)
+        if version not in index["versions"]:
+            raise KeyError(ref)
+        return version
+
+    def has(self, ref: str) -> bool:
+        try:
+            self.resolve(ref)
+        except KeyError:
+            return False
+        return True
+
+    def list_versions(self) -> Dict[str, Any]:
+        """Index contents: versions (newest first) with their aliases."""
+        with self._lock:
+            aliases = dict(self._index["aliases"])
+            versions: List[Dict[str, Any]] = []
+            for version, entry in sorted(self._index["versions"].items(), reverse=True):
+                versions.append({
+                    **entry,
+                    "aliases": sorted(a for a, v in aliases.items() if v == version),
+                    "loaded": version in self._cache,
+                })
+        return {"aliases": aliases, "cache_size": self.cache_size, "versions": versions}
+
+    def loaded_count(self) -> int:
+        """Number of versions currently deserialized in memory."""
+        return len(self._cache)
+
+    def get(self, ref: str) -> ModelSnapshot:
+        """
+        Snapshot of a version, deserializing it on a cache miss.
+
+        Raises:
+            KeyError: If `ref` is unknown or the version's artifacts are missing
+        """
+        with self._lock:
+            version = self.resolve(ref)
+            snapshot = self._cache.get(version)
+            if snapshot is not None:
+                self._cache.move_to_end(version)
+                return snapshot
+
+            artifacts = load_artifacts(self.version_dir(version))
+            if artifacts is None:
+                raise KeyError(ref)
+            snapshot = build_snapshot(version=version, **artifacts)
+            self.put(snapshot)
+            return snapshot
+
+    def put(self, snapshot: ModelSnapshot) -> None:
+        """Cache an already built snapshot (e.g. right after training)."""
+        with self._lock:
+            self._cache[snapshot.version] = snapshot
+            self._cache.move_to_end(snapshot.version)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def resolve_artifacts_dir(artifacts_dir: Path = ARTIFACTS_DIR, ref: str = CHAMPION) -> Path:
+    """
+    Directory holding the artifacts of `ref`.
+
+    Falls back to `artifacts_dir` itself (single-model layout) when it has no
+    registry index.
+
+    Raises:
+        KeyError: If the registry exists but `ref` is unknown
+    """
+    registry = ModelRegistry(artifacts_dir / REGISTRY_DIR.name)
+    if not registry.index_path.exists():
+        return artifacts_dir
+    registry.load_index()
+    return registry.version_dir(registry.resolve(ref))
@@ -0,0 +1,119 @@
+"""
+Serialization of /predict responses straight from the NumPy score arrays.
+
+Three layouts are offered:
+
+- `records` (default): `{"predictions": [{"label": ..., "probability": ...}]}`;
+- `columnar`: `{"labels": [...], "probabilities": [...]}`, one array per
+  field, serialized without building a dict per row;
+- `arrow`: an Arrow IPC stream with `label` and `probability` columns
+  (see `ml.arrow`, requires pyarrow).
+
+Bodies are rendered here instead of through the `PredictResponse` model, so
+no per-row validation happens. orjson is used when installed (its NumPy
+support writes the columnar arrays directly); otherwise `json.dumps` with the
+same output.
+"""
+
+import json
+from typing import List, Optional
+
+import numpy as np
+
+from ml.arrow import ARROW_STREAM, write_arrow_predictions
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+RECORDS = "records"
+COLUMNAR = "columnar"
+ARROW = "arrow"
+LAYOUTS = (RECORDS, COLUMNAR, ARROW)
+
+
+def negotiate_layout(format_param: Optional[str], accept: Optional[str], default: str = RECORDS) -> str:
+    """
+    Pick the response layout of a /predict call.
+
+    The `format` query parameter wins. Otherwise the Accept header decides:
+    the Arrow stream media type selects `arrow`, a `format` media type
+    parameter (`Accept: application/json; format=columnar`) selects that
+    layout, and a plain `application/json` selects `records`. Anything else
+    (no header, `*/*`) gets `default`.
+
+    Args:
+        format_param: Value of the `format` query parameter
+        accept: Accept header
+        default: Layout when neither names one (`arrow` for Arrow requests)
+
+    Returns:
+        One of LAYOUTS
+    """
+    if format_param in LAYOUTS:
+        return format_param
+    for media_range in (accept or "").split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        if media_type == ARROW_STREAM:
+            return ARROW
+        for param in params:
+            key, _, value = param.partition("=")
+            value = value.strip().strip('"')
+            if key.strip().lower() == "format" and value in (RECORDS, COLUMNAR):
+                return value
+        if media_type == "application/json":
+            return RECORDS
+    return default
+
+
+def media_type(layout: str) -> str:
+    """Content-Type of a response in `layout`."""
+    return ARROW_STREAM if layout == ARROW else "application/json"
+
+
+def _dumps(content) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+def _as_list(values: np.ndarray) -> List:
+    return np.asarray(values).tolist()
+
+
+def render_predictions(labels: np.ndarray, proba: np.ndarray, layout: str = RECORDS) -> bytes:
+    """
+    Body of a /predict response.
+
+    Args:
+        labels: Predicted labels
+        proba: Positive-class probabilities
+        layout: One of LAYOUTS
+
+    Returns:
+        UTF-8 JSON bytes, or an Arrow IPC stream for ARROW
+
+    Raises:
+        RuntimeError: ARROW without pyarrow installed
+    """
+    if layout == ARROW:
+        return write_arrow_predictions(labels, proba)
+    if layout == COLUMNAR:
+        labels = np.asarray(labels)
+        if ORJSON_AVAILABLE and labels.dtype.kind in "iub":
+            # Serialized from the array buffers, no Python objects per row
+            return orjson.dumps(
+                {"labels": np.ascontiguousarray(labels), "probabilities": np.ascontiguousarray(proba, dtype=np.float64)},
+                option=orjson.OPT_SERIALIZE_NUMPY
+            )
+        return _dumps({"labels": _as_list(labels), "probabilities": _as_list(proba)})
+
+    predictions = [
+        {"label": label, "probability": prob}
+        for label, prob in zip(_as_list(labels), _as_list(proba))
+    ]
+    return _dumps({"predictions": predictions})
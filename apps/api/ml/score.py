@@ -0,0 +1,226 @@
+"""
+Offline bulk scoring CLI.
+
+Scores a CSV or Parquet file with the persisted model without going through
+HTTP. The input is read in chunks, chunks are scored in a process pool (the
+model is loaded once per worker, memory-mapped where possible) and
+predictions are written to the output file in input order.
+
+Usage (from apps/api):
+    python -m ml.score data/customers.csv predictions.csv --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ml.artifacts import ARTIFACTS_DIR, load_artifacts
+from ml.compiled import compile_pipeline
+from ml.registry import CHAMPION, resolve_artifacts_dir
+from ml.scoring import apply_threshold, predict_proba_arrays
+
+# Per-process model state, populated by `_init_worker`
+_worker_model: Dict[str, Any] = {}
+
+
+def _init_worker(artifacts_dir: str, threshold: Optional[float]) -> None:
+    artifacts = load_artifacts(Path(artifacts_dir), mmap=True)
+    if artifacts is None:
+        raise RuntimeError(f"No trained model found in {artifacts_dir}")
+    if artifacts["compiled"] is None:
+        artifacts["compiled"] = compile_pipeline(artifacts["pipeline"])
+    if threshold is not None:
+        artifacts["threshold"] = threshold
+    _worker_model.clear()
+    _worker_model.update(artifacts)
+
+
+def frame_to_arrays(df: pd.DataFrame, schema: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Convert a DataFrame chunk into the column arrays used for scoring.
+
+    Extra columns (ids, target) are ignored.
+
+    Raises:
+        ValueError: If feature columns are missing or numeric columns do not parse
+    """
+    missing_cols = [f for f in schema["feature_names"] if f not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing columns: {missing_cols}. Expected: {schema['feature_names']}")
+
+    numeric_features = set(schema.get("numeric_features", []))
+    arrays: Dict[str, np.ndarray] = {}
+    for field in schema["feature_names"]:
+        column = df[field]
+        if field in numeric_features:
+            arrays[field] = pd.to_numeric(column, errors="raise").to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = column.to_numpy(dtype=object)
+            values[pd.isna(values)] = np.nan
+            arrays[field] = values
+    return arrays
+
+
+def score_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Score one chunk in a worker process; returns label/probability columns."""
+    schema = _worker_model["schema"]
+    proba, classes = predict_proba_arrays(_worker_model, frame_to_arrays(df, schema), schema["feature_names"])
+    labels = apply_threshold(proba, _worker_model["threshold"], classes)
+    return pd.DataFrame({"label": labels, "probability": proba}, index=df.index)
+
+
+def iter_input_chunks(path: Path, chunk_size: int, schema: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    """Read CSV or Parquet input in chunks of `chunk_size` rows."""
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is required to read Parquet files")
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+
+    # Categoricals are read as strings so numeric-looking levels keep their spelling
+    dtypes = {c: str for c in schema.get("categorical_features", [])}
+    yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtypes)
+
+
+class _OutputWriter:
+    """Appends prediction chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, predictions: pd.DataFrame) -> None:
+        if self.path.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(predictions, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+            return
+        predictions.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+        self._wrote_header = True
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(
+    input_path: Path,
+    output_path: Path,
+    artifacts_dir: Path = ARTIFACTS_DIR,
+    chunk_size: int = 100_000,
+    workers: Optional[int] = None,
+    threshold: Optional[float] = None,
+    model: str = CHAMPION
+) -> Dict[str, Any]:
+    """
+    Score a file with the persisted model.
+
+    Args:
+        input_path: CSV or Parquet file with the feature columns
+        output_path: CSV or Parquet file for label/probability columns
+        artifacts_dir: Artifacts directory (registry or single-model layout)
+        chunk_size: Rows per chunk sent to a worker
+        workers: Worker processes (defaults to the CPU count)
+        threshold: Optional override of the stored decision threshold
+        model: Registry version ID or alias
+
+    Returns:
+        Dictionary with rows, seconds, rows_per_sec and workers
+    """
+    workers = workers or os.cpu_count() or 1
+    try:
+        artifacts_dir = resolve_artifacts_dir(artifacts_dir, model)
+    except KeyError:
+        raise RuntimeError(f"Unknown model: {model}")
+    # Only the schema is needed here (workers load the model themselves); it
+    # lives in schema.json or, for compiled-only artifacts, in the manifest
+    artifacts = load_artifacts(artifacts_dir, mmap=True)
+    if artifacts is None:
+        raise RuntimeError(f"No trained model found in {artifacts_dir}")
+    schema = artifacts["schema"]
+    del artifacts
+
+    started = time.perf_counter()
+    rows = 0
+    writer = _OutputWriter(output_path)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(str(artifacts_dir), threshold)
+        ) as executor:
+            # Bounded window of in-flight chunks keeps memory flat and output ordered
+            in_flight: deque = deque()
+            for chunk in iter_input_chunks(input_path, chunk_size, schema):
+                in_flight.append(executor.submit(score_chunk, chunk))
+                if len(in_flight) >= 2 * workers:
+                    predictions = in_flight.popleft().result()
+                    writer.write(predictions)
+                    rows += len(predictions)
+            while in_flight:
+                predictions = in_flight.popleft().result()
+                writer.write(predictions)
+                rows += len(predictions)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "workers": workers,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file with the persisted model.")
+    parser.add_argument("input", type=Path, help="Input CSV or Parquet file")
+    parser.add_argument("output", type=Path, help="Output CSV or Parquet file")
+    parser.add_argument("--artifacts-dir", type=Path, default=ARTIFACTS_DIR, help="Directory with model artifacts")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk (default: 100000)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--threshold", type=float, default=None, help="Override the stored decision threshold")
+    parser.add_argument("--model", default=CHAMPION, help="Registry version ID or alias (default: champion)")
+    args = parser.parse_args(argv)
+
+    try:
+        report = score_file(
+            args.input,
+            args.output,
+            artifacts_dir=args.artifacts_dir,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            threshold=args.threshold,
+            model=args.model
+        )
+    except (RuntimeError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(
+        f"Scored {report['rows']} rows in {report['seconds']}s "
+        f"({report['rows_per_sec']} rows/sec, {report['workers']} workers) -> {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
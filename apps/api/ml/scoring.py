@@ -0,0 +1,126 @@
+"""
+Single-pass scoring helpers.
+
+Probabilities are computed once per batch and labels are derived from them
+with the model's decision threshold, instead of running the preprocessing
+chain twice through `predict` and `predict_proba`.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_THRESHOLD = 0.5
+
+
+def positive_proba(pipeline, X) -> np.ndarray:
+    """
+    Probability of the positive class from a fitted sklearn pipeline.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+        X: Input DataFrame
+
+    Returns:
+        1-D array with the probability of classes_[1]
+    """
+    return pipeline.predict_proba(X)[:, 1]
+
+
+def apply_threshold(
+    proba: np.ndarray,
+    threshold: float = DEFAULT_THRESHOLD,
+    classes: np.ndarray = None
+) -> np.ndarray:
+    """
+    Derive class labels from positive-class probabilities.
+
+    Args:
+        proba: Probability of the positive class
+        threshold: Decision threshold; rows with proba >= threshold are positive
+        classes: Class labels (negative first); defaults to [0, 1]
+
+    Returns:
+        Array of predicted labels
+    """
+    positive = (proba >= threshold).astype(np.intp)
+    if classes is None:
+        return positive
+    return np.asarray(classes)[positive]
+
+
+def model_classes(model_data: Dict) -> np.ndarray:
+    """Class labels of a stored model (negative class first)."""
+    compiled = model_data.get("compiled")
+    if compiled is not None:
+        return compiled.classes
+    return model_data["pipeline"].classes_
+
+
+def predict_proba_arrays(
+    model_data: Dict,
+    arrays: Dict[str, np.ndarray],
+    feature_names: List[str],
+    timer=None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positive-class probabilities for validated column arrays.
+
+    Args:
+        model_data: Model entry from the model store (pipeline, compiled)
+        arrays: Validated column arrays (see ml.validation.validate_columns)
+        feature_names: Column order expected by the pipeline
+        timer: Optional stage timer; `timer.mark(stage)` is called after the
+            dataframe (pipeline only), transform and model stages
+
+    Returns:
+        Tuple (probabilities, classes)
+    """
+    compiled = model_data.get("compiled")
+    if compiled is not None:
+        if timer is None:
+            return compiled.predict_proba(arrays), compiled.classes
+        transformed = compiled.transform(arrays)
+        timer.mark("transform")
+        proba = compiled.predict_proba_transformed(transformed)
+        timer.mark("model")
+        return proba, compiled.classes
+
+    pipeline = model_data["pipeline"]
+    X = pd.DataFrame(arrays, columns=feature_names)
+    if timer is None:
+        return positive_proba(pipeline, X), pipeline.classes_
+    timer.mark("dataframe")
+    Xt = pipeline[:-1].transform(X)
+    timer.mark("transform")
+    proba = pipeline[-1].predict_proba(Xt)[:, 1]
+    timer.mark("model")
+    return proba, pipeline.classes_
+
+
+def score_arrays(
+    model_data: Dict,
+    arrays: Dict[str, np.ndarray],
+    feature_names: List[str],
+    threshold: float = None,
+    timer=None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score validated column arrays with a stored model in one pass.
+
+    Args:
+        model_data: Model entry from the model store (pipeline, compiled, threshold)
+        arrays: Validated column arrays (see ml.validation.validate_columns)
+        feature_names: Column order expected by the pipeline
+        threshold: Optional override of the stored decision threshold
+        timer: Optional stage timer (see `predict_proba_arrays`)
+
+    Returns:
+        Tuple (labels, probabilities)
+    """
+    if threshold is None:
+        threshold = model_data.get("threshold", DEFAULT_THRESHOLD)
+
+    proba, classes = predict_proba_arrays(model_data, arrays, feature_names, timer)
+    return apply_threshold(proba, threshold, classes), proba
@@ -1,11 +1,172 @@
 """
 In-memory model store for trained pipelines.
 Singleton pattern for simplicity.
+
+The store holds a single immutable `ModelSnapshot`. Installing a model builds
+a new snapshot and replaces the reference in one assignment, so readers that
+grab the snapshot once per request always see a pipeline together with its
+own schema, feature names and threshold, without taking a lock.
+
+Responses that only change with the model (`/model/status`, `/explain`) are
+rendered to JSON bytes once, when the snapshot is built, together with an
+ETag derived from the model version and `trained_at`.
 """
 
-from typing import Optional, Dict, Any
+import hashlib
+import itertools
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime, timezone
 
+from ml.compiled import CompiledPipeline, compile_pipeline
+from ml.explain import coefficient_importance
+from ml.scoring import DEFAULT_THRESHOLD
+from ml.validation import CompiledValidator
+
+
+@dataclass(frozen=True)
+class RenderedPayload:
+    """A JSON response body rendered once per model, with its ETag."""
+
+    body: bytes
+    etag: str
+
+
+def render_json(content: Any) -> bytes:
+    """JSON bytes exactly as FastAPI's JSONResponse renders them."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def model_etag(version: Optional[str], trained_at: str) -> str:
+    """
+    Strong ETag of the responses derived from one model.
+
+    Built from the version and `trained_at` only (not the per-process
+    generation), so every worker serving the same model returns the same tag.
+    """
+    digest = hashlib.sha256(f"{version}|{trained_at}".encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """One installed model and everything needed to serve it."""
+
+    # None when served from compiled-only artifacts
+    pipeline: Any
+    compiled: Optional[CompiledPipeline]
+    feature_names: list
+    metrics: Dict[str, Any]
+    schema: Dict[str, Any]
+    trained_at: str
+    threshold: float
+    # Increases with every snapshot built; identifies it (batching, caches)
+    generation: int
+    # Registry version ID (None for models loaded from the legacy layout)
+    version: Optional[str] = None
+    # Pre-rendered /model/status and /explain bodies (see `build_snapshot`)
+    status_payload: Optional[RenderedPayload] = None
+    explain_payload: Optional[RenderedPayload] = None
+    # Why /explain is unavailable (classifier without coefficients)
+    explain_error: Optional[str] = None
+    # Request validator compiled from the schema and fitted vocabulary
+    validator: Optional[CompiledValidator] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Model fields as the dict returned by `get_model`."""
+        return {
+            "pipeline": self.pipeline,
+            "compiled": self.compiled,
+            "feature_names": self.feature_names,
+            "metrics": self.metrics,
+            "trained_at": self.trained_at,
+            "schema": self.schema,
+            "threshold": self.threshold,
+            "generation": self.generation,
+            "version": self.version,
+            "validator": self.validator
+        }
+
+
+_generations = itertools.count(1)
+
+
+def build_snapshot(
+    pipeline,
+    feature_names: list,
+    metrics: Dict[str, Any],
+    schema: Dict[str, Any],
+    trained_at: Optional[str] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    version: Optional[str] = None,
+    compiled: Optional[CompiledPipeline] = None
+) -> ModelSnapshot:
+    """
+    Build a snapshot (compiling the pipeline and its request validator and
+    rendering the status and explain responses) without publishing it.
+
+    Args:
+        pipeline: Trained sklearn Pipeline (None for compiled-only artifacts)
+        feature_names: List of feature names (post-preprocessing)
+        metrics: Dictionary with computed metrics
+        schema: Dictionary with feature info (names, dtypes, etc.)
+        trained_at: ISO timestamp (defaults to now)
+        threshold: Decision threshold applied to positive-class probabilities
+        version: Registry version ID
+        compiled: Already compiled model (compiled from `pipeline` if None)
+
+    Raises:
+        ValueError: If neither a pipeline nor a compiled model is given
+    """
+    if compiled is None:
+        if pipeline is None:
+            raise ValueError("A model needs a pipeline or a compiled engine")
+        compiled = compile_pipeline(pipeline)
+    trained_at = trained_at or (datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"))
+
+    # Polled responses are rendered here, once per model, not per request
+    etag = model_etag(version, trained_at)
+    info = schema or {}
+    status_payload = RenderedPayload(render_json({
+        "has_model": True,
+        "trained_at": trained_at,
+        "target": info.get("target"),
+        "rows": info.get("rows"),
+        "metrics": metrics,
+        "feature_names": info.get("feature_names"),
+        "numeric_features": info.get("numeric_features"),
+        "categorical_features": info.get("categorical_features"),
+        "decision_threshold": threshold
+    }), etag)
+    explain_payload = explain_error = None
+    try:
+        top_features = coefficient_importance(pipeline, compiled, feature_names)
+        explain_payload = RenderedPayload(
+            render_json({"method": "logreg_coefficients", "top_features": top_features}), etag
+        )
+    except ValueError as e:
+        explain_error = str(e)
+
+    return ModelSnapshot(
+        pipeline=pipeline,
+        compiled=compiled,
+        feature_names=feature_names,
+        metrics=metrics,
+        schema=schema,
+        trained_at=trained_at,
+        threshold=threshold,
+        generation=next(_generations),
+        version=version,
+        status_payload=status_payload,
+        explain_payload=explain_payload,
+        explain_error=explain_error,
+        validator=CompiledValidator.from_model(info, compiled, pipeline) if info.get("feature_names") else None
+    )
+
 
 class InMemoryModelStore:
     """Singleton store for trained models."""
@@ -21,12 +182,19 @@ class InMemoryModelStore:
     def __init__(self):
         """Initialize the store."""
         if not self._initialized:
-            self.pipeline = None
-            self.feature_names = None
-            self.metrics = None
-            self.trained_at = None
-            self.schema = None
+            self._snapshot: Optional[ModelSnapshot] = None
+            # Serializes writers only; readers never take it
+            self._write_lock = threading.Lock()
+            self._listeners: List[Callable[[Optional[ModelSnapshot]], None]] = []
             self._initialized = True
+
+    def add_listener(self, listener: Callable[[Optional[ModelSnapshot]], None]) -> None:
+        """Call `listener(snapshot)` after every install or clear (e.g. cache invalidation)."""
+        self._listeners.append(listener)
+
+    def _notify(self, snapshot: Optional[ModelSnapshot]) -> None:
+        for listener in self._listeners:
+            listener(snapshot)
     
     def set_model(
         self,
@@ -34,55 +202,80 @@ class InMemoryModelStore:
         feature_names: list,
         metrics: Dict[str, Any],
         schema: Dict[str, Any],
-        trained_at: Optional[str] = None
+        trained_at: Optional[str] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        compiled: Optional[CompiledPipeline] = None
     ) -> None:
         """
         Store a trained model.
+
+        The snapshot (including the compiled engine) is fully built before it
+        is published, so concurrent readers see either the old or the new
+        model, never a mix.
         
         Args:
-            pipeline: Trained sklearn Pipeline
+            pipeline: Trained sklearn Pipeline (None for compiled-only artifacts)
             feature_names: List of feature names (post-preprocessing)
             metrics: Dictionary with computed metrics
             schema: Dictionary with feature info (names, dtypes, etc.)
+            trained_at: ISO timestamp (defaults to now)
+            threshold: Decision threshold applied to positive-class probabilities
+            compiled: Already compiled model (e.g. memory-mapped artifacts)
+        """
+        self.install(build_snapshot(
+            pipeline, feature_names, metrics, schema, trained_at, threshold, compiled=compiled
+        ))
+
+    def install(self, snapshot: ModelSnapshot, only_if_empty: bool = False) -> bool:
         """
-        self.pipeline = pipeline
-        self.feature_names = feature_names
-        self.metrics = metrics
-        self.schema = schema
-        self.trained_at = trained_at or (datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"))
+        Publish a prebuilt snapshot.
+
+        Args:
+            snapshot: Snapshot from `build_snapshot`
+            only_if_empty: Skip if a model is already installed (lazy loads
+                must not replace a model installed meanwhile)
+
+        Returns:
+            True if the snapshot was published
+        """
+        with self._write_lock:
+            if only_if_empty and self._snapshot is not None:
+                return False
+            # Single reference swap: the publish point for readers
+            self._snapshot = snapshot
+        self._notify(snapshot)
+        return True
+
+    def snapshot(self) -> Optional[ModelSnapshot]:
+        """Current model snapshot, or None if no model is stored."""
+        return self._snapshot
     
     def get_model(self):
         """
         Retrieve the trained model.
         
         Returns:
-            Dictionary with pipeline, feature_names, metrics, trained_at, schema
+            Dictionary with pipeline, compiled, feature_names, metrics, trained_at,
+            schema, threshold, generation, version and validator, all from the
+            same snapshot
         
         Raises:
             ValueError: If no model has been trained yet
         """
-        if self.pipeline is None:
+        snapshot = self._snapshot
+        if snapshot is None:
             raise ValueError("No model trained yet. Call /train first.")
-        
-        return {
-            "pipeline": self.pipeline,
-            "feature_names": self.feature_names,
-            "metrics": self.metrics,
-            "trained_at": self.trained_at,
-            "schema": self.schema
-        }
+        return snapshot.as_dict()
     
     def has_model(self) -> bool:
         """Check if a model is stored."""
-        return self.pipeline is not None
+        return self._snapshot is not None
     
     def clear(self) -> None:
         """Clear the stored model."""
-        self.pipeline = None
-        self.feature_names = None
-        self.metrics = None
-        self.trained_at = None
-        self.schema = None
+        with self._write_lock:
+            self._snapshot = None
+        self._notify(None)
 
 
 # Global singleton instance
@@ -0,0 +1,197 @@
+"""
+Chunked parsing and formatting for streaming batch scoring.
+
+Request bodies (NDJSON or CSV) are consumed incrementally and split into
+fixed-size chunks of lines, so memory stays bounded by the chunk size rather
+than the size of the input.
+"""
+
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml.validation import CompiledValidator, check_column_names, coerce_text_columns
+
+# (physical 1-based line number, decoded line)
+NumberedLine = Tuple[int, str]
+
+
+def _decode_line(raw: bytes, line_no: int) -> str:
+    try:
+        return raw.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        raise ValueError(f"Line {line_no}: invalid UTF-8")
+
+
+async def read_first_line(body: AsyncIterator[bytes]) -> Tuple[str, bytes]:
+    """
+    Read the first line of a streamed body (e.g. a CSV header).
+
+    Args:
+        body: Async iterator over raw body bytes
+
+    Returns:
+        Tuple (decoded first line, bytes already read past it)
+
+    Raises:
+        ValueError: If the first line is not valid UTF-8
+    """
+    buffer = b""
+    async for part in body:
+        buffer += part
+        if b"\n" in buffer:
+            break
+    first, _, rest = buffer.partition(b"\n")
+    return _decode_line(first, 1), rest
+
+
+async def iter_line_chunks(
+    body: AsyncIterator[bytes],
+    chunk_size: int,
+    prefix: bytes = b"",
+    first_line_no: int = 1
+) -> AsyncIterator[List[NumberedLine]]:
+    """
+    Group the lines of a streamed body into lists of at most `chunk_size` lines.
+
+    Blank lines are skipped but still counted, so line numbers always refer
+    to physical lines of the body.
+
+    Args:
+        body: Async iterator over raw body bytes
+        chunk_size: Maximum number of lines per chunk
+        prefix: Bytes already read from the body (see `read_first_line`)
+        first_line_no: Physical line number of the first line in `prefix`
+
+    Yields:
+        Lists of (line number, decoded line) pairs
+
+    Raises:
+        ValueError: If a line is not valid UTF-8
+    """
+    buffer = prefix
+    line_no = first_line_no
+    lines: List[NumberedLine] = []
+
+    def take(raw: bytes) -> None:
+        nonlocal line_no
+        line = _decode_line(raw, line_no)
+        if line.strip():
+            lines.append((line_no, line))
+        line_no += 1
+
+    async for part in body:
+        buffer += part
+        *complete, buffer = buffer.split(b"\n")
+        for raw in complete:
+            take(raw)
+            if len(lines) >= chunk_size:
+                yield lines
+                lines = []
+    if buffer:
+        take(buffer)
+    if lines:
+        yield lines
+
+
+def parse_ndjson_chunk(
+    lines: List[NumberedLine],
+    schema: Dict[str, Any],
+    validator: Optional[CompiledValidator] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Parse and validate a chunk of NDJSON records.
+
+    Args:
+        lines: Numbered lines, one JSON object per line
+        schema: Model schema
+        validator: The model's compiled validator (built from `schema` if None)
+
+    Returns:
+        Validated column arrays
+
+    Raises:
+        ValueError: On malformed JSON or schema violations
+    """
+    records = []
+    for line_no, line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_no}: invalid JSON ({e.msg})")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_no}: expected a JSON object")
+        records.append(record)
+
+    return (validator or CompiledValidator(schema)).validate_records(records)
+
+
+def _check_closed_quotes(line: str, line_no: int) -> None:
+    # Chunks are split on physical lines, so a quoted field containing a
+    # newline would be cut in two; an odd number of quotes ("" escapes
+    # count twice) means a field is still open at the end of the line
+    if line.count('"') % 2:
+        raise ValueError(f"Line {line_no}: quoted fields spanning several lines are not supported")
+
+
+def parse_csv_header(line: str, schema: Dict[str, Any], validator: Optional[CompiledValidator] = None) -> List[str]:
+    """
+    Parse a CSV header line and check it against the schema.
+
+    Args:
+        line: First line of the body
+        schema: Model schema
+        validator: The model's compiled validator (built from `schema` if None)
+
+    Raises:
+        ValueError: If columns are missing or unexpected
+    """
+    _check_closed_quotes(line, 1)
+    header = next(csv.reader([line]), [])
+    check_column_names(header, schema, validator)
+    return header
+
+
+def parse_csv_chunk(
+    lines: List[NumberedLine],
+    header: List[str],
+    schema: Dict[str, Any],
+    validator: Optional[CompiledValidator] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Parse and validate a chunk of CSV rows (header given separately).
+
+    Args:
+        lines: Numbered CSV data lines
+        header: Column names from the first line of the body
+        schema: Model schema
+        validator: The model's compiled validator (built from `schema` if None)
+
+    Returns:
+        Validated column arrays
+
+    Raises:
+        ValueError: On ragged rows, quoted fields spanning lines or schema
+            violations
+    """
+    for line_no, line in lines:
+        _check_closed_quotes(line, line_no)
+    rows = list(csv.reader(line for _, line in lines))
+    for (line_no, _), row in zip(lines, rows):
+        if len(row) != len(header):
+            raise ValueError(f"Line {line_no}: expected {len(header)} fields, got {len(row)}")
+    columns = dict(zip(header, map(list, zip(*rows))))
+    return coerce_text_columns(columns, schema, validator)
+
+
+def format_ndjson_predictions(labels: np.ndarray, proba: np.ndarray) -> bytes:
+    """Serialize one {"label", "probability"} object per line."""
+    labels = labels.tolist()
+    # JSON-encode each distinct class once (bools, strings and ints alike)
+    encoded = {label: json.dumps(label) for label in set(labels)}
+    return "".join(
+        f'{{"label":{encoded[label]},"probability":{prob!r}}}\n'
+        for label, prob in zip(labels, proba.tolist())
+    ).encode("utf-8")
@@ -0,0 +1,182 @@
+"""
+Training run executed inside a worker process.
+
+`run_training` loads the dataset, splits it, fits the pipeline, evaluates it
+and persists the artifacts, recording the duration of each stage. It returns
+everything the API needs to install the model into the model store.
+"""
+
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, MutableMapping, Optional
+
+from sklearn.model_selection import train_test_split
+
+from ml.artifacts import ARTIFACTS_DIR, INCREMENTAL_STATE_NAME, save_json, save_model_artifacts
+from ml.ingest import load_training_csv
+from ml.metrics import BOOTSTRAP_RESAMPLES, CURVE_POINTS, compute_classification_metrics
+from ml.pipeline import build_pipeline, resolve_encoding
+from ml.scoring import apply_threshold, positive_proba
+from ml.tuning import classifier_params as classifier_params_for, tune
+from ml.validation import numeric_ranges
+
+STAGES = ("load", "split", "fit", "evaluate", "persist")
+
+
+class TrainingError(ValueError):
+    """Training failed because of the request or the data (reported as 400)."""
+
+
+class _StageTimer:
+    """Records per-stage durations and publishes the current stage."""
+
+    def __init__(self, progress: Optional[MutableMapping[str, Any]]):
+        self.progress = progress
+        self.timings: Dict[str, float] = {}
+
+    def start(self, stage: str) -> None:
+        self._stage = stage
+        self._started = time.perf_counter()
+        if self.progress is not None:
+            self.progress["stage"] = stage
+            self.progress["completed_stages"] = len(self.timings)
+
+    def stop(self) -> None:
+        self.timings[self._stage] = round(time.perf_counter() - self._started, 4)
+        if self.progress is not None:
+            self.progress["completed_stages"] = len(self.timings)
+            self.progress["timings"] = dict(self.timings)
+
+
+def run_training(
+    data_path: str,
+    target: str,
+    test_size: float,
+    decision_threshold: float,
+    artifacts_dir: str = str(ARTIFACTS_DIR),
+    progress: Optional[MutableMapping[str, Any]] = None,
+    version: Optional[str] = None,
+    tuning: Optional[Dict[str, Any]] = None,
+    encoding: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Train, evaluate and persist a model from a CSV file.
+
+    Args:
+        data_path: CSV dataset
+        target: Target column name
+        test_size: Fraction of rows held out for evaluation
+        decision_threshold: Probability threshold for the positive label
+        artifacts_dir: Directory where artifacts are written
+        progress: Optional shared mapping updated with the current stage
+        version: Registry version ID the artifacts are written for
+        tuning: Keyword arguments for `ml.tuning.tune`; when set, the
+            classifier hyperparameters are chosen by k-fold CV on the
+            training split and the search report is stored in the metrics
+        encoding: One-hot options (`sparse`, `min_frequency`,
+            `max_categories`); sparse output is chosen from the one-hot width
+            when not given. The resolved options are stored in the schema
+
+    Returns:
+        Dictionary with pipeline, feature_names, metrics, schema, trained_at,
+        threshold (model store fields) plus version, artifact_formats, rows,
+        ingest and timings
+
+    Raises:
+        TrainingError: If the dataset cannot be parsed or lacks the target
+    """
+    timer = _StageTimer(progress)
+
+    timer.start("load")
+    try:
+        df, ingest = load_training_csv(Path(data_path), target)
+    except Exception as e:
+        raise TrainingError(f"Could not parse dataset: {str(e)}")
+    if target not in df.columns:
+        raise TrainingError(f"Target '{target}' not found in dataset. Available columns: {list(df.columns)}")
+    timer.stop()
+
+    timer.start("split")
+    # Separate features and target
+    X = df.drop(columns=[target])
+    y = df[target]
+
+    # Store schema info
+    numeric_features = X.select_dtypes(include=['int64', 'int32', 'float64', 'float32']).columns.tolist()
+    categorical_features = X.select_dtypes(include=['object', 'category']).columns.tolist()
+    schema = {
+        "feature_names": list(X.columns),
+        "numeric_features": numeric_features,
+        "categorical_features": categorical_features,
+        "target": target,
+        "rows": len(df)
+    }
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=42
+    )
+    # Bounds the serving-time data-quality checks compare against
+    schema["numeric_ranges"] = numeric_ranges(X_train, numeric_features)
+    timer.stop()
+
+    timer.start("fit")
+    tuning_report = None
+    classifier_params = None
+    schema["encoding"] = resolve_encoding(X_train, categorical_features, encoding)
+    try:
+        if tuning is not None:
+            tuning_report = tune(
+                X_train, y_train, numeric_features, categorical_features,
+                encoding=schema["encoding"], **tuning
+            )
+            classifier_params = classifier_params_for(tuning_report["best_params"])
+        pipeline = build_pipeline(
+            numeric_features=numeric_features,
+            categorical_features=categorical_features,
+            classifier_params=classifier_params,
+            encoding=schema["encoding"]
+        )
+        pipeline.fit(X_train, y_train)
+    except ValueError as e:
+        raise TrainingError(f"Could not fit model: {str(e)}")
+    timer.stop()
+
+    timer.start("evaluate")
+    # One predict_proba pass, labels derived from the threshold
+    y_proba = positive_proba(pipeline, X_test)
+    y_pred = apply_threshold(y_proba, decision_threshold, pipeline.classes_)
+    metrics = compute_classification_metrics(
+        y_test, y_pred, y_proba, n_bootstrap=BOOTSTRAP_RESAMPLES, curve_points=CURVE_POINTS
+    )
+    if tuning_report is not None:
+        metrics["tuning"] = tuning_report
+    timer.stop()
+
+    timer.start("persist")
+    trained_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    formats = save_model_artifacts(
+        pipeline, Path(artifacts_dir), schema, metrics, trained_at, decision_threshold
+    )
+    # Running statistics of the training rows, the starting point of
+    # incremental updates (ml.incremental imports this module, hence the local import)
+    from ml.incremental import fit_state
+    save_json(
+        Path(artifacts_dir) / INCREMENTAL_STATE_NAME,
+        fit_state(X_train, numeric_features, categorical_features)
+    )
+    timer.stop()
+
+    return {
+        "pipeline": pipeline,
+        "feature_names": pipeline.named_steps["preprocessor"].get_feature_names_out().tolist(),
+        "metrics": metrics,
+        "schema": schema,
+        "trained_at": trained_at,
+        "threshold": decision_threshold,
+        "version": version,
+        "artifact_formats": list(formats),
+        "rows": len(df),
+        "ingest": ingest,
+        "timings": timer.timings,
+    }
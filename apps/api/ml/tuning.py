@@ -0,0 +1,291 @@
+"""
+Cross-validated hyperparameter search for the LogisticRegression classifier.
+
+Candidates from a grid over C / penalty / class_weight are scored with
+stratified k-fold CV. The preprocessor (imputers, scaler, one-hot encoder)
+does not depend on the candidate, so it is fitted once per fold and the
+transformed fold matrices are reused by every candidate; only the classifier
+is refitted. (candidate, fold) fits run in parallel on a loky process pool
+owned by the search: the fold matrices are sent to each worker once, and the
+pool is shut down when the search ends.
+
+With successive halving, every candidate is first scored on a small share of
+each fold's training rows; only the best 1/factor move on to the next rung,
+which uses factor times more rows, until the last rung uses all of them.
+"""
+
+import itertools
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import effective_n_jobs
+from joblib.externals.loky import ProcessPoolExecutor
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, log_loss, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.utils.fixes import parse_version
+
+from ml.pipeline import build_pipeline
+
+DEFAULT_GRID: Dict[str, List[Any]] = {
+    "C": [0.01, 0.1, 1.0, 10.0],
+    "penalty": ["l2"],
+    "class_weight": [None, "balanced"],
+}
+SCORINGS = ("roc_auc", "f1", "accuracy", "neg_log_loss")
+DEFAULT_FOLDS = 5
+HALVING_FACTOR = 3
+# Smallest per-fold training sample a halving rung may use
+MIN_RESOURCE_ROWS = 50
+# scikit-learn 1.8 deprecated `penalty` in favour of `l1_ratio`
+_L1_RATIO_API = parse_version(sklearn.__version__) >= parse_version("1.8")
+
+
+def n_jobs_from_env() -> int:
+    """Parallel fits, from TUNING_N_JOBS (default -1: all cores)."""
+    return int(os.getenv("TUNING_N_JOBS", "-1"))
+
+
+def expand_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """All combinations of a parameter grid, in a stable order."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def classifier_params(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """LogisticRegression keyword arguments for a candidate (solver follows the penalty)."""
+    params = dict(candidate)
+    penalty = params.pop("penalty", "l2")
+    params["solver"] = "liblinear" if penalty == "l1" else "lbfgs"
+    if _L1_RATIO_API:
+        params["l1_ratio"] = 1.0 if penalty == "l1" else 0.0
+    else:
+        params["penalty"] = penalty
+    return params
+
+
+def _score(scoring: str, classifier: LogisticRegression, X: np.ndarray, y: np.ndarray) -> float:
+    if scoring == "roc_auc":
+        return float(roc_auc_score(y, classifier.decision_function(X)))
+    if scoring == "neg_log_loss":
+        return -float(log_loss(y, classifier.predict_proba(X), labels=classifier.classes_))
+    y_pred = classifier.predict(X)
+    if scoring == "f1":
+        return float(f1_score(y, y_pred, pos_label=classifier.classes_[-1], zero_division=0))
+    return float(accuracy_score(y, y_pred))
+
+
+def prepare_folds(
+    X: pd.DataFrame,
+    y: pd.Series,
+    numeric_features: List[str],
+    categorical_features: List[str],
+    folds: int = DEFAULT_FOLDS,
+    encoding: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]], float]:
+    """
+    Fit the preprocessor once per fold and transform the fold's rows.
+
+    Args:
+        X: Training features
+        y: Training labels
+        numeric_features: Numeric columns
+        categorical_features: Categorical columns
+        folds: Number of CV folds
+        encoding: One-hot options for `build_pipeline` (sparse folds stay CSR)
+
+    Returns:
+        Tuple (list of (X_train, y_train, X_val, y_val) transformed matrices,
+        seconds spent preprocessing). Training rows are shuffled so that a
+        prefix is a random sample (used by successive halving).
+    """
+    started = time.perf_counter()
+    preprocessor = build_pipeline(
+        numeric_features, categorical_features, encoding=encoding
+    ).named_steps["preprocessor"]
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    rng = np.random.default_rng(42)
+    y_values = np.asarray(y)
+    cache = []
+    for train_idx, val_idx in splitter.split(X, y_values):
+        train_idx = rng.permutation(train_idx)
+        fold_preprocessor = clone(preprocessor)
+        X_train = fold_preprocessor.fit_transform(X.iloc[train_idx])
+        X_val = fold_preprocessor.transform(X.iloc[val_idx])
+        cache.append((X_train, y_values[train_idx], X_val, y_values[val_idx]))
+    return cache, time.perf_counter() - started
+
+
+def _fit_and_score(
+    candidate: Dict[str, Any],
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    scoring: str,
+    rows: int
+) -> Tuple[float, float]:
+    started = time.perf_counter()
+    classifier = LogisticRegression(max_iter=200, random_state=42, **classifier_params(candidate))
+    try:
+        classifier.fit(X_train[:rows], y_train[:rows])
+        score = _score(scoring, classifier, X_val, y_val)
+    except ValueError:
+        # e.g. a small halving sample with a single class: ranked last
+        score = float("nan")
+    return score, time.perf_counter() - started
+
+
+# Fold matrices of the search a pool worker serves (set by its initializer)
+_WORKER_FOLDS: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+
+
+def _init_worker(fold_cache: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]) -> None:
+    _WORKER_FOLDS[:] = fold_cache
+
+
+def _fit_and_score_fold(candidate: Dict[str, Any], fold: int, scoring: str, rows: int) -> Tuple[float, float]:
+    return _fit_and_score(candidate, *_WORKER_FOLDS[fold], scoring, rows)
+
+
+def halving_schedule(n_candidates: int, full_rows: int, factor: int, min_rows: int) -> List[int]:
+    """Per-fold training rows of each rung; the last rung uses all rows."""
+    rungs = 1 + int(math.floor(math.log(max(n_candidates, 1), factor))) if n_candidates > 1 else 1
+    schedule = [max(min_rows, full_rows // factor ** (rungs - 1 - i)) for i in range(rungs)]
+    schedule = [min(rows, full_rows) for rows in schedule]
+    # Rungs that would reuse the same sample size add nothing
+    return sorted(set(schedule))
+
+
+def tune(
+    X: pd.DataFrame,
+    y: pd.Series,
+    numeric_features: List[str],
+    categorical_features: List[str],
+    grid: Optional[Dict[str, Sequence[Any]]] = None,
+    folds: int = DEFAULT_FOLDS,
+    scoring: str = "roc_auc",
+    successive_halving: bool = False,
+    factor: int = HALVING_FACTOR,
+    n_jobs: Optional[int] = None,
+    encoding: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Search the grid with k-fold CV.
+
+    Args:
+        X: Training features
+        y: Training labels
+        numeric_features: Numeric columns
+        categorical_features: Categorical columns
+        grid: Parameter grid over C, penalty and class_weight (default `DEFAULT_GRID`)
+        folds: Number of CV folds
+        scoring: One of `SCORINGS` (higher is better)
+        successive_halving: Drop the weaker candidates on growing samples
+        factor: Halving factor (share of candidates kept per rung is 1/factor)
+        n_jobs: Parallel fits (default `n_jobs_from_env`)
+        encoding: One-hot options of the final pipeline
+
+    Returns:
+        JSON-serializable report: best_params, best_score, per-candidate
+        scores and timings (ranked), rungs and time spent
+
+    Raises:
+        ValueError: If the scoring is unknown or the grid is empty
+    """
+    if scoring not in SCORINGS:
+        raise ValueError(f"Unknown scoring '{scoring}'. Use one of {list(SCORINGS)}")
+    candidates = expand_grid(grid or DEFAULT_GRID)
+    if not candidates:
+        raise ValueError("Tuning grid has no candidates")
+    n_jobs = n_jobs_from_env() if n_jobs is None else n_jobs
+
+    started = time.perf_counter()
+    fold_cache, preprocess_seconds = prepare_folds(
+        X, y, numeric_features, categorical_features, folds, encoding
+    )
+    full_rows = min(len(fold[1]) for fold in fold_cache)
+    if successive_halving:
+        schedule = halving_schedule(len(candidates), full_rows, factor, MIN_RESOURCE_ROWS)
+    else:
+        schedule = [full_rows]
+
+    results: Dict[int, Dict[str, Any]] = {}
+    alive = list(range(len(candidates)))
+    rungs = []
+    # A pool of our own rather than joblib's process-global reusable executor:
+    # training runs in a long-lived worker process, and shutting the pool down
+    # releases its workers (and the fold matrices they hold) without touching
+    # executors anything else in the process may be using.
+    workers = min(effective_n_jobs(n_jobs), len(candidates) * folds)
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(fold_cache,))
+    try:
+        for rung, rows in enumerate(schedule):
+            tasks = [(c, fold) for c in alive for fold in range(folds)]
+            if executor is None:
+                outcomes = [_fit_and_score(candidates[c], *fold_cache[fold], scoring, rows) for c, fold in tasks]
+            else:
+                outcomes = list(executor.map(
+                    _fit_and_score_fold,
+                    [candidates[c] for c, _ in tasks],
+                    [fold for _, fold in tasks],
+                    [scoring] * len(tasks),
+                    [rows] * len(tasks),
+                ))
+            for position, c in enumerate(alive):
+                fold_outcomes = outcomes[position * folds:(position + 1) * folds]
+                scores = np.array([score for score, _ in fold_outcomes])
+                results[c] = {
+                    "params": candidates[c],
+                    "mean_score": float(np.mean(scores)) if not np.isnan(scores).any() else None,
+                    "std_score": float(np.std(scores)) if not np.isnan(scores).any() else None,
+                    "fold_scores": [None if np.isnan(s) else round(float(s), 6) for s in scores],
+                    "fit_seconds": round(sum(seconds for _, seconds in fold_outcomes), 4),
+                    "rung": rung,
+                    "train_rows_per_fold": rows,
+                }
+            rungs.append({"rung": rung, "train_rows_per_fold": rows, "candidates": len(alive)})
+            if rung < len(schedule) - 1:
+                ranked_ids = sorted(alive, key=lambda c: _sort_key(c, results[c]))
+                alive = ranked_ids[:max(1, math.ceil(len(alive) / factor))]
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    order = sorted(results, key=lambda c: (-results[c]["rung"],) + _sort_key(c, results[c]))
+    ranked = [results[c] for c in order]
+    for rank, result in enumerate(ranked, start=1):
+        result["rank"] = rank
+    best = ranked[0]
+    return {
+        "best_params": best["params"],
+        "best_score": best["mean_score"],
+        "scoring": scoring,
+        "folds": folds,
+        "n_candidates": len(candidates),
+        "successive_halving": successive_halving,
+        "rungs": rungs,
+        "preprocess_seconds": round(preprocess_seconds, 4),
+        "seconds": round(time.perf_counter() - started, 4),
+        "candidates": ranked,
+    }
+
+
+def _sort_key(index: int, result: Dict[str, Any]) -> Tuple[float, float, int]:
+    # Best mean first; failed candidates (None) last. Ties go to the stronger
+    # regularization (smaller C, the simpler model), then to grid order, so
+    # the ranking never depends on timings.
+    score = result["mean_score"]
+    return (
+        -score if score is not None else float("inf"),
+        float(result["params"].get("C", 1.0)),
+        index,
+    )
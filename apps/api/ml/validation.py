@@ -0,0 +1,393 @@
+"""
+Vectorized request validation for scoring.
+
+Incoming batches are validated column by column instead of record by record:
+each column is type-checked once and converted to a NumPy array, so the cost
+grows with the number of columns rather than rows x columns of Python work.
+`CompiledValidator` holds everything derived from a model's schema and is
+built once per model snapshot.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+_NONE_TYPE = type(None)
+NUMERIC_TYPES = frozenset({int, float, bool, _NONE_TYPE})
+CATEGORICAL_TYPES = frozenset({str, _NONE_TYPE})
+
+
+def _location(source: str, field: str, idx: int) -> str:
+    if source == "records":
+        return f"records[{idx}].{field}"
+    return f"{source}.{field}[{idx}]"
+
+
+def _invalid_positions(values: Sequence[Any], allowed: frozenset) -> List[int]:
+    """Slow path, only taken once a column is known to be invalid."""
+    return [idx for idx, value in enumerate(values) if type(value) not in allowed]
+
+
+def _fits_float(value: Any) -> bool:
+    try:
+        float(value if value is not None else 0.0)
+    except (OverflowError, TypeError, ValueError):
+        return False
+    return True
+
+
+def records_to_columns(
+    records: List[Dict[str, Any]],
+    feature_names: List[str]
+) -> Dict[str, List[Any]]:
+    """
+    Pivot row-oriented records into column lists.
+
+    Args:
+        records: List of records (dicts keyed by feature name)
+        feature_names: Expected feature names
+
+    Returns:
+        Dictionary mapping every column seen in the records to its values
+        (missing keys in a record become None)
+
+    Raises:
+        ValueError: If the records are not a list of objects
+    """
+    try:
+        seen = set().union(*records)
+    except TypeError as e:
+        raise ValueError(f"Invalid records format: {str(e)}")
+
+    # Keep expected columns first so downstream checks see a stable order
+    ordered = [f for f in feature_names if f in seen] + sorted(seen - set(feature_names), key=str)
+    return {name: [record.get(name) for record in records] for name in ordered}
+
+
+def check_column_names(
+    names: Sequence[str],
+    schema: Dict[str, Any],
+    validator: Optional["CompiledValidator"] = None
+) -> None:
+    """
+    Check that column names match the schema exactly.
+
+    Args:
+        names: Column names
+        schema: Model schema
+        validator: The model's compiled validator (built from `schema` if None)
+
+    Raises:
+        ValueError: If columns are missing or unexpected
+    """
+    (validator or CompiledValidator(schema)).check_column_names(names)
+
+
+def _check_columns(
+    columns: Dict[str, Sequence[Any]],
+    schema: Dict[str, Any],
+    validator: Optional["CompiledValidator"] = None
+) -> None:
+    """Check column names and lengths against the schema."""
+    (validator or CompiledValidator(schema)).check_columns(columns)
+
+
+def validate_columns(
+    columns: Dict[str, Sequence[Any]],
+    schema: Dict[str, Any],
+    source: str = "columns"
+) -> Dict[str, np.ndarray]:
+    """
+    Validate a columnar batch against the model schema.
+
+    Args:
+        columns: Mapping of column name to list of values
+        schema: Model schema (feature_names, numeric_features, categorical_features)
+        source: Name used to locate offending values in error messages
+            ("records" or "columns")
+
+    Returns:
+        Dictionary of validated NumPy arrays in schema["feature_names"] order
+        (float64 for numeric features, object for categorical features,
+        missing values as NaN)
+
+    Raises:
+        ValueError: If columns are missing/unexpected, have mismatched lengths
+            or contain values of the wrong type (or infinite numbers)
+    """
+    # Per-model callers use the validator cached on the model snapshot
+    return CompiledValidator(schema).validate(columns, source)
+
+
+def coerce_text_columns(
+    columns: Dict[str, Sequence[str]],
+    schema: Dict[str, Any],
+    validator: Optional["CompiledValidator"] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Convert text columns (e.g. parsed from CSV) into validated arrays.
+
+    Empty strings are treated as missing values.
+
+    Args:
+        columns: Mapping of column name to list of raw string values
+        schema: Model schema (feature_names, numeric_features, categorical_features)
+        validator: The model's compiled validator (built from `schema` if None)
+
+    Returns:
+        Dictionary of arrays in the same form as `validate_columns`
+
+    Raises:
+        ValueError: If columns are missing/unexpected or numeric values do not parse
+    """
+    _check_columns(columns, schema, validator)
+    numeric_features = set(schema.get("numeric_features", []))
+
+    arrays: Dict[str, np.ndarray] = {}
+    invalid_fields: List[str] = []
+    for field in schema["feature_names"]:
+        raw = np.array(columns[field], dtype=object)
+        empty = raw == ""
+        if field in numeric_features:
+            raw[empty] = "nan"
+            try:
+                arrays[field] = raw.astype(np.float64)
+            except ValueError as e:
+                invalid_fields.append(f"{field} must be numeric ({str(e)})")
+        else:
+            raw[empty] = np.nan
+            arrays[field] = raw
+
+    if invalid_fields:
+        raise ValueError("; ".join(invalid_fields))
+
+    return arrays
+
+
+def numeric_ranges(X, numeric_features: List[str]) -> Dict[str, List[Optional[float]]]:
+    """
+    Observed [min, max] of each numeric column, ignoring missing values.
+
+    Args:
+        X: Training feature DataFrame
+        numeric_features: Numeric columns
+
+    Returns:
+        JSON-serializable mapping name -> [min, max] ([None, None] when the
+        column has no values)
+    """
+    ranges: Dict[str, List[Optional[float]]] = {}
+    for name in numeric_features:
+        values = pd.to_numeric(X[name]).to_numpy(dtype=np.float64, na_value=np.nan)
+        observed = values[~np.isnan(values)]
+        ranges[name] = [float(observed.min()), float(observed.max())] if observed.size else [None, None]
+    return ranges
+
+
+def merge_numeric_ranges(
+    ranges: Dict[str, List[Optional[float]]],
+    update: Dict[str, List[Optional[float]]]
+) -> Dict[str, List[Optional[float]]]:
+    """Ranges covering the rows of both inputs (e.g. after an incremental update)."""
+    merged: Dict[str, List[Optional[float]]] = {}
+    for name, (lo, hi) in ranges.items():
+        new_lo, new_hi = update.get(name, [None, None])
+        lows = [v for v in (lo, new_lo) if v is not None]
+        highs = [v for v in (hi, new_hi) if v is not None]
+        merged[name] = [min(lows) if lows else None, max(highs) if highs else None]
+    return merged
+
+
+class CompiledValidator:
+    """
+    Request validation compiled once per model from its schema.
+
+    Column order, the expected name set and the kind of every column are
+    resolved at construction instead of on every request. The validator can
+    also report data-quality issues that scoring would otherwise absorb
+    silently: categories outside the fitted one-hot vocabulary (scored as
+    all-zero columns) and numeric values outside the training range
+    (`schema["numeric_ranges"]`).
+    """
+
+    def __init__(self, schema: Dict[str, Any], vocabulary: Optional[Dict[str, Sequence[Any]]] = None):
+        """
+        Args:
+            schema: Model schema (feature_names, numeric_features,
+                categorical_features, optional numeric_ranges)
+            vocabulary: Known categories per categorical column (None skips
+                the out-of-vocabulary check)
+        """
+        self.feature_names: List[str] = list(schema["feature_names"])
+        self._expected = frozenset(self.feature_names)
+        numeric = frozenset(schema.get("numeric_features", []))
+        categorical = frozenset(schema.get("categorical_features", []))
+        self._kinds = [
+            (name, "numeric" if name in numeric else "categorical" if name in categorical else "other")
+            for name in self.feature_names
+        ]
+
+        # A missing bound never flags a value
+        self.ranges: Dict[str, Tuple[float, float]] = {}
+        for name, (lo, hi) in (schema.get("numeric_ranges") or {}).items():
+            if name in numeric:
+                self.ranges[name] = (-np.inf if lo is None else lo, np.inf if hi is None else hi)
+
+        # pandas Index lookups: one hash-table probe per value, in C
+        self.vocabulary: Dict[str, pd.Index] = {
+            name: pd.Index(list(categories), dtype=object)
+            for name, categories in (vocabulary or {}).items()
+            if name in categorical
+        }
+
+    @classmethod
+    def from_model(cls, schema: Dict[str, Any], compiled=None, pipeline=None) -> "CompiledValidator":
+        """
+        Build the validator of a trained model.
+
+        The vocabulary is every category the fitted OneHotEncoder knows
+        (grouped infrequent ones included), read from the compiled engine or,
+        without one, from the pipeline's encoder.
+        """
+        vocabulary = None
+        if compiled is not None:
+            vocabulary = {
+                name: list(index) for name, index in zip(compiled.categorical_features, compiled.category_index)
+            }
+        elif pipeline is not None:
+            try:
+                preprocessor = pipeline.named_steps["preprocessor"]
+                encoder = preprocessor.named_transformers_["cat"].named_steps["onehot"]
+                columns = next(cols for name, _, cols in preprocessor.transformers_ if name == "cat")
+                vocabulary = {name: list(cats) for name, cats in zip(columns, encoder.categories_)}
+            except (AttributeError, KeyError, StopIteration):
+                vocabulary = None
+        return cls(schema, vocabulary)
+
+    def check_column_names(self, names: Sequence[str]) -> None:
+        """
+        Check that column names match the schema exactly.
+
+        Raises:
+            ValueError: If columns are missing or unexpected
+        """
+        present = set(names)
+        missing_cols = [f for f in self.feature_names if f not in present]
+        if missing_cols:
+            raise ValueError(f"Missing columns: {missing_cols}. Expected: {self.feature_names}")
+
+        extra_cols = [c for c in names if c not in self._expected]
+        if extra_cols:
+            raise ValueError(f"Unexpected columns: {extra_cols}. Expected: {self.feature_names}")
+
+    def check_columns(self, columns: Dict[str, Sequence[Any]]) -> None:
+        """
+        Check column names and lengths.
+
+        Raises:
+            ValueError: If columns are missing/unexpected, have mismatched
+                lengths or the batch is empty
+        """
+        self.check_column_names(list(columns))
+        lengths = {len(columns[f]) for f in self.feature_names}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, got lengths {sorted(lengths)}")
+        if lengths == {0}:
+            raise ValueError("Batch must contain at least one row")
+
+    def validate(self, columns: Dict[str, Sequence[Any]], source: str = "columns") -> Dict[str, np.ndarray]:
+        """
+        Validate a columnar batch; same contract as `validate_columns`.
+
+        Raises:
+            ValueError: If columns are missing/unexpected, have mismatched
+                lengths or contain values of the wrong type (or infinite numbers)
+        """
+        self.check_columns(columns)
+
+        arrays: Dict[str, np.ndarray] = {}
+        invalid_fields: List[str] = []
+        for field, kind in self._kinds:
+            values = columns[field]
+            types = set(map(type, values))
+
+            if kind == "numeric":
+                if not types <= NUMERIC_TYPES:
+                    invalid_fields.extend(
+                        f"{_location(source, field, idx)} must be numeric"
+                        for idx in _invalid_positions(values, NUMERIC_TYPES)
+                    )
+                    continue
+                try:
+                    arr = np.array(values, dtype=np.float64)
+                except (OverflowError, TypeError, ValueError):
+                    invalid_fields.extend(
+                        f"{_location(source, field, idx)} must be numeric"
+                        for idx, value in enumerate(values)
+                        if not _fits_float(value)
+                    )
+                    continue
+                infinite = np.isinf(arr)
+                if infinite.any():
+                    # JSON 1e999 arrives as inf; the model cannot score it
+                    invalid_fields.extend(
+                        f"{_location(source, field, int(idx))} must be finite"
+                        for idx in np.flatnonzero(infinite)
+                    )
+                    continue
+                arrays[field] = arr
+            elif kind == "categorical":
+                if not types <= CATEGORICAL_TYPES:
+                    invalid_fields.extend(
+                        f"{_location(source, field, idx)} must be string"
+                        for idx in _invalid_positions(values, CATEGORICAL_TYPES)
+                    )
+                    continue
+                arr = np.array(values, dtype=object)
+                if _NONE_TYPE in types:
+                    arr[arr == None] = np.nan  # noqa: E711 (elementwise comparison)
+                arrays[field] = arr
+            else:
+                arrays[field] = np.array(values, dtype=object)
+
+        if invalid_fields:
+            raise ValueError("; ".join(invalid_fields))
+
+        return arrays
+
+    def validate_records(self, records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Pivot and validate row-oriented records.
+
+        Raises:
+            ValueError: Same as `validate`, or if records are not objects
+        """
+        return self.validate(records_to_columns(records, self.feature_names), source="records")
+
+    def quality(self, arrays: Dict[str, np.ndarray]) -> Dict[str, Dict[str, int]]:
+        """
+        Data-quality issues of a validated batch.
+
+        Missing values are not counted: they are imputed as at training time.
+
+        Returns:
+            Dict with `out_of_vocabulary`, `below_range` and `above_range`,
+            each mapping a feature to its number of offending rows (features
+            without issues are left out)
+        """
+        report: Dict[str, Dict[str, int]] = {"out_of_vocabulary": {}, "below_range": {}, "above_range": {}}
+        for name, (lo, hi) in self.ranges.items():
+            values = arrays[name]
+            below = int(np.count_nonzero(values < lo))
+            above = int(np.count_nonzero(values > hi))
+            if below:
+                report["below_range"][name] = below
+            if above:
+                report["above_range"][name] = above
+        for name, known in self.vocabulary.items():
+            values = arrays[name]
+            unknown = int(np.count_nonzero((known.get_indexer(values) < 0) & ~pd.isna(values)))
+            if unknown:
+                report["out_of_vocabulary"][name] = unknown
+        return report
@@ -0,0 +1,288 @@
+"""
+Prometheus-style metrics for the API.
+
+A small in-process implementation of counters and histograms that renders
+the Prometheus text exposition format at `/metrics`. Observations are a dict
+lookup, a `bisect` and a few additions under a lock, so the per-request
+instrumentation cost stays in the low microseconds (see
+`benchmarks.instrumentation`). All durations are taken with
+`time.perf_counter`.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers sub-millisecond stages up to multi-minute training stages
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last = +Inf), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def observe_many(self, observations: Iterable[Tuple[float, LabelValues]]) -> None:
+        """Record several observations under a single lock acquisition."""
+        buckets = self.buckets
+        indexed = [(bisect.bisect_left(buckets, value), value, labels) for value, labels in observations]
+        with self._lock:
+            for index, value, labels in indexed:
+                series = self._series.get(labels)
+                if series is None:
+                    series = self._series[labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+                series[0][index] += 1
+                series[1] += value
+                series[2] += 1
+
+    def count(self, labels: LabelValues = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Register a callback returning ready-made exposition lines at scrape time."""
+        self._collectors.append(collector)
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def render_labeled_counts(
+    name: str,
+    help_text: str,
+    labelnames: Sequence[str],
+    counts: Dict[LabelValues, int]
+) -> List[str]:
+    """
+    Exposition lines for a counter kept elsewhere as counts per label values.
+
+    Args:
+        name: Metric name
+        help_text: HELP text
+        labelnames: Label names
+        counts: Count per tuple of label values (escaped on output)
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    lines += [
+        f"{name}{_format_labels(labelnames, labels)} {_format_value(count)}"
+        for labels, count in sorted(counts.items())
+    ]
+    return lines
+
+
+def render_bucket_counts(
+    name: str,
+    help_text: str,
+    bounds: Sequence[float],
+    counts: Sequence[int],
+    total: float
+) -> List[str]:
+    """
+    Exposition lines for a histogram kept elsewhere as per-bucket counts.
+
+    Args:
+        name: Metric name
+        help_text: HELP text
+        bounds: Upper bounds of the finite buckets
+        counts: Non-cumulative counts per bucket, the last one for +Inf
+        total: Sum of the observed values
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    cumulative = 0
+    for bound, n in zip(tuple(bounds) + (float("inf"),), counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{le="{_format_value(float(bound))}"}} {cumulative}')
+    lines.append(f"{name}_sum {_format_value(float(total))}")
+    lines.append(f"{name}_count {cumulative}")
+    return lines
+
+
+# perf_counter() at which the middleware received the current request
+_request_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_started", default=None)
+
+
+def mark_request_start() -> float:
+    """Record the start of the current request (called by the middleware)."""
+    started = time.perf_counter()
+    _request_started.set(started)
+    return started
+
+
+def request_started() -> Optional[float]:
+    """Start of the current request, if set by the middleware."""
+    return _request_started.get()
+
+
+class StageTimer:
+    """
+    Records consecutive stage durations into a histogram.
+
+    Marks are buffered and written with one `flush`, so a request pays for a
+    single lock acquisition however many stages it records.
+
+    Usage:
+        timer = StageTimer(histogram)
+        ...parse...
+        timer.mark("parse")
+        ...validate...
+        timer.mark("validate")
+        timer.flush()
+    """
+
+    __slots__ = ("histogram", "_last", "_marks")
+
+    def __init__(self, histogram: Histogram, start: Optional[float] = None):
+        self.histogram = histogram
+        self._last = time.perf_counter() if start is None else start
+        self._marks: List[Tuple[float, LabelValues]] = []
+
+    def mark(self, stage: str) -> None:
+        """Close the stage that started at the previous mark."""
+        now = time.perf_counter()
+        self._marks.append((now - self._last, (stage,)))
+        self._last = now
+
+    def flush(self) -> None:
+        """Write the buffered stage durations to the histogram."""
+        if self._marks:
+            self.histogram.observe_many(self._marks)
+            self._marks = []
+
+
+# Application metrics
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status.",
+    ("method", "route", "status")
+)
+PREDICT_STAGES = registry.histogram(
+    "predict_stage_duration_seconds",
+    "Time per /predict stage (parse, validate, dataframe, transform, model, serialize).",
+    ("stage",)
+)
+TRAIN_STAGES = registry.histogram(
+    "train_stage_duration_seconds", "Time per training stage (load, split, fit, evaluate, persist).", ("stage",)
+)
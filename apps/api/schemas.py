@@ -12,6 +12,7 @@ class ModelStatus(BaseModel):
     feature_names: Optional[List[str]] = Field(None, description="Original feature names")
     numeric_features: Optional[List[str]] = Field(None, description="Numeric feature names")
     categorical_features: Optional[List[str]] = Field(None, description="Categorical feature names")
+    decision_threshold: Optional[float] = Field(None, description="Probability threshold for the positive label")
 
     model_config = {
         "json_schema_extra": {
@@ -24,6 +25,7 @@ class ModelStatus(BaseModel):
                     "feature_names": ["age", "tenure_months", "monthly_spend", "support_tickets_last_90d", "plan", "region"],
                     "numeric_features": ["age", "tenure_months", "monthly_spend", "support_tickets_last_90d"],
                     "categorical_features": ["plan", "region"],
+                    "decision_threshold": 0.5,
                     "metrics": {
                         "accuracy": 0.875,
                         "precision": 0.86,
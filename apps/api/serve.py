@@ -0,0 +1,184 @@
+"""
+Pre-fork multi-worker server.
+
+`uvicorn --workers N` starts N fresh interpreters that each import the app
+and deserialize their own copy of the champion. This runner imports the app
+and installs the champion once in a master process, freezes the garbage
+collector's view of those objects (`gc.freeze`, so collections in the
+workers do not write to, and un-share, the model's pages), then forks N
+workers that serve on one shared listening socket. The model memory is
+shared copy-on-write between the workers.
+
+A model trained or promoted through any worker is written to the registry
+index (`artifacts/models/index.json`). That worker then sends SIGUSR1 to the
+master, which relays it to every worker; each one re-reads the index (see
+`main.sync_champion`) and installs the new champion right away. Workers also
+poll the index every `MODEL_WATCH_INTERVAL_S` seconds, which covers a lost
+signal and changes made by other processes.
+Models loaded after the fork are per worker; with the compiled artifact
+format their parameters are memory-mapped and still shared via the page
+cache.
+
+Training jobs and their status (`/train/jobs/{id}`) stay local to the worker
+that accepted them.
+
+Usage (from apps/api):
+    python serve.py --workers 4 --port 8000
+    WEB_CONCURRENCY=4 python serve.py
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+# A worker dying sooner than this after its start is restarted with a delay
+MIN_WORKER_UPTIME_S = 1.0
+# Tells the workers where to send champion notices (read by main.announce_champion)
+SERVE_MASTER_PID_ENV = "SERVE_MASTER_PID"
+
+
+def preload():
+    """
+    Import the app and install the champion before forking.
+
+    Returns:
+        The ASGI app, with the champion (if any) installed in its model store
+    """
+    import main
+    from ml.artifacts import load_artifacts
+    from ml.registry import CHAMPION
+
+    main.model_registry.load_index()
+    if main.model_registry.has(CHAMPION):
+        main.model_store.install(main.model_registry.get(CHAMPION))
+    else:
+        # Single-model layout from before the registry
+        artifacts = load_artifacts()
+        if artifacts is not None:
+            main.model_store.set_model(**artifacts)
+
+    # Threads do not survive fork: each worker's lifespan starts its own listener
+    main.access_logger.stop()
+
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket inherited by every worker."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Forks the workers, restarts the ones that die, relays SIGUSR1 and stops them on SIGINT/SIGTERM."""
+
+    def __init__(self, app, sock: socket.socket, workers: int, log_level: str = "warning"):
+        """
+        Args:
+            app: Preloaded ASGI app
+            sock: Bound listening socket
+            workers: Number of worker processes
+            log_level: uvicorn log level of the workers
+        """
+        self.app = app
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.log_level = log_level
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+
+    def _serve(self) -> None:
+        # In the forked worker: uvicorn installs its own SIGINT/SIGTERM handlers
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Champion notices arriving before the app's lifespan handles them
+        # must not kill the worker (SIGUSR1 terminates by default)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        config = uvicorn.Config(self.app, log_level=self.log_level, access_log=False, lifespan="on")
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def spawn(self) -> int:
+        """Fork one worker; returns its PID in the master."""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve()
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+        return pid
+
+    def _stop(self, signum, frame) -> None:
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _relay(self, signum, frame) -> None:
+        # A worker installed a new champion: tell every worker to re-check
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        """Supervise the workers until they have all exited after a stop signal."""
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGUSR1, self._relay)
+        os.environ[SERVE_MASTER_PID_ENV] = str(os.getpid())
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if self._stopping or started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"serve: worker {pid} exited with {code}, restarting", file=sys.stderr)
+            if time.monotonic() - started < MIN_WORKER_UPTIME_S:
+                time.sleep(MIN_WORKER_UPTIME_S)
+            if not self._stopping:
+                self.spawn()
+        return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one model.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Worker processes (default WEB_CONCURRENCY or 1)")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    sock = bind_socket(args.host, args.port)
+    app = preload()
+    return Supervisor(app, sock, args.workers, args.log_level).run()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
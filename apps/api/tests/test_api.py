@@ -3,8 +3,10 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict, Tuple
 import importlib.util
+import json
 import sys
 
+import numpy as np
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
@@ -74,6 +76,13 @@ def _get_record_and_target() -> Tuple[Dict[str, Any], str]:
     return record, target
 
 
+@pytest.fixture(scope="session", autouse=True)
+def scratch_registry(tmp_path_factory):
+    # Trained versions go to a scratch dir, not apps/api/artifacts/models
+    main.model_registry = main.ModelRegistry(tmp_path_factory.mktemp("models"))
+    return main.model_registry
+
+
 @pytest.fixture(scope="session")
 def demo_record_and_target() -> Tuple[Dict[str, Any], str]:
     return _get_record_and_target()
@@ -124,6 +133,10 @@ def test_predict_before_train_fails(demo_record_and_target):
 def test_train(trained_model):
     assert trained_model["status"] == "trained"
     assert isinstance(trained_model["metrics"], dict)
+    intervals = trained_model["metrics"]["confidence_intervals"]
+    low, high = intervals["accuracy"]
+    assert low <= trained_model["metrics"]["accuracy"] <= high
+    assert len(trained_model["metrics"]["threshold_curve"]["thresholds"]) == 101
 
 
 def test_predict(trained_model, demo_record_and_target):
@@ -156,3 +169,575 @@ def test_explain(trained_model):
     tf0 = data["top_features"][0]
     assert "feature" in tf0
     assert "weight" in tf0
+
+
+def test_explain_records_attributes_each_score(trained_model, demo_record_and_target):
+    record, _ = demo_record_and_target
+    records = [record, {**record, "plan": None}]
+    n_features = len(record)
+
+    resp = client.post("/explain/records", json={"records": records, "top_k": n_features})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    predictions = client.post("/predict", json={"records": records}).json()["predictions"]
+
+    assert data["method"] == "linear_contributions"
+    for explanation, prediction in zip(data["explanations"], predictions):
+        assert explanation["label"] == prediction["label"]
+        assert explanation["probability"] == pytest.approx(prediction["probability"], rel=1e-9)
+        assert sorted(explanation["features"]) == sorted(record)
+        magnitudes = [abs(c) for c in explanation["contributions"]]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        # Contributions plus the intercept give back the score
+        logit = np.log(prediction["probability"] / (1 - prediction["probability"]))
+        assert sum(explanation["contributions"]) + data["intercept"] == pytest.approx(logit, abs=1e-9)
+
+    top = client.post("/explain/records", json={"records": records, "top_k": 2}).json()["explanations"][0]
+    full = data["explanations"][0]
+    assert top["features"] == full["features"][:2]
+    assert client.post("/explain/records", json={"records": records, "top_k": 0}).status_code == 422
+
+
+def test_predict_columns_matches_records(trained_model, demo_record_and_target):
+    record, _ = demo_record_and_target
+    records = [record, {**record, "plan": None}]
+    columns = {k: [r[k] for r in records] for k in record}
+
+    resp_records = client.post("/predict", json={"records": records})
+    resp_columns = client.post("/predict", json={"columns": columns})
+    assert resp_records.status_code == 200, resp_records.text
+    assert resp_columns.status_code == 200, resp_columns.text
+    assert resp_columns.json() == resp_records.json()
+
+
+def test_predict_columnar_layout_matches_records(trained_model, demo_record_and_target, monkeypatch):
+    import ml.responses
+
+    record, _ = demo_record_and_target
+    records = [record, {**record, "plan": None}, {**record, "region": "mars"}]
+    expected = client.post("/predict", json={"records": records}).json()["predictions"]
+
+    by_query = client.post("/predict?format=columnar", json={"records": records})
+    by_accept = client.post(
+        "/predict", json={"records": records}, headers={"Accept": "application/json; format=columnar"}
+    )
+    for resp in (by_query, by_accept):
+        assert resp.status_code == 200, resp.text
+        assert resp.json() == {
+            "labels": [p["label"] for p in expected],
+            "probabilities": [p["probability"] for p in expected],
+        }
+    assert client.post("/predict?format=xml", json={"records": records}).status_code == 422
+
+    # Same bodies through the json.dumps fallback
+    monkeypatch.setattr(ml.responses, "ORJSON_AVAILABLE", False)
+    assert client.post("/predict", json={"records": records}).json()["predictions"] == expected
+    assert client.post("/predict?format=columnar", json={"records": records}).json() == by_query.json()
+
+
+def _arrow_stream(table) -> bytes:
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_predict_arrow_ipc_matches_json(trained_model, demo_record_and_target):
+    pa = pytest.importorskip("pyarrow")
+
+    record, _ = demo_record_and_target
+    records = [record, {**record, "plan": None}, {**record, "region": "mars"}]
+    numeric_field = next(k for k, v in record.items() if isinstance(v, (int, float)))
+    records.append({**record, numeric_field: None})
+    expected = client.post("/predict", json={"records": records}).json()["predictions"]
+
+    frame = pd.DataFrame(records)
+    categorical = [k for k, v in record.items() if isinstance(v, str)]
+    # Dictionary-encoded strings (pandas categoricals), split over two record batches
+    table = pa.Table.from_pandas(frame.astype({c: "category" for c in categorical}), preserve_index=False)
+    table = pa.concat_tables([table.slice(0, 2), table.slice(2)])
+    arrow_type = "application/vnd.apache.arrow.stream"
+
+    resp = client.post("/predict", content=_arrow_stream(table), headers={"Content-Type": arrow_type})
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"] == arrow_type
+    result = pa.ipc.open_stream(resp.content).read_all().to_pydict()
+    assert result["label"] == [p["label"] for p in expected]
+    assert result["probability"] == pytest.approx([p["probability"] for p in expected], rel=1e-12)
+
+    # JSON out for Arrow in, Arrow out for JSON in
+    as_json = client.post(
+        "/predict?format=records", content=_arrow_stream(table), headers={"Content-Type": arrow_type}
+    )
+    assert [p["label"] for p in as_json.json()["predictions"]] == result["label"]
+    as_arrow = client.post("/predict", json={"records": records}, headers={"Accept": arrow_type})
+    assert pa.ipc.open_stream(as_arrow.content).read_all().to_pydict()["label"] == result["label"]
+
+    wrong_type = table.set_column(
+        table.column_names.index(numeric_field), numeric_field, pa.array(["x"] * table.num_rows)
+    )
+    resp = client.post("/predict", content=_arrow_stream(wrong_type), headers={"Content-Type": arrow_type})
+    assert resp.status_code == 400
+    assert f"arrow.{numeric_field} must be numeric" in resp.json()["detail"]
+    resp = client.post("/predict", content=_arrow_stream(table.drop_columns([numeric_field])),
+                       headers={"Content-Type": arrow_type})
+    assert resp.status_code == 400
+    assert "Missing columns" in resp.json()["detail"]
+    assert client.post("/predict", content=b"not arrow", headers={"Content-Type": arrow_type}).status_code == 400
+
+
+def test_predict_columns_rejects_wrong_types(trained_model, demo_record_and_target):
+    record, _ = demo_record_and_target
+    numeric_field = next(k for k, v in record.items() if isinstance(v, (int, float)))
+    columns = {k: [v, v] for k, v in record.items()}
+    columns[numeric_field] = [record[numeric_field], "not-a-number"]
+
+    resp = client.post("/predict", json={"columns": columns})
+    assert resp.status_code == 400
+    assert f"columns.{numeric_field}[1] must be numeric" in resp.json()["detail"]
+
+
+def test_predict_requires_exactly_one_format(demo_record_and_target):
+    record, _ = demo_record_and_target
+    columns = {k: [v] for k, v in record.items()}
+    resp = client.post("/predict", json={"records": [record], "columns": columns})
+    assert resp.status_code == 422
+
+
+def test_predict_threshold_override(trained_model, demo_record_and_target):
+    record, _ = demo_record_and_target
+
+    low = client.post("/predict", json={"records": [record], "threshold": 0.01}).json()
+    high = client.post("/predict", json={"records": [record], "threshold": 0.99}).json()
+    assert low["predictions"][0]["probability"] == high["predictions"][0]["probability"]
+    assert low["predictions"][0]["label"] == 1
+    assert high["predictions"][0]["label"] == 0
+
+
+def test_model_status_reports_threshold(trained_model):
+    resp = client.get("/model/status")
+    assert resp.status_code == 200
+    assert resp.json()["decision_threshold"] == trained_model["decision_threshold"]
+
+
+def test_status_and_explain_revalidate_with_etag(trained_model):
+    status = client.get("/model/status")
+    etag = status.headers["etag"]
+    # The pre-rendered body validates against the declared response model
+    assert main.ModelStatus(**status.json()).model_dump() == status.json()
+
+    for path in ("/model/status", "/explain"):
+        assert client.get(path).headers["etag"] == etag
+        cached = client.get(path, headers={"If-None-Match": f'"stale", W/{etag}'})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    # A new model gets a new tag, the old one no longer matches
+    client.post("/train", json={"source": "demo", "target": trained_model["target"]}).raise_for_status()
+    try:
+        resp = client.get("/model/status", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etag
+    finally:
+        client.post(f"/models/{trained_model['version']}/promote").raise_for_status()
+    assert client.get("/model/status", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_predict_microbatching_matches_direct(trained_model, demo_record_and_target, monkeypatch):
+    import asyncio
+    import httpx
+
+    record, _ = demo_record_and_target
+    direct = client.post("/predict", json={"records": [record]}).json()
+
+    monkeypatch.setattr(main.predict_batcher, "enabled", True)
+    monkeypatch.setattr(main.predict_batcher, "window_ms", 20.0)
+
+    async def fire():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            responses = await asyncio.gather(*[
+                ac.post("/predict", json={"records": [record]}) for _ in range(8)
+            ])
+        await main.predict_batcher.stop()
+        return responses
+
+    before = main.predict_batcher.stats.batches
+    responses = asyncio.run(fire())
+    assert all(r.status_code == 200 for r in responses)
+    expected = direct["predictions"][0]
+    for r in responses:
+        pred = r.json()["predictions"][0]
+        assert pred["label"] == expected["label"]
+        # batch size changes BLAS summation order, so compare to rounding error
+        assert pred["probability"] == pytest.approx(expected["probability"], rel=1e-12)
+
+    stats = client.get("/predict/batching").json()["stats"]
+    assert stats["requests"] >= 8
+    assert stats["batches"] - before < 8
+
+
+def _assert_same_predictions(actual, expected):
+    assert [p["label"] for p in actual] == [p["label"] for p in expected]
+    # chunk size changes BLAS summation order, so compare to rounding error
+    assert [p["probability"] for p in actual] == pytest.approx(
+        [p["probability"] for p in expected], rel=1e-12
+    )
+
+
+def test_predict_stream_ndjson_and_csv(trained_model, demo_record_and_target):
+    import json
+
+    record, _ = demo_record_and_target
+    expected = client.post("/predict", json={"records": [record] * 5}).json()["predictions"]
+
+    body = "\n".join(json.dumps(record) for _ in range(5)) + "\n"
+    resp = client.post(
+        "/predict/stream?chunk_size=2",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200, resp.text
+    _assert_same_predictions([json.loads(line) for line in resp.text.splitlines()], expected)
+
+    header = ",".join(record)
+    row = ",".join(str(v) for v in record.values())
+    resp = client.post(
+        "/predict/stream?chunk_size=2",
+        content="\n".join([header] + [row] * 5),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert resp.status_code == 200, resp.text
+    _assert_same_predictions([json.loads(line) for line in resp.text.splitlines()], expected)
+
+
+def test_predict_stream_reports_bad_chunk(trained_model, demo_record_and_target):
+    import json
+
+    record, _ = demo_record_and_target
+    body = json.dumps(record) + "\n\n\n{not json}\n"
+    resp = client.post("/predict/stream?chunk_size=1", content=body)
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert "label" in lines[0]
+    assert lines[-1]["chunk_start_line"] == 4
+    assert "Line 4: invalid JSON" in lines[-1]["error"]
+
+
+def test_predict_stream_reports_invalid_utf8(trained_model, demo_record_and_target):
+    import json
+
+    record, _ = demo_record_and_target
+    body = (json.dumps(record) + "\n").encode("utf-8") + b"\xff\xfe\n"
+    resp = client.post("/predict/stream", content=body)
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert "invalid UTF-8" in lines[-1]["error"]
+    assert lines[-1]["chunk_start_line"] == 1
+
+
+def test_predict_stream_rejects_bad_csv_header(trained_model):
+    resp = client.post(
+        "/predict/stream",
+        content="foo,bar\n1,2\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert resp.status_code == 400
+    assert "Missing columns" in resp.json()["detail"]
+
+
+def test_predict_rejects_numeric_overflow(trained_model, demo_record_and_target):
+    record, _ = demo_record_and_target
+    numeric_field = next(k for k, v in record.items() if isinstance(v, (int, float)))
+    bad = {**record, numeric_field: 10 ** 400}
+
+    resp = client.post("/predict", json={"records": [record, bad]})
+    assert resp.status_code == 400
+    assert f"records[1].{numeric_field} must be numeric" in resp.json()["detail"]
+
+    # 1e999 parses as infinity
+    body = '{"records": [{%s}]}' % ", ".join(
+        f'"{k}": {"1e999" if k == numeric_field else json.dumps(v)}' for k, v in record.items()
+    )
+    resp = client.post("/predict", content=body, headers={"Content-Type": "application/json"})
+    assert resp.status_code == 400
+    assert f"records[0].{numeric_field} must be finite" in resp.json()["detail"]
+
+
+def test_train_upload(demo_record_and_target):
+    _, target = demo_record_and_target
+    csv_bytes = _demo_csv_path().read_bytes()
+
+    resp = client.post(
+        "/train/upload",
+        files={"file": ("churn.csv", csv_bytes, "text/csv")},
+        data={"target": target, "test_size": "0.25"},
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["status"] == "trained"
+    assert data["ingest"]["parse_seconds"] >= 0
+    assert set(data["ingest"]["dtypes"].values()) <= {"float32", "category"}
+
+
+def test_train_upload_unknown_target():
+    resp = client.post(
+        "/train/upload",
+        files={"file": ("churn.csv", _demo_csv_path().read_bytes(), "text/csv")},
+        data={"target": "does_not_exist"},
+    )
+    assert resp.status_code == 400
+    assert "not found" in resp.json()["detail"]
+
+
+def test_train_upload_validates_form_and_removes_temp_files(monkeypatch):
+    received = []
+    real_receive = main.receive_form
+
+    async def tracking_receive(*args, **kwargs):
+        fields, paths = await real_receive(*args, **kwargs)
+        received.extend(paths.values())
+        return fields, paths
+
+    monkeypatch.setattr(main, "receive_form", tracking_receive)
+    resp = client.post(
+        "/train/upload",
+        files={"file": ("churn.csv", _demo_csv_path().read_bytes(), "text/csv")},
+        data={"target": "churn", "test_size": "0.9"},
+    )
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["body", "test_size"]
+    assert received and not any(path.exists() for path in received)
+
+    resp = client.post("/train/upload", data={"target": "churn"}, files={"other": ("x.csv", b"a\n", "text/csv")})
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["body", "file"]
+
+    resp = client.post("/train/upload", json={"target": "churn"})
+    assert resp.status_code == 400
+
+
+def test_train_background_job(demo_record_and_target):
+    import time
+
+    _, target = demo_record_and_target
+    resp = client.post("/train", json={"source": "demo", "target": target, "background": True})
+    assert resp.status_code == 202, resp.text
+    job_id = resp.json()["job_id"]
+
+    deadline = time.monotonic() + 60
+    while True:
+        status = client.get(f"/train/jobs/{job_id}").json()
+        if status["state"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+
+    assert status["state"] == "succeeded", status
+    assert status["progress"] == 1.0
+    assert set(status["timings"]) == {"load", "split", "fit", "evaluate", "persist"}
+    assert status["metrics"]
+    assert client.get("/model/status").json()["trained_at"] == status["trained_at"]
+
+
+def test_train_job_unknown_id():
+    resp = client.get("/train/jobs/does-not-exist")
+    assert resp.status_code == 404
+
+
+def test_model_registry_versions(trained_model, demo_record_and_target):
+    record, target = demo_record_and_target
+    first = trained_model["version"]
+    second = client.post(
+        "/train", json={"source": "demo", "target": target, "decision_threshold": 0.9}
+    ).json()["version"]
+    assert second != first
+
+    listing = client.get("/models").json()
+    assert listing["aliases"]["champion"] == second
+    assert {first, second} <= {v["version"] for v in listing["versions"]}
+
+    by_id = client.post(f"/predict?model={first}", json={"records": [record], "threshold": 0.5}).json()
+    champion = client.post("/predict?model=champion", json={"records": [record], "threshold": 0.5}).json()
+    assert by_id["predictions"][0]["probability"] == pytest.approx(champion["predictions"][0]["probability"])
+    assert client.get("/model/status").json()["decision_threshold"] == 0.9
+
+    resp = client.post(f"/models/{first}/promote")
+    assert resp.status_code == 200
+    assert client.get("/model/status").json()["decision_threshold"] == trained_model["decision_threshold"]
+    # Promoted versions are served from the compiled artifacts (no pipeline)
+    assert client.get("/explain").status_code == 200
+
+    assert client.post("/predict?model=nope", json={"records": [record]}).status_code == 404
+    assert client.post("/models/nope/promote").status_code == 404
+
+    # A listed version whose artifacts are gone is a 404 too, and champion stays put
+    ghost = main.new_version_id()
+    main.model_registry.register(ghost, {"target": target}, {}, "2025-01-01T00:00:00Z", 0.5, alias=None)
+    assert client.post(f"/models/{ghost}/promote").status_code == 404
+    assert client.get("/models").json()["aliases"]["champion"] == first
+
+
+def test_sync_champion_follows_other_processes(trained_model, demo_record_and_target):
+    from ml.registry import ModelRegistry
+
+    _, target = demo_record_and_target
+    other = main.model_store.snapshot().version
+    served = client.post("/train", json={"source": "demo", "target": target}).json()["version"]
+    assert not main.sync_champion()
+
+    # Another worker promotes a version through its own registry instance
+    elsewhere = ModelRegistry(main.model_registry.root)
+    elsewhere.load_index()
+    elsewhere.set_alias("champion", other)
+    assert main.sync_champion()
+    assert main.model_store.snapshot().version == other
+    assert not main.sync_champion()
+
+    elsewhere.set_alias("champion", served)
+    assert main.sync_champion()
+
+
+@pytest.mark.skipif(main.CHAMPION_SIGNAL is None, reason="no SIGUSR1 on this platform")
+def test_promote_notifies_the_serve_master(trained_model, monkeypatch):
+    import os
+    import signal
+
+    received = []
+    previous = signal.signal(main.CHAMPION_SIGNAL, lambda signum, frame: received.append(signum))
+    try:
+        version = main.model_store.snapshot().version
+        # Not under serve.py: nobody to notify
+        monkeypatch.delenv(main.SERVE_MASTER_PID_ENV, raising=False)
+        assert client.post(f"/models/{version}/promote").status_code == 200
+        assert received == []
+
+        monkeypatch.setenv(main.SERVE_MASTER_PID_ENV, str(os.getpid()))
+        assert client.post(f"/models/{version}/promote").status_code == 200
+        assert received == [main.CHAMPION_SIGNAL]
+    finally:
+        signal.signal(main.CHAMPION_SIGNAL, previous)
+
+
+def test_predict_cache_hits_and_invalidation(trained_model, demo_record_and_target, monkeypatch):
+    record, _ = demo_record_and_target
+    monkeypatch.setattr(main.prediction_cache, "enabled", True)
+    main.prediction_cache.clear()
+    before = main.prediction_cache.stats()
+
+    other = {**record, "plan": None}
+    first = client.post("/predict", json={"records": [record, other]}).json()
+    second = client.post("/predict", json={"records": [other, record, record]}).json()
+    assert second["predictions"] == [first["predictions"][1], first["predictions"][0], first["predictions"][0]]
+
+    stats = client.get("/predict/cache").json()["stats"]
+    assert stats["misses"] - before["misses"] == 2
+    assert stats["hits"] - before["hits"] == 3
+
+    # Installing a model empties the cache
+    main.model_store.install(main.model_store.snapshot())
+    assert client.get("/predict/cache").json()["stats"]["entries"] == 0
+
+
+def test_predict_data_quality_counters(trained_model, demo_record_and_target, monkeypatch):
+    record, _ = demo_record_and_target
+    monkeypatch.setattr(main, "data_quality", main.DataQualityMonitor(enabled=True))
+    ranges = main.model_store.snapshot().schema["numeric_ranges"]
+    assert set(ranges) == {"age", "tenure_months", "monthly_spend", "support_tickets_last_90d"}
+
+    odd = {**record, "region": "mars", "age": ranges["age"][1] + 100, "plan": None}
+    resp = client.post("/predict", json={"records": [record, odd, odd]})
+    assert resp.status_code == 200
+
+    body = client.get("/predict/quality").json()
+    assert body["config"] == {"enabled": True}
+    stats = body["stats"]
+    assert (stats["rows"], stats["batches"]) == (3, 1)
+    assert stats["out_of_vocabulary"] == {"region": 2}
+    assert stats["above_range"] == {"age": 2}
+    assert stats["below_range"] == {}
+
+    text = client.get("/metrics").text
+    assert "predict_data_quality_rows_total 3" in text
+    assert 'predict_data_quality_issues_total{issue="out_of_vocabulary",feature="region"} 2' in text
+
+
+def test_metrics_endpoint(trained_model, demo_record_and_target):
+    record, _ = demo_record_and_target
+    client.post("/predict", json={"records": [record]})
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert 'http_requests_total{method="POST",route="/predict",status="200"}' in text
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/predict",status="200",le="+Inf"}' in text
+    for stage in ("parse", "validate", "transform", "model", "serialize"):
+        assert f'predict_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'train_stage_duration_seconds_count{stage="fit"}' in text
+    assert "model_loaded 1" in text
+    assert "access_log_dropped_records_total 0" in text
+    assert 'predict_batch_rows_bucket{le="+Inf"}' in text
+
+
+def test_train_incremental_updates_champion(trained_model, demo_record_and_target):
+    record, target = demo_record_and_target
+    data = (API_ROOT / "data" / "demo_churn.csv").read_bytes()
+    resp = client.post(
+        "/train/incremental",
+        files={"file": ("new.csv", data, "text/csv"), "base_file": ("base.csv", data, "text/csv")},
+        data={"model": trained_model["version"]},
+    )
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    report = body["incremental"]
+    assert report["base_version"] == trained_model["version"]
+    assert report["rows_added"] + report["rows_held_out"] == body["rows"]
+    assert set(report["comparison"]["metric_drift"]) >= {"accuracy", "f1"}
+    assert report["comparison"]["full_refit_seconds"] > 0
+
+    assert client.get("/models").json()["aliases"]["champion"] == body["version"]
+    pred = client.post("/predict", json={"records": [record]})
+    assert pred.status_code == 200, pred.text
+
+    assert client.post("/train/incremental", files={"file": ("new.csv", data, "text/csv")},
+                       data={"model": "nope"}).status_code == 404
+
+
+def test_train_with_tuning_records_candidates(demo_record_and_target):
+    _, target = demo_record_and_target
+    tuning = {
+        "grid": {"C": [0.1, 1.0], "penalty": ["l1", "l2"], "class_weight": [None]},
+        "folds": 3,
+        "successive_halving": True,
+        "n_jobs": 2,
+    }
+    resp = client.post("/train", json={"source": "demo", "target": target, "tuning": tuning})
+    assert resp.status_code == 200, resp.text
+    report = resp.json()["metrics"]["tuning"]
+    assert report["n_candidates"] == 4 and report["folds"] == 3
+    assert len(report["rungs"]) == 2 and report["rungs"][-1]["candidates"] == 2
+    best = report["candidates"][0]
+    assert best["rank"] == 1 and best["params"] == report["best_params"]
+    assert len(best["fold_scores"]) == 3 and best["fit_seconds"] >= 0
+    assert client.get("/model/status").json()["metrics"]["tuning"]["best_params"] == report["best_params"]
+
+    bad = client.post("/train", json={"source": "demo", "target": target, "tuning": {"grid": {"C": [-1]}}})
+    assert bad.status_code == 422
+
+
+def test_train_with_sparse_grouped_encoding(demo_record_and_target):
+    record, target = demo_record_and_target
+    encoding = {"sparse": True, "min_frequency": 30}
+    resp = client.post("/train", json={"source": "demo", "target": target, "encoding": encoding})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["encoding"]["sparse"] is True
+    assert resp.json()["encoding"]["min_frequency"] == 30
+
+    pred = client.post("/predict", json={"records": [record, {**record, "plan": "unheard_of"}]})
+    assert pred.status_code == 200, pred.text
+
+    bad = client.post("/train", json={"source": "demo", "target": target, "encoding": {"max_categories": 1}})
+    assert bad.status_code == 422
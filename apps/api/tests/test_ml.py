@@ -0,0 +1,729 @@
+from __future__ import annotations
+
+from pathlib import Path
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+API_ROOT = Path(__file__).resolve().parents[1]
+if str(API_ROOT) not in sys.path:
+    sys.path.insert(0, str(API_ROOT))
+
+from ml.compiled import CompiledPipeline, compile_pipeline  # noqa: E402
+from ml.pipeline import build_pipeline  # noqa: E402
+from ml.scoring import DEFAULT_THRESHOLD, apply_threshold  # noqa: E402
+from ml.validation import CompiledValidator, numeric_ranges, validate_columns  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def demo_df() -> pd.DataFrame:
+    return pd.read_csv(API_ROOT / "data" / "demo_churn.csv")
+
+
+@pytest.fixture(scope="module")
+def fitted(demo_df):
+    X = demo_df.drop(columns=["churn"])
+    y = demo_df["churn"]
+    pipeline = build_pipeline()
+    pipeline.fit(X, y)
+    schema = {
+        "feature_names": list(X.columns),
+        "numeric_features": ["age", "tenure_months", "monthly_spend", "support_tickets_last_90d"],
+        "categorical_features": ["plan", "region"],
+    }
+    return pipeline, schema, X
+
+
+def _with_gaps(X: pd.DataFrame) -> pd.DataFrame:
+    X = X.copy().astype(object)
+    X.iloc[0, 0] = None           # missing numeric
+    X.loc[X.index[1], "plan"] = None      # missing categorical
+    X.loc[X.index[2], "region"] = "mars"  # unknown category
+    return X
+
+
+def test_compiled_rejects_infinity_like_pipeline(fitted):
+    pipeline, schema, X = fitted
+    X = _with_gaps(X)
+    columns = {c: X[c].tolist() for c in X.columns}
+    arrays = validate_columns(columns, schema)
+
+    # Validation refuses infinity (JSON 1e999); both engines do too when handed it directly
+    columns[X.columns[1]][3] = float("inf")
+    with pytest.raises(ValueError, match=rf"columns\.{X.columns[1]}\[3\] must be finite"):
+        validate_columns(columns, schema)
+    arrays[X.columns[1]][3] = np.inf
+
+    with pytest.raises(ValueError, match="infinity"):
+        pipeline.predict_proba(pd.DataFrame(arrays, columns=schema["feature_names"]))
+    with pytest.raises(ValueError, match="infinity"):
+        CompiledPipeline.from_pipeline(pipeline).predict_proba(arrays)
+
+
+def test_compiled_matches_pipeline(fitted):
+    pipeline, schema, X = fitted
+    X = _with_gaps(X)
+    columns = {c: X[c].tolist() for c in X.columns}
+    arrays = validate_columns(columns, schema)
+
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+    expected_df = pd.DataFrame(arrays, columns=schema["feature_names"])
+
+    np.testing.assert_allclose(
+        compiled.predict_proba(arrays),
+        pipeline.predict_proba(expected_df)[:, 1],
+        rtol=1e-12, atol=1e-12
+    )
+    labels = apply_threshold(compiled.predict_proba(arrays), DEFAULT_THRESHOLD, compiled.classes)
+    np.testing.assert_array_equal(labels, pipeline.predict(expected_df))
+
+
+def test_record_contributions_aggregate_onehot_terms(fitted):
+    from ml.explain import record_contributions, top_k_indices
+
+    pipeline, schema, X = fitted
+    X = _with_gaps(X)
+    arrays = validate_columns({c: X[c].tolist() for c in X.columns}, schema)
+    expected_df = pd.DataFrame(arrays, columns=schema["feature_names"])
+    # Reversed schema order: columns must follow the requested feature order
+    feature_names = schema["feature_names"][::-1]
+
+    result = record_contributions(CompiledPipeline.from_pipeline(pipeline), arrays, feature_names)
+    terms = pipeline[:-1].transform(expected_df) * pipeline[-1].coef_[0]
+    names_out = pipeline[:-1].get_feature_names_out()
+    for j, name in enumerate(feature_names):
+        columns = [i for i, out in enumerate(names_out) if out == f"num__{name}" or out.startswith(f"cat__{name}_")]
+        np.testing.assert_allclose(result["contributions"][:, j], terms[:, columns].sum(axis=1), atol=1e-12)
+    np.testing.assert_allclose(result["proba"], pipeline.predict_proba(expected_df)[:, 1], rtol=1e-12)
+
+    top = top_k_indices(result["contributions"], 3)
+    full = np.argsort(-np.abs(result["contributions"]), axis=1, kind="stable")
+    np.testing.assert_array_equal(
+        np.abs(np.take_along_axis(result["contributions"], top, axis=1)),
+        np.abs(np.take_along_axis(result["contributions"], full[:, :3], axis=1))
+    )
+
+
+def test_compile_unsupported_pipeline_returns_none(fitted):
+    from sklearn.pipeline import Pipeline
+    from sklearn.tree import DecisionTreeClassifier
+
+    pipeline, _, X = fitted
+    other = Pipeline(steps=[
+        ("preprocessor", pipeline.named_steps["preprocessor"]),
+        ("classifier", DecisionTreeClassifier()),
+    ])
+    assert compile_pipeline(other) is None
+
+
+def test_sparse_grouped_encoding_compiles_and_roundtrips(tmp_path):
+    import scipy.sparse as sp
+
+    from benchmarks.datasets import make_churn_frame
+    from ml.artifacts import load_artifacts, save_model_artifacts
+    from ml.pipeline import SPARSE_ONEHOT_WIDTH, resolve_encoding
+
+    frame = make_churn_frame(3000, seed=5, plan_cardinality=3 * SPARSE_ONEHOT_WIDTH)
+    X, y = frame.drop(columns=["churn"]), frame["churn"]
+    numeric = ["age", "tenure_months", "monthly_spend", "support_tickets_last_90d"]
+    categorical = ["plan", "region"]
+    assert resolve_encoding(X, categorical)["sparse"]
+    assert not resolve_encoding(X, categorical, {"max_categories": 20})["sparse"]
+    assert not resolve_encoding(X, categorical, {"sparse": False})["sparse"]
+
+    encoding = resolve_encoding(X, categorical, {"min_frequency": 5})
+    pipeline = build_pipeline(numeric, categorical, encoding=encoding).fit(X, y)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    assert sp.issparse(preprocessor.transform(X.head(10)))
+
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+    assert any(len(rare) for rare in compiled.infrequent_categories)
+    assert compiled.feature_names_out() == preprocessor.get_feature_names_out().tolist()
+
+    schema = {"feature_names": list(X.columns), "numeric_features": numeric, "categorical_features": categorical}
+    save_model_artifacts(pipeline, tmp_path, schema, {}, "2025-01-30T00:00:00Z", 0.5)
+    reloaded = load_artifacts(tmp_path)["compiled"]
+    rows = X.head(200).astype(object)
+    rows.loc[rows.index[0], "plan"] = "never_seen"
+    arrays = validate_columns({c: rows[c].tolist() for c in rows.columns}, schema)
+    np.testing.assert_allclose(
+        reloaded.predict_proba(arrays),
+        pipeline.predict_proba(pd.DataFrame(arrays, columns=schema["feature_names"]))[:, 1],
+        rtol=1e-10
+    )
+
+
+def test_metrics_match_sklearn_with_ties_curves_and_intervals():
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    from ml.metrics import bootstrap_intervals, compute_classification_metrics, threshold_curve
+
+    rng = np.random.default_rng(7)
+    y_true = rng.integers(0, 2, 5000)
+    # Rounded scores give many tied values
+    y_proba = np.round(0.6 * rng.random(5000) + 0.3 * y_true, 2)
+    y_pred = (y_proba >= 0.5).astype(int)
+
+    metrics = compute_classification_metrics(y_true, y_pred, y_proba)
+    assert metrics["accuracy"] == pytest.approx(accuracy_score(y_true, y_pred), abs=1e-12)
+    assert metrics["precision"] == pytest.approx(precision_score(y_true, y_pred), abs=1e-12)
+    assert metrics["recall"] == pytest.approx(recall_score(y_true, y_pred), abs=1e-12)
+    assert metrics["f1"] == pytest.approx(f1_score(y_true, y_pred), abs=1e-12)
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y_true, y_proba), abs=1e-12)
+
+    curve = threshold_curve(y_true, y_proba, [0.0, 0.3, 0.5, 0.77, 1.0])
+    for t, precision, recall in zip(curve["thresholds"], curve["precision"], curve["recall"]):
+        labels = (y_proba >= t).astype(int)
+        assert precision == pytest.approx(precision_score(y_true, labels, zero_division=0), abs=1e-6)
+        assert recall == pytest.approx(recall_score(y_true, labels, zero_division=0), abs=1e-6)
+
+    intervals = bootstrap_intervals(y_true, y_pred, y_proba, n_resamples=100)
+    for name in ("accuracy", "f1", "roc_auc"):
+        low, high = intervals[name]
+        assert low <= metrics[name] <= high and high - low < 0.1
+
+    # A single class: no ROC-AUC, precision/recall fall back to 0
+    single = compute_classification_metrics(np.zeros(4), np.zeros(4), np.linspace(0, 1, 4), n_bootstrap=10)
+    assert single["roc_auc"] is None and single["confidence_intervals"]["roc_auc"] is None
+    assert single["precision"] == 0.0 and single["confusion_matrix"]["true_negatives"] == 4
+
+
+def test_microbatcher_stop_cancels_pending_requests():
+    import asyncio
+    import threading
+
+    from ml.batching import MicroBatcher
+
+    release = threading.Event()
+
+    def slow_score(model_data, arrays):
+        release.wait(5)
+        return np.zeros(1), np.array([0, 1])
+
+    async def scenario():
+        batcher = MicroBatcher(slow_score, enabled=True, window_ms=0.0)
+        model_data = {"pipeline": object(), "generation": 1}
+        arrays = {"x": np.zeros(1)}
+        inflight = asyncio.ensure_future(batcher.submit(model_data, arrays, 1))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(batcher.submit(model_data, arrays, 1))
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        release.set()
+        done, _ = await asyncio.wait({inflight, queued}, timeout=1)
+        return inflight, queued, done
+
+    inflight, queued, done = asyncio.run(scenario())
+    assert done == {inflight, queued}
+    assert inflight.cancelled() and queued.cancelled()
+
+
+def test_microbatcher_isolates_failing_request():
+    import asyncio
+
+    from ml.batching import MicroBatcher
+
+    calls = []
+
+    def score(model_data, arrays):
+        calls.append(len(arrays["x"]))
+        if np.isinf(arrays["x"]).any():
+            raise ValueError("Input X contains infinity")
+        return arrays["x"] * 0.5, np.array([0, 1])
+
+    async def scenario():
+        batcher = MicroBatcher(score, enabled=True, window_ms=50.0)
+        model_data = {"pipeline": object(), "generation": 1}
+        good = asyncio.ensure_future(batcher.submit(model_data, {"x": np.array([1.0])}, 1))
+        bad = asyncio.ensure_future(batcher.submit(model_data, {"x": np.array([np.inf])}, 1))
+        await asyncio.wait({good, bad}, timeout=5)
+        await batcher.stop()
+        return good, bad
+
+    good, bad = asyncio.run(scenario())
+    assert calls == [2, 1, 1]
+    np.testing.assert_array_equal(good.result()[0], [0.5])
+    with pytest.raises(ValueError, match="infinity"):
+        bad.result()
+
+
+def test_stream_formatting_and_csv_quoting(monkeypatch):
+    import json
+
+    from ml import validation as validation_module
+    from ml.streaming import format_ndjson_predictions, parse_csv_chunk, parse_csv_header
+
+    for labels in (np.array([True, False]), np.array(["stay", 'say "bye"'], dtype=object), np.array([0, 1])):
+        lines = format_ndjson_predictions(labels, np.array([0.25, 0.75])).decode().splitlines()
+        assert [json.loads(line)["label"] for line in lines] == labels.tolist()
+
+    schema = {"feature_names": ["a", "b"], "numeric_features": ["a"], "categorical_features": ["b"]}
+    arrays = parse_csv_chunk([(2, '1,"x, ""y"""')], ["a", "b"], schema)
+    assert arrays["b"].tolist() == ['x, "y"']
+    with pytest.raises(ValueError, match="Line 3: quoted fields spanning several lines"):
+        parse_csv_chunk([(2, "1,x"), (3, '2,"multi')], ["a", "b"], schema)
+
+    # The model's cached validator is used instead of compiling one per chunk
+    validator = CompiledValidator(schema)
+    monkeypatch.setattr(validation_module, "CompiledValidator", None)
+    assert parse_csv_header("a,b", schema, validator) == ["a", "b"]
+    assert parse_csv_chunk([(2, "1,x")], ["a", "b"], schema, validator)["a"].tolist() == [1.0]
+
+
+def _crashing_runner(progress=None, **params):
+    os._exit(1)
+
+
+def _echo_runner(progress=None, **params):
+    return {"timings": {}, "metrics": {}, "rows": 0, "trained_at": None, "version": params["version"]}
+
+
+def test_training_jobs_always_resolve_and_survive_a_crashed_worker():
+    from ml.jobs import TrainingJobManager
+
+    def failing_install(job, result):
+        raise RuntimeError("disk full")
+
+    def failing_cleanup(job):
+        raise RuntimeError("cleanup failed")
+
+    manager = TrainingJobManager()
+    try:
+        job = manager.submit({"version": "v1"}, failing_install, on_finish=failing_cleanup, runner=_echo_runner)
+        job.completed.result(timeout=60)
+        assert job.state == "failed" and "disk full" in job.error
+        assert job.result is None and "version" not in job.to_dict()
+
+        crashed = manager.submit({}, lambda job, result: None, runner=_crashing_runner)
+        crashed.completed.result(timeout=60)
+        assert crashed.state == "failed"
+
+        installed = []
+        job = manager.submit({"version": "v2"}, lambda job, result: installed.append(result), runner=_echo_runner)
+        job.completed.result(timeout=60)
+        assert job.state == "succeeded" and job.result["version"] == "v2" and len(installed) == 1
+    finally:
+        manager.shutdown()
+
+
+def test_score_cli_matches_pipeline(fitted, demo_df, tmp_path):
+    import json
+
+    from ml.artifacts import save_pipeline
+    from ml.score import main as score_main
+
+    pipeline, schema, X = fitted
+    save_pipeline(pipeline, tmp_path)
+    (tmp_path / "schema.json").write_text(json.dumps(schema))
+    (tmp_path / "metrics.json").write_text("{}")
+    (tmp_path / "trained_at.json").write_text(json.dumps({"trained_at": "2025-01-01T00:00:00Z"}))
+
+    output = tmp_path / "predictions.csv"
+    exit_code = score_main([
+        str(API_ROOT / "data" / "demo_churn.csv"), str(output),
+        "--artifacts-dir", str(tmp_path), "--chunk-size", "25", "--workers", "2",
+    ])
+    assert exit_code == 0
+
+    predictions = pd.read_csv(output)
+    assert len(predictions) == len(demo_df)
+    np.testing.assert_allclose(predictions["probability"], pipeline.predict_proba(X)[:, 1], rtol=1e-9)
+
+
+def test_score_cli_with_compiled_only_artifacts(fitted, demo_df, tmp_path):
+    from ml.artifacts import save_model_artifacts
+    from ml.score import score_file
+
+    pipeline, schema, X = fitted
+    save_model_artifacts(pipeline, tmp_path, schema, {}, "2025-01-01T00:00:00Z", 0.5, formats=("compiled",))
+    assert not (tmp_path / "schema.json").exists()
+
+    output = tmp_path / "predictions.csv"
+    report = score_file(API_ROOT / "data" / "demo_churn.csv", output, artifacts_dir=tmp_path, workers=1)
+    assert report["rows"] == len(demo_df)
+    np.testing.assert_allclose(pd.read_csv(output)["probability"], pipeline.predict_proba(X)[:, 1], rtol=1e-9)
+
+
+def test_read_csv_pinned_merges_late_categories(tmp_path):
+    from ml.ingest import infer_dtypes, read_csv_pinned
+
+    path = tmp_path / "data.csv"
+    path.write_text("x,plan,y\n1,basic,0\n2,basic,1\n3.5,pro,0\n,enterprise,1\n")
+
+    dtypes = infer_dtypes(path, target="y", sample_rows=2)
+    assert dtypes == {"x": "float32", "plan": "category"}
+
+    df = read_csv_pinned(path, dtypes)
+    assert str(df["x"].dtype) == "float32"
+    assert isinstance(df["plan"].dtype, pd.CategoricalDtype)
+    assert set(df["plan"].cat.categories) == {"basic", "pro", "enterprise"}
+    assert df["plan"].tolist() == ["basic", "basic", "pro", "enterprise"]
+    assert list(df.columns) == ["x", "plan", "y"]
+
+
+def test_model_store_swaps_snapshots_atomically(fitted):
+    import threading
+
+    from ml.store import model_store
+
+    pipeline, schema, _ = fitted
+    models = [(pipeline, {**schema, "tag": i}, ["f"], {"tag": i}) for i in range(2)]
+    saved = model_store.snapshot()
+    stop = threading.Event()
+    torn = []
+
+    def swap():
+        i = 0
+        while not stop.is_set():
+            p, s, names, metrics = models[i % 2]
+            model_store.set_model(p, names, metrics, s, threshold=0.3 + 0.1 * (i % 2))
+            i += 1
+
+    p, s, names, metrics = models[0]
+    model_store.set_model(p, names, metrics, s, threshold=0.3)
+    writer = threading.Thread(target=swap)
+    writer.start()
+    try:
+        for _ in range(2000):
+            model = model_store.get_model()
+            tag = model["schema"]["tag"]
+            if model["metrics"]["tag"] != tag or model["threshold"] != pytest.approx(0.3 + 0.1 * tag):
+                torn.append(model)
+    finally:
+        stop.set()
+        writer.join()
+        model_store._snapshot = saved
+
+    assert not torn
+
+
+def test_registry_loads_lazily_and_evicts_lru(fitted, tmp_path):
+    from ml.artifacts import save_json, save_pipeline
+    from ml.registry import CHAMPION, ModelRegistry
+
+    pipeline, schema, _ = fitted
+    registry = ModelRegistry(tmp_path, cache_size=2)
+    for version in ("v1", "v2", "v3"):
+        save_pipeline(pipeline, registry.version_dir(version))
+        for name, data in (("schema", schema), ("metrics", {}), ("trained_at", {"trained_at": version})):
+            save_json(registry.version_dir(version) / f"{name}.json", data)
+        registry.register(version, schema, {}, version, 0.5)
+
+    # A fresh registry only reads the index
+    reloaded = ModelRegistry(tmp_path, cache_size=2)
+    reloaded.load_index()
+    assert reloaded.resolve(CHAMPION) == "v3"
+    assert not any(v["loaded"] for v in reloaded.list_versions()["versions"])
+
+    assert reloaded.get("v1").trained_at == "v1"
+    assert reloaded.get(CHAMPION).version == "v3"
+    assert reloaded.get("v1") is reloaded.get("v1")
+    reloaded.get("v2")
+    loaded = {v["version"] for v in reloaded.list_versions()["versions"] if v["loaded"]}
+    assert loaded == {"v1", "v2"}
+
+    with pytest.raises(KeyError):
+        reloaded.get("v9")
+
+
+def test_registry_processes_share_the_index(fitted, tmp_path):
+    from ml.artifacts import save_json, save_pipeline
+    from ml.registry import CHAMPION, ModelRegistry
+
+    pipeline, schema, _ = fitted
+    first, second = ModelRegistry(tmp_path), ModelRegistry(tmp_path)
+    for registry in (first, second):
+        registry.load_index()
+    for registry, version in ((first, "v1"), (second, "v2")):
+        save_pipeline(pipeline, registry.version_dir(version))
+        for name, data in (("schema", schema), ("metrics", {}), ("trained_at", {"trained_at": version})):
+            save_json(registry.version_dir(version) / f"{name}.json", data)
+        registry.register(version, schema, {}, version, 0.5)
+
+    # The second writer re-read the index: v1 is not lost
+    assert {v["version"] for v in second.list_versions()["versions"]} == {"v1", "v2"}
+    assert not second.reload_if_changed()
+    assert first.resolve(CHAMPION) == "v1"
+    assert first.reload_if_changed()
+    assert first.resolve(CHAMPION) == "v2"
+    assert not first.reload_if_changed()
+
+
+def test_compiled_artifacts_roundtrip_memmapped(fitted, tmp_path):
+    from ml.artifacts import PARAMS_NAME, load_artifacts, save_model_artifacts
+
+    pipeline, schema, X = fitted
+    formats = save_model_artifacts(pipeline, tmp_path, schema, {"f1": 1.0}, "2025-01-30T00:00:00Z", 0.4)
+    assert formats == ("joblib", "compiled")
+
+    artifacts = load_artifacts(tmp_path)
+    compiled = artifacts["compiled"]
+    assert artifacts["pipeline"] is None
+    assert artifacts["threshold"] == 0.4
+    assert artifacts["schema"] == schema
+    assert isinstance(compiled.coef.base, np.memmap)
+
+    X = _with_gaps(X)
+    arrays = validate_columns({c: X[c].tolist() for c in X.columns}, schema, source="columns")
+    expected = pipeline.predict_proba(pd.DataFrame(arrays, columns=schema["feature_names"]))[:, 1]
+    np.testing.assert_allclose(compiled.predict_proba(arrays), expected, rtol=1e-12)
+
+    # The legacy format is still readable on request
+    assert load_artifacts(tmp_path, prefer_compiled=False)["pipeline"] is not None
+
+    # A corrupted parameter file fails the parity check
+    from ml.artifacts import load_compiled
+    from ml.compiled import check_parity
+
+    params = np.fromfile(tmp_path / PARAMS_NAME, dtype=np.uint8)
+    params[:8] = np.frombuffer(np.float64(1e6).tobytes(), dtype=np.uint8)
+    params.tofile(tmp_path / PARAMS_NAME)
+    with pytest.raises(ValueError, match="does not match"):
+        check_parity(pipeline, load_compiled(tmp_path)[0])
+
+
+def test_prediction_cache_lru_ttl_and_missing_values(monkeypatch):
+    from ml import cache as cache_module
+    from ml.cache import PredictionCache
+
+    arrays = {
+        "x": np.array([1.0, np.nan, 1.0]),
+        "c": np.array(["a", np.nan, "a"], dtype=object),
+    }
+    cache = PredictionCache(enabled=True, max_entries=2, ttl_s=10)
+    lookup = cache.lookup(1, arrays, ["x", "c"])
+    assert lookup.missing.tolist() == [0, 1, 2]
+    cache.fill(lookup, np.array([0.1, 0.2, 0.1]))
+
+    # NaN and None are the same key; a new generation never sees old entries
+    again = cache.lookup(1, {"x": np.array([np.nan]), "c": np.array([None], dtype=object)}, ["x", "c"])
+    assert again.missing.size == 0 and again.proba.tolist() == [0.2]
+    assert cache.lookup(2, arrays, ["x", "c"]).missing.tolist() == [0, 1, 2]
+
+    cache.fill(cache.lookup(1, {"x": np.array([5.0]), "c": np.array(["b"], dtype=object)}, ["x", "c"]), np.array([0.5]))
+    assert cache.stats()["evictions"] == 1
+
+    now = cache_module.time.monotonic()
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now + 11)
+    assert cache.lookup(1, {"x": np.array([5.0]), "c": np.array(["b"], dtype=object)}, ["x", "c"]).missing.size == 1
+    assert cache.stats()["expirations"] == 1
+
+
+def test_metrics_histogram_and_overhead():
+    from benchmarks.instrumentation import metrics_overhead
+    from observability import MetricsRegistry, render_labeled_counts
+
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, ("/predict",))
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/predict",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/predict",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/predict",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/predict"} 3' in text
+
+    # Label values kept outside the registry are escaped the same way
+    lines = render_labeled_counts("issues_total", "Issues.", ("feature",), {('say "hi"\\\n',): 2})
+    assert lines[-1] == 'issues_total{feature="say \\"hi\\"\\\\\\n"} 2'
+
+    # Per-request instrumentation stays in the microsecond range
+    assert metrics_overhead(2000) < 50e-6
+
+
+def test_access_log_samples_successes_but_keeps_errors_and_slow_requests():
+    import io
+    import json
+
+    from access_log import AccessLogger
+    from benchmarks.instrumentation import access_log_overhead
+
+    stream = io.StringIO()
+    access_logger = AccessLogger("test.access", sample_rate=0.0, slow_ms=500, stream=stream)
+    access_logger.start()
+    access_logger.log_request("a", "POST", "/predict", 200, 3.0)
+    access_logger.log_request("b", "POST", "/predict", 400, 3.0)
+    access_logger.log_request("c", "POST", "/predict", 500, 3.0)
+    access_logger.log_request("d", "POST", "/train", 200, 750.0)
+    access_logger.stop()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["request_id"] for r in records] == ["b", "c", "d"]
+    assert records[2]["slow"] is True and "slow" not in records[0]
+
+    # A blocking sink does not slow the request path down
+    overhead = access_log_overhead(200, write_delay_s=0.001)
+    assert overhead["queue"] < overhead["sync"] / 10
+
+    # A stream that cannot keep up costs dropped lines, not memory
+    stream = io.StringIO()
+    bounded = AccessLogger("test.access.bounded", stream=stream, queue_size=2)
+    for request_id in "abcde":
+        bounded.log_request(request_id, "GET", "/health", 200, 1.0)
+    assert bounded.dropped == 3
+    bounded.start()
+    bounded.stop()
+    assert [json.loads(line)["request_id"] for line in stream.getvalue().splitlines()] == ["a", "b"]
+
+
+def test_benchmark_datasets_and_baseline_comparison(tmp_path):
+    from benchmarks.datasets import make_churn_frame, write_churn_csv
+    from benchmarks.suite import compare
+
+    frame = make_churn_frame(500, seed=3, plan_cardinality=12, region_cardinality=40)
+    assert frame["plan"].nunique() == 12 and frame["region"].nunique() <= 40
+    assert 0.05 < frame["churn"].mean() < 0.95
+    pd.testing.assert_frame_equal(frame, make_churn_frame(500, seed=3, plan_cardinality=12, region_cardinality=40))
+
+    path = write_churn_csv(tmp_path / "churn.csv", 250)
+    assert len(pd.read_csv(path)) == 250
+
+    baseline = {"metrics": {"predict.p95_ms": 10.0, "predict.p50_ms": 0.2, "train.wall_s": 2.0}}
+    current = {"metrics": {"predict.p95_ms": 13.0, "predict.p50_ms": 0.4, "train.wall_s": 2.1}}
+    rows = {row["metric"]: row for row in compare(current, baseline, threshold=0.2)}
+    assert rows["predict.p95_ms"]["regression"]
+    # +100% but below the 0.5 ms noise floor
+    assert not rows["predict.p50_ms"]["regression"]
+    assert not rows["train.wall_s"]["regression"]
+
+
+def test_incremental_state_matches_full_fit_and_warm_start_preserves_scores(fitted, demo_df):
+    from ml.incremental import fit_state, merge_state, preprocessing_from_state, warm_start
+
+    pipeline, schema, X = fitted
+    numeric, categorical = schema["numeric_features"], schema["categorical_features"]
+    X = X.copy()
+    X.loc[X.index[0], "age"] = np.nan
+
+    # Statistics merged from two halves equal those of a fit on all rows
+    half = len(X) // 2
+    state = merge_state(
+        fit_state(X.iloc[:half], numeric, categorical), fit_state(X.iloc[half:], numeric, categorical)
+    )
+    params = preprocessing_from_state(state, numeric, categorical)
+    refit = build_pipeline(numeric, categorical).fit(X, demo_df["churn"])
+    expected = CompiledPipeline.from_pipeline(refit)
+    np.testing.assert_allclose(params["mean"], expected.mean, rtol=1e-10)
+    np.testing.assert_allclose(params["scale"], expected.scale, rtol=1e-10)
+    assert params["categorical_fill"] == expected.categorical_fill
+    assert [c.tolist() for c in params["categories"]] == [c.tolist() for c in expected.categories]
+
+    # Re-expressed coefficients score exactly like the original model,
+    # with a zero weight for a category it has never seen
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+    grown = merge_state(state, fit_state(
+        pd.DataFrame({**{n: [1000.0] for n in numeric}, "plan": ["platinum"], "region": ["eu"]}),
+        numeric, categorical
+    ))
+    warm = warm_start(compiled, preprocessing_from_state(grown, numeric, categorical))
+    assert "platinum" in warm.category_index[0]
+    arrays = validate_columns({c: X[c].tolist() for c in X.columns}, schema, source="columns")
+    arrays["age"] = np.where(np.isnan(arrays["age"]), compiled.numeric_fill[0], arrays["age"])
+    np.testing.assert_allclose(warm.predict_proba(arrays), compiled.predict_proba(arrays), rtol=1e-10)
+
+
+def test_incremental_update_keeps_sparse_input_and_is_scorable(demo_df, tmp_path):
+    from ml.incremental import design_matrix, run_incremental_training
+    from ml.score import score_file
+    from ml.training import run_training
+
+    data = API_ROOT / "data" / "demo_churn.csv"
+    run_training(str(data), "churn", 0.2, 0.5, artifacts_dir=str(tmp_path / "base"), encoding={"sparse": True})
+    result = run_incremental_training(
+        str(data), str(tmp_path / "base"), 0.25, artifacts_dir=str(tmp_path / "updated")
+    )
+    schema, updated = result["schema"], result["compiled"]
+    assert schema["encoding"]["sparse"]
+
+    # Only the rows the model was fitted on count as added
+    report = result["incremental"]
+    assert report["rows_held_out"] == int(np.ceil(len(demo_df) * 0.25))
+    assert report["rows_added"] == len(demo_df) - report["rows_held_out"]
+
+    X = demo_df[schema["feature_names"]]
+    arrays = validate_columns({c: X[c].tolist() for c in X.columns}, schema, source="columns")
+    sparse = design_matrix(updated, arrays, sparse=True)
+    assert sp.issparse(sparse)
+    np.testing.assert_array_equal(sparse.toarray(), design_matrix(updated, arrays))
+
+    # The compiled-only version carries its schema in the manifest
+    output = tmp_path / "predictions.csv"
+    score_file(data, output, artifacts_dir=tmp_path / "updated", workers=1)
+    np.testing.assert_allclose(pd.read_csv(output)["probability"], updated.predict_proba(arrays), rtol=1e-9)
+
+
+def test_tuning_reuses_fold_preprocessing_and_halves_candidates(demo_df, monkeypatch):
+    from ml import tuning
+
+    assert tuning.halving_schedule(20, 40_000, 3, 50) == [4444, 13333, 40000]
+    assert tuning.halving_schedule(1, 500, 3, 50) == [500]
+
+    fits = []
+    original = tuning.prepare_folds
+    monkeypatch.setattr(tuning, "prepare_folds", lambda *a, **k: fits.append(1) or original(*a, **k))
+
+    X, y = demo_df.drop(columns=["churn"]), demo_df["churn"]
+    grid = {"C": [0.01, 0.1, 1.0, 10.0], "penalty": ["l2"], "class_weight": [None, "balanced"]}
+    report = tuning.tune(
+        X, y, ["age", "tenure_months", "monthly_spend", "support_tickets_last_90d"], ["plan", "region"],
+        grid=grid, folds=3, successive_halving=True, factor=2, n_jobs=1
+    )
+    # One preprocessing pass for all candidates and rungs
+    assert len(fits) == 1
+    assert [r["candidates"] for r in report["rungs"]] == [8, 4][:len(report["rungs"])]
+    assert report["rungs"][-1]["train_rows_per_fold"] == max(r["train_rows_per_fold"] for r in report["rungs"])
+    assert [c["rank"] for c in report["candidates"]] == list(range(1, 9))
+    finalists = [c for c in report["candidates"] if c["rung"] == len(report["rungs"]) - 1]
+    assert report["best_params"] == finalists[0]["params"]
+
+
+def test_tuning_breaks_score_ties_deterministically(demo_df, monkeypatch):
+    from ml import tuning
+
+    # Every candidate scores the same; fit times vary from run to run
+    timings = iter(np.random.default_rng().random(1000))
+    monkeypatch.setattr(tuning, "_fit_and_score", lambda *a, **k: (0.5, float(next(timings))))
+
+    X, y = demo_df.drop(columns=["churn"]), demo_df["churn"]
+    grid = {"C": [10.0, 0.1, 1.0], "penalty": ["l2"], "class_weight": ["balanced", None]}
+    report = tuning.tune(
+        X, y, ["age", "tenure_months", "monthly_spend", "support_tickets_last_90d"], ["plan", "region"],
+        grid=grid, folds=3, n_jobs=1
+    )
+    # Simpler model (smaller C) first, then grid order
+    assert [(c["params"]["C"], c["params"]["class_weight"]) for c in report["candidates"]] == [
+        (0.1, "balanced"), (0.1, None), (1.0, "balanced"), (1.0, None), (10.0, "balanced"), (10.0, None)
+    ]
+
+def test_compiled_validator_matches_validate_columns_and_reports_quality(fitted):
+    pipeline, schema, X = fitted
+    X = _with_gaps(X)
+    columns = {c: X[c].tolist() for c in X.columns}
+    schema = {**schema, "numeric_ranges": numeric_ranges(fitted[2], schema["numeric_features"])}
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+
+    for validator in (CompiledValidator.from_model(schema, compiled=compiled),
+                      CompiledValidator.from_model(schema, pipeline=pipeline)):
+        arrays = validator.validate(columns)
+        expected = validate_columns(columns, schema)
+        for name in schema["feature_names"]:
+            pd.testing.assert_series_equal(pd.Series(arrays[name]), pd.Series(expected[name]))
+
+        # Training data: only the injected unknown region; missing values are not issues
+        assert validator.quality(arrays) == {
+            "out_of_vocabulary": {"region": 1}, "below_range": {}, "above_range": {}
+        }
+
+        arrays["age"] = arrays["age"].copy()
+        arrays["age"][3] = schema["numeric_ranges"]["age"][1] + 1
+        arrays["tenure_months"] = np.full(len(X), -1.0)
+        report = validator.quality(arrays)
+        assert report["above_range"] == {"age": 1}
+        assert report["below_range"] == {"tenure_months": len(X)}
+
+    with pytest.raises(ValueError, match="Missing columns"):
+        validator.validate({k: v for k, v in columns.items() if k != "age"})
@@ -0,0 +1,156 @@
+"""
+Streaming multipart/form-data parsing for training uploads.
+
+Starlette spools every uploaded file to an anonymous temporary file; a
+training job runs in another process and needs a path, so the upload used to
+be copied a second time into a named file. Here the request body is parsed as
+it arrives and file parts are written straight to named temporary files, so a
+multi-GB CSV crosses the disk once. Text fields are returned as strings for
+the endpoint to validate.
+"""
+
+import tempfile
+from pathlib import Path
+from typing import IO, AsyncIterator, Dict, List, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+
+class _FormCollector:
+    """python-multipart callbacks; file bytes are queued and written off the event loop."""
+
+    def __init__(self, file_fields: Sequence[str], suffix: str):
+        self.file_fields = set(file_fields)
+        self.suffix = suffix
+        self.fields: Dict[str, str] = {}
+        self.paths: Dict[str, Path] = {}
+        self.pending: List[Tuple[IO[bytes], bytes]] = []
+        self.to_close: List[IO[bytes]] = []
+        self.opened: List[IO[bytes]] = []
+        self.closed: List[IO[bytes]] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._name = ""
+        self._data = bytearray()
+        self._file = None
+        self._is_file = False
+
+    def callbacks(self) -> Dict[str, object]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": lambda data, start, end: self._add(data, start, end, "_header_name"),
+            "on_header_value": lambda data, start, end: self._add(data, start, end, "_header_value"),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def _add(self, data: bytes, start: int, end: int, attr: str) -> None:
+        setattr(self, attr, getattr(self, attr) + data[start:end])
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._data = bytearray()
+        self._file = None
+        self._is_file = False
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise ValueError('Multipart part without a "name" in its Content-Disposition')
+        self._name = options[b"name"].decode("utf-8", errors="replace")
+        self._is_file = b"filename" in options
+        if self._is_file and self._name in self.file_fields:
+            self._file = tempfile.NamedTemporaryFile(suffix=self.suffix, delete=False)
+            self.opened.append(self._file)
+            self.paths[self._name] = Path(self._file.name)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is not None:
+            self.pending.append((self._file, data[start:end]))
+        elif not self._is_file:
+            self._data += data[start:end]
+        # Files under unexpected field names are discarded
+
+    def on_part_end(self) -> None:
+        if self._file is not None:
+            self.to_close.append(self._file)
+        elif not self._is_file:
+            self.fields[self._name] = self._data.decode("utf-8", errors="replace")
+
+    def flush(self) -> None:
+        """Write queued file bytes and close finished files (runs in a worker thread)."""
+        pending, self.pending = self.pending, []
+        for file, data in pending:
+            file.write(data)
+        to_close, self.to_close = self.to_close, []
+        for file in to_close:
+            file.close()
+            self.closed.append(file)
+
+    def discard(self) -> None:
+        """Close and remove every file received so far."""
+        for file in self.opened:
+            file.close()
+        for path in self.paths.values():
+            path.unlink(missing_ok=True)
+
+
+async def receive_form(
+    stream: AsyncIterator[bytes],
+    content_type: str,
+    file_fields: Sequence[str],
+    suffix: str = ".csv"
+) -> Tuple[Dict[str, str], Dict[str, Path]]:
+    """
+    Parse a multipart/form-data body, writing file parts to named temp files.
+
+    Args:
+        stream: Request body chunks (`Request.stream()`)
+        content_type: Content-Type header (carries the boundary)
+        file_fields: Field names whose files are kept; other files are dropped
+        suffix: Suffix of the temporary files
+
+    Returns:
+        Tuple (text fields, paths of the received files by field name); the
+        caller owns (and must remove) the files
+
+    Raises:
+        ValueError: If the body is not multipart/form-data or is malformed
+    """
+    media_type, params = parse_options_header(content_type or "")
+    boundary = params.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected a multipart/form-data body")
+
+    collector = _FormCollector(file_fields, suffix)
+    parser = multipart.MultipartParser(boundary, collector.callbacks())
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+            if collector.pending or collector.to_close:
+                await run_in_threadpool(collector.flush)
+        parser.finalize()
+        await run_in_threadpool(collector.flush)
+        if len(collector.opened) != len(collector.closed):
+            raise ValueError("Multipart body ended inside a file part")
+    except BaseException as e:
+        collector.discard()
+        if isinstance(e, multipart.exceptions.FormParserError):
+            raise ValueError(f"Malformed multipart body: {e}")
+        raise
+    return collector.fields, collector.paths
@@ -9,6 +9,7 @@ print('Testing imports...')
 from ml.pipeline import build_pipeline
 from ml.metrics import compute_classification_metrics  
 from ml.store import model_store
+from ml.scoring import apply_threshold, positive_proba
 
 # Test data loading
 import pandas as pd
@@ -30,8 +31,8 @@ pipeline.fit(X_train, y_train)
 print(f'✓ Pipeline trained on {len(X_train)} samples')
 
 # Test predictions
-y_pred = pipeline.predict(X_test)
-y_proba = pipeline.predict_proba(X_test)[:, 1]
+y_proba = positive_proba(pipeline, X_test)
+y_pred = apply_threshold(y_proba, 0.5, pipeline.classes_)
 print(f'✓ Predictions made on {len(X_test)} samples')
 
 # Test metrics